@@ -0,0 +1 @@
+"""Synthetic corpora and page-level timings (see ``python -m benchmarks --help``)."""
@@ -0,0 +1,96 @@
+"""Benchmark commands.
+
+    python -m benchmarks generate --size 10000 [--out DIR] [--seed N]
+    python -m benchmarks run [--corpus DIR] [--page NAME ...] [--repeat N] [--output FILE]
+    python -m benchmarks compare BASE.json NEW.json [--threshold 0.2]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from benchmarks.pages import ROOT, SCENARIOS
+from benchmarks.runner import compare, run
+from benchmarks.synthetic import generate
+
+CORPORA_DIR = os.path.join(ROOT, "benchmarks", "corpora")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+def _label(size):
+    return f"{size // 1000}k" if size >= 1000 and size % 1000 == 0 else str(size)
+
+
+def _generate(args):
+    out = args.out or os.path.join(CORPORA_DIR, _label(args.size))
+    papers_dir, exhyte_dir = generate(out, args.size, args.seed,
+                                      on_progress=lambda n: print(f"{n}/{args.size}", file=sys.stderr))
+    print(f"{args.size} papers -> {papers_dir}, {exhyte_dir}")
+
+
+def _fmt(seconds):
+    return f"{'-':>13}" if seconds is None else f"{seconds * 1000:10.1f} ms"
+
+
+def _run(args):
+    def report(page, result):
+        for step, timing in result["steps"].items():
+            print(f"{page}.{step:<16} {_fmt(timing['median'])}")
+        if result["error"]:
+            print(f"{page}: error: {result['error']}")
+
+    doc = run(args.corpus, args.page, args.repeat, args.timeout, on_page=report)
+    label = os.path.basename(os.path.normpath(args.corpus)) if args.corpus else "shipped"
+    output = args.output or os.path.join(RESULTS_DIR, f"{doc['meta']['commit']}-{label}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2)
+    print(f"{doc['meta']['papers']} papers, commit {doc['meta']['commit']} -> {output}")
+
+
+def _compare(args):
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"base {base['meta']['commit']} ({base['meta']['papers']} papers) vs "
+          f"new {new['meta']['commit']} ({new['meta']['papers']} papers)")
+    slower = 0
+    for step, a, b, ratio, flag in compare(base, new, args.threshold):
+        print(f"{step:<36} {_fmt(a)} {_fmt(b)} {'' if ratio is None else f'{ratio:6.2f}x'} {flag}")
+        slower += flag == "slower"
+    if slower:
+        sys.exit(1)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m benchmarks")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("generate", help="write a synthetic Papers/ + exhyte_data/ corpus")
+    p.add_argument("--size", type=int, default=1000)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out", help="default: benchmarks/corpora/<size>")
+    p.set_defaults(func=_generate)
+
+    p = sub.add_parser("run", help="time every page against a corpus")
+    p.add_argument("--corpus", help="generated corpus directory (default: the shipped folders)")
+    p.add_argument("--page", action="append", choices=sorted(SCENARIOS))
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--timeout", type=float, default=600, help="seconds per page run")
+    p.add_argument("--output", help="default: benchmarks/results/<commit>-<corpus>.json")
+    p.set_defaults(func=_run)
+
+    p = sub.add_parser("compare", help="compare two result files; exits 1 on a regression")
+    p.add_argument("base")
+    p.add_argument("new")
+    p.add_argument("--threshold", type=float, default=0.2, help="relative change to flag")
+    p.set_defaults(func=_compare)
+
+    args = ap.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
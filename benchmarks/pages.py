@@ -0,0 +1,155 @@
+"""Headless timing of the Streamlit pages with ``streamlit.testing``.
+
+Each scenario drives one page through its load, filter, select and render
+paths and times every ``AppTest.run()``. A scenario is meant to run in a
+fresh process (see :func:`benchmarks.runner.run_page`) so that the first load
+is genuinely cold; the folders and cache directory come from the usual
+``PAPERS_DIR`` / ``EXHYTE_DIR`` / ``CORPUS_CACHE_DIR`` variables.
+
+    python -m benchmarks.pages browse_by_subject --repeat 3
+"""
+
+import argparse
+import itertools
+import json
+import os
+import re
+import statistics
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Timer:
+    """Collects the duration of each named step."""
+
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.samples = {}
+
+    def once(self, step, action):
+        started = time.perf_counter()
+        at = action()
+        self.samples.setdefault(step, []).append(time.perf_counter() - started)
+        if at.exception:
+            raise RuntimeError(f"{step}: {at.exception[0].value}")
+        return at
+
+    def repeated(self, step, action):
+        """Time ``action`` ``repeat`` times (for warm paths)."""
+        at = None
+        for _ in range(self.repeat):
+            at = self.once(step, action)
+        return at
+
+    def results(self):
+        return {step: {"median": statistics.median(s), "min": min(s), "samples": s}
+                for step, s in self.samples.items()}
+
+
+def _app(page, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    return AppTest.from_file(os.path.join(ROOT, "pages", page + ".py"), default_timeout=timeout)
+
+
+def _facet_value(label):
+    """Facet value of a ``"value (count)"`` option label."""
+    value = re.sub(r" \(\d+\)$", "", label)
+    return int(value) if value.isdigit() else value
+
+
+def browse_by_subject(timer, timeout):
+    at = _app("browse_by_subject", timeout)
+    timer.once("load_cold", at.run)
+    timer.repeated("rerun_warm", at.run)
+    subjects = [_facet_value(o) for o in at.multiselect(key="facet_subject").options[:1]]
+    timer.repeated("filter_subject", lambda: at.multiselect(key="facet_subject").set_value(subjects).run())
+    years = [_facet_value(o) for o in at.multiselect(key="facet_year").options[:1]]
+    timer.repeated("filter_year", lambda: at.multiselect(key="facet_year").set_value(years).run())
+    if at.number_input:
+        timer.repeated("page", lambda: at.number_input[0].set_value(2).run())
+    if at.radio:
+        picks = itertools.cycle(at.radio[0].options[:2])
+        timer.repeated("select", lambda: at.radio[0].set_value(next(picks)).run())
+    timer.repeated("render_warm", at.run)
+
+
+def paper_summary(timer, timeout):
+    at = _app("paper_summary", timeout)
+    timer.once("load_cold", at.run)
+    timer.repeated("rerun_warm", at.run)
+    if at.sidebar.number_input:
+        timer.repeated("page", lambda: at.sidebar.number_input[0].set_value(2).run())
+    timer.repeated("search", lambda: at.sidebar.text_input[0].input("language model hypothesis").run())
+    if at.sidebar.button:
+        timer.repeated("select", lambda: at.sidebar.button[0].click().run())
+    timer.repeated("render_warm", at.run)
+
+
+def survey_exhyte(timer, timeout):
+    from survey.stub_server import StubHandler
+
+    # Local stub endpoint without artificial delays, so only page cost is timed
+    StubHandler.delay = 0
+    StubHandler.first_token_delay = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    try:
+        at = _app("survey_exhyte", timeout)
+        at.run()
+        timer.once("load_cold", lambda: at.sidebar.text_input[0].input("sk-bench").run())
+        timer.repeated("rerun_warm", at.run)
+        years = at.sidebar.multiselect[0].options[:1]
+        timer.repeated("filter_year", lambda: at.sidebar.multiselect[0].set_value(years).run())
+        boxes = itertools.cycle(range(2, 6))
+        timer.repeated("select", lambda: at.sidebar.checkbox[next(boxes)].check().run())
+        timer.once("generate", lambda: at.button(key="generate").click().run())
+        timer.repeated("render_cached", lambda: at.button(key="generate").click().run())
+    finally:
+        server.shutdown()
+
+
+def workflow_coverage(timer, timeout):
+    from corpus.coverage import NORMALIZATIONS
+
+    at = _app("workflow_coverage", timeout)
+    timer.once("load_cold", at.run)
+    timer.repeated("rerun_warm", at.run)
+    stages = itertools.cycle((1, 2))
+    timer.repeated("level", lambda: at.sidebar.selectbox[0].select_index(next(stages)).run())
+    years = at.sidebar.multiselect[0].options[:2]
+    timer.repeated("filter_year", lambda: at.sidebar.multiselect[0].set_value(years).run())
+    normalizations = itertools.cycle(NORMALIZATIONS[1:] + NORMALIZATIONS[:1])
+    timer.repeated("normalize", lambda: at.radio[0].set_value(next(normalizations)).run())
+
+
+SCENARIOS = {
+    "browse_by_subject": browse_by_subject,
+    "paper_summary": paper_summary,
+    "survey_exhyte": survey_exhyte,
+    "workflow_coverage": workflow_coverage,
+}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m benchmarks.pages")
+    ap.add_argument("page", choices=sorted(SCENARIOS))
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--timeout", type=float, default=600)
+    args = ap.parse_args(argv)
+
+    timer = Timer(args.repeat)
+    error = None
+    try:
+        SCENARIOS[args.page](timer, args.timeout)
+    except Exception as e:  # report what was timed so far
+        error = f"{type(e).__name__}: {e}"
+    print(json.dumps({"page": args.page, "steps": timer.results(), "error": error}))
+
+
+if __name__ == "__main__":
+    main()
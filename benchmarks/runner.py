@@ -0,0 +1,110 @@
+"""Run the page scenarios against a corpus and compare result files.
+
+Every page runs in its own process with a fresh cache directory, so
+``load_cold`` includes building the manifest and indexes. A result file is
+JSON::
+
+    {"meta": {"commit", "created", "corpus", "papers", "python", "streamlit", ...},
+     "results": {"<page>.<step>": {"median", "min", "samples"}, ...},
+     "errors": {"<page>": "..."}}
+"""
+
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.pages import ROOT, SCENARIOS
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True)
+    except OSError:
+        return "unknown"
+    commit = out.stdout.strip() or "unknown"
+    return commit + ("-dirty" if dirty.stdout.strip() else "")
+
+
+def corpus_dirs(corpus):
+    """``(papers_dir, exhyte_dir)`` of a generated corpus, or the shipped folders for ``None``."""
+    if corpus is None:
+        return os.path.join(ROOT, "Papers"), os.path.join(ROOT, "exhyte_data")
+    return os.path.join(corpus, "Papers"), os.path.join(corpus, "exhyte_data")
+
+
+def run_page(page, corpus=None, repeat=3, timeout=600):
+    """Time one page in a fresh process; returns its ``{"steps", "error"}``."""
+    papers_dir, exhyte_dir = corpus_dirs(corpus)
+    cache_dir = tempfile.mkdtemp(prefix=f"bench-{page}-")
+    env = dict(os.environ, PAPERS_DIR=papers_dir, EXHYTE_DIR=exhyte_dir, CORPUS_CACHE_DIR=cache_dir)
+    env.pop("CORPUS_SNAPSHOT", None)
+    env.pop("OPENAI_BASE_URL", None)
+    try:
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.pages", page, "--repeat", str(repeat), "--timeout", str(timeout)],
+            cwd=ROOT, env=env, capture_output=True, text=True,
+        )
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    lines = proc.stdout.strip().splitlines()
+    try:
+        return json.loads(lines[-1])
+    except (IndexError, ValueError):
+        return {"page": page, "steps": {}, "error": (proc.stderr.strip().splitlines() or ["no output"])[-1]}
+
+
+def run(corpus=None, pages=None, repeat=3, timeout=600, on_page=None):
+    """Run ``pages`` (default: all) and return the result document."""
+    papers_dir, _ = corpus_dirs(corpus)
+    import streamlit
+
+    doc = {
+        "meta": {
+            "commit": git_commit(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "corpus": corpus or "shipped",
+            "papers": sum(1 for n in os.listdir(papers_dir) if n.endswith(".json")),
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "streamlit": streamlit.__version__,
+            "platform": platform.platform(),
+        },
+        "results": {},
+        "errors": {},
+    }
+    for page in pages or sorted(SCENARIOS):
+        result = run_page(page, corpus, repeat, timeout)
+        for step, timing in result["steps"].items():
+            doc["results"][f"{page}.{step}"] = timing
+        if result["error"]:
+            doc["errors"][page] = result["error"]
+        if on_page:
+            on_page(page, result)
+    return doc
+
+
+def compare(base, new, threshold=0.2):
+    """Rows ``(step, base median, new median, ratio, flag)`` of two result documents.
+
+    ``flag`` is ``"slower"`` / ``"faster"`` when the medians differ by more
+    than ``threshold`` (a fraction), else ``""``.
+    """
+    rows = []
+    for step in sorted(set(base["results"]) | set(new["results"])):
+        a = base["results"].get(step, {}).get("median")
+        b = new["results"].get(step, {}).get("median")
+        ratio = b / a if a and b is not None else None
+        flag = ""
+        if ratio is not None and ratio > 1 + threshold:
+            flag = "slower"
+        elif ratio is not None and ratio < 1 / (1 + threshold):
+            flag = "faster"
+        rows.append((step, a, b, ratio, flag))
+    return rows
@@ -0,0 +1,203 @@
+"""Schema-faithful synthetic corpora for benchmarking.
+
+Every synthetic paper is derived from one of the shipped records: the JSON
+structure, key order, list lengths and string lengths are kept, while the
+text is redrawn from the corpus vocabulary and the metadata (title, authors,
+date, link, subjects, tool and dataset names) is regenerated. Each paper is
+written to both ``Papers/`` and ``exhyte_data/`` under the same
+``Author et al. - YEAR - Title.json`` filename, and ``performed`` flags of
+the ExHyTe record are occasionally flipped. Output is deterministic for a
+given seed.
+"""
+
+import json
+import os
+import random
+import re
+
+from corpus.config import EXHYTE_DIR, PAPERS_DIR
+from corpus.facets import _item_name
+
+YEARS = (2019, 2020, 2021, 2022, 2023, 2024, 2025)
+YEAR_WEIGHTS = (1, 1, 2, 3, 6, 12, 16)
+MONTHS = ("January", "February", "March", "April", "May", "June", "July", "August", "September",
+          "October", "November", "December")
+PERFORMED_FLIP = 0.15
+
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z-]{2,}")
+_SURNAME_RE = re.compile(r"^([A-Z][^\s]+)")
+
+
+def _load_templates(papers_dir, exhyte_dir):
+    templates = []
+    for name in sorted(os.listdir(papers_dir)):
+        if not name.endswith(".json") or not os.path.exists(os.path.join(exhyte_dir, name)):
+            continue
+        with open(os.path.join(papers_dir, name), encoding="utf-8") as f:
+            paper = json.load(f)
+        with open(os.path.join(exhyte_dir, name), encoding="utf-8") as f:
+            exhyte = json.load(f)
+        templates.append((name, paper, exhyte))
+    return templates
+
+
+def _strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for v in value.values():
+            yield from _strings(v)
+    elif isinstance(value, list):
+        for v in value:
+            yield from _strings(v)
+
+
+class CorpusGenerator:
+    """Draws synthetic ``(filename, paper, exhyte)`` triples from the shipped corpus."""
+
+    def __init__(self, papers_dir=PAPERS_DIR, exhyte_dir=EXHYTE_DIR, seed=0, size=1000):
+        self.templates = _load_templates(papers_dir, exhyte_dir)
+        if not self.templates:
+            raise ValueError(f"no paper present in both {papers_dir} and {exhyte_dir}")
+        self.seed = seed
+        rng = random.Random(seed)
+
+        words = set()
+        surnames, subjects, tools, datasets = set(), set(), set(), set()
+        for name, paper, exhyte in self.templates:
+            for text in _strings(paper):
+                words.update(w.lower() for w in _WORD_RE.findall(text))
+            match = _SURNAME_RE.match(name)
+            if match:
+                surnames.add(match.group(1))
+            subjects.update(paper.get("subject_area", {}).get("areas", []))
+            method = paper.get("method", {})
+            tools.update(filter(None, map(_item_name, method.get("tools", []))))
+            for items in (method.get("benchmark_datasets", []),
+                          paper.get("performance_summary", {}).get("benchmark_datasets", [])):
+                datasets.update(filter(None, map(_item_name, items if isinstance(items, list) else [items])))
+        self.words = sorted(words)
+        self.surnames = sorted(surnames)
+        self.subjects = sorted(subjects)
+        # Long-tailed name pools that grow with the corpus, like real tool/dataset names
+        self.tools = sorted(tools) + [f"{rng.choice(self.words).title()}Tool-{i}" for i in range(size // 20)]
+        self.datasets = sorted(datasets) + [f"{rng.choice(self.words).upper()}-{i}" for i in range(size // 40)]
+        self._subject_weights = [1 / (i + 1) for i in range(len(self.subjects))]
+
+    def _text(self, rng, like):
+        n = max(1, len(like.split()))
+        text = " ".join(rng.choices(self.words, k=n))
+        return text[:1].upper() + text[1:] + ("." if like.rstrip().endswith(".") else "")
+
+    def _redraw(self, rng, value):
+        """Same structure as ``value`` with every string redrawn."""
+        if isinstance(value, str):
+            return self._text(rng, value)
+        if isinstance(value, list):
+            return [self._redraw(rng, v) for v in value]
+        if isinstance(value, dict):
+            return {k: self._redraw(rng, v) for k, v in value.items()}
+        return value
+
+    def _named(self, rng, items, pool):
+        """Tool/dataset entries with names drawn from ``pool``."""
+        out = []
+        for item in items if isinstance(items, list) else [items]:
+            name = pool[min(int(rng.paretovariate(1.2)) - 1, len(pool) - 1)] if rng.random() < 0.7 \
+                else rng.choice(pool)
+            if isinstance(item, dict):
+                item = self._redraw(rng, item)
+                if "name" in item:
+                    item["name"] = name
+            else:
+                desc = str(item).split(":", 1)[-1]
+                item = f"{name}: {self._text(rng, desc)}"
+            out.append(item)
+        return out
+
+    def _performed(self, rng, value):
+        if isinstance(value, dict):
+            out = {}
+            for k, v in value.items():
+                if k == "performed" and v in ("Yes", "No") and rng.random() < PERFORMED_FLIP:
+                    out[k] = "No" if v == "Yes" else "Yes"
+                else:
+                    out[k] = self._performed(rng, v)
+            return out
+        if isinstance(value, str):
+            return value if value in ("Yes", "No") else self._text(rng, value)
+        if isinstance(value, list):
+            return [self._performed(rng, v) for v in value]
+        return value
+
+    def paper(self, i):
+        """The ``i``-th synthetic ``(filename, paper, exhyte)``."""
+        rng = random.Random(f"{self.seed}:{i}")
+        _, paper_t, exhyte_t = self.templates[i % len(self.templates)]
+
+        year = rng.choices(YEARS, YEAR_WEIGHTS)[0]
+        month, day = rng.randint(1, 12), rng.randint(1, 28)
+        style = rng.random()
+        if style < 0.9:
+            published = f"{year}-{month:02d}-{day:02d}"
+        elif style < 0.95:
+            published = str(year)
+        else:
+            published = f"{MONTHS[month - 1]} {year}"
+        title = " ".join(w.title() for w in rng.choices(self.words, k=rng.randint(5, 11)))
+        surname = rng.choice(self.surnames)
+        filename = f"{surname} et al. - {year} - {title} {i}.json"
+        meta = {
+            "paper_title": f"{title} {i}",
+            "authors": [self._text(rng, "given").rstrip(".") for _ in range(rng.randint(2, 8))],
+            "published": published,
+            "link": f"http://arxiv.org/abs/{year % 100:02d}{month:02d}.{i:05d}",
+        }
+
+        paper = {}
+        for key, value in paper_t.items():
+            if key in meta:
+                paper[key] = meta[key]
+            elif key == "subject_area" and isinstance(value, dict):
+                k = rng.randint(1, min(3, len(self.subjects)))
+                areas = []
+                while len(areas) < k:
+                    area = rng.choices(self.subjects, self._subject_weights)[0]
+                    if area not in areas:
+                        areas.append(area)
+                paper[key] = {**self._redraw(rng, value), "areas": areas}
+            elif key == "method" and isinstance(value, dict):
+                method = self._redraw(rng, value)
+                if "tools" in value:
+                    method["tools"] = self._named(rng, value["tools"], self.tools)
+                if "benchmark_datasets" in value:
+                    method["benchmark_datasets"] = self._named(rng, value["benchmark_datasets"], self.datasets)
+                paper[key] = method
+            else:
+                paper[key] = self._redraw(rng, value)
+
+        exhyte = {}
+        for key, value in exhyte_t.items():
+            exhyte[key] = meta[key] if key in meta else self._performed(rng, value)
+        return filename, paper, exhyte
+
+
+def generate(out_dir, size, seed=0, papers_dir=PAPERS_DIR, exhyte_dir=EXHYTE_DIR, on_progress=None):
+    """Write ``size`` synthetic papers to ``out_dir/Papers`` and ``out_dir/exhyte_data``.
+
+    Returns the two folder paths.
+    """
+    generator = CorpusGenerator(papers_dir, exhyte_dir, seed, size)
+    papers_out = os.path.join(out_dir, "Papers")
+    exhyte_out = os.path.join(out_dir, "exhyte_data")
+    os.makedirs(papers_out, exist_ok=True)
+    os.makedirs(exhyte_out, exist_ok=True)
+    for i in range(size):
+        filename, paper, exhyte = generator.paper(i)
+        with open(os.path.join(papers_out, filename), "w", encoding="utf-8") as f:
+            json.dump(paper, f, indent=2, ensure_ascii=False)
+        with open(os.path.join(exhyte_out, filename), "w", encoding="utf-8") as f:
+            json.dump(exhyte, f, indent=2, ensure_ascii=False)
+        if on_progress and (i + 1) % 1000 == 0:
+            on_progress(i + 1)
+    return papers_out, exhyte_out
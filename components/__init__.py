@@ -0,0 +1 @@
+"""Streamlit building blocks shared by the pages."""
@@ -0,0 +1,31 @@
+import streamlit as st
+
+REFRESH_SECONDS = 2
+SHOWN_ERRORS = 50
+
+
+@st.fragment(run_every=REFRESH_SECONDS)
+def _follow_import(collection, shown):
+    """Rerun the page once more papers of a background import are stored, or once it ended."""
+    if collection.importing() != shown:
+        st.rerun()
+
+
+def import_status(collection):
+    """Sidebar progress of a background import into ``collection``, and the files it could not read.
+
+    While a large import runs (see :func:`corpus.get_collection`), the page
+    reruns every ``REFRESH_SECONDS`` that more papers were stored, so lists
+    fill in progressively.
+    """
+    progress = collection.importing()
+    if progress is not None:
+        done, total = progress
+        st.sidebar.progress(done / total, text=f"📥 Importing papers: {done:,} of {total:,}")
+        _follow_import(collection, progress)
+    errors = collection.errors()
+    if errors:
+        with st.sidebar.expander(f"⚠️ {len(errors):,} unreadable file{'s' if len(errors) != 1 else ''}", expanded=False):
+            st.markdown("\n".join(f"- `{name}`: {error}" for name, error in list(errors.items())[:SHOWN_ERRORS]))
+            if len(errors) > SHOWN_ERRORS:
+                st.caption(f"… and {len(errors) - SHOWN_ERRORS:,} more.")
@@ -0,0 +1,99 @@
+import streamlit as st
+
+PAGE_SIZE = 25
+
+
+def pager(items, key, page_size=PAGE_SIZE, focus=None):
+    """Current page of ``items`` plus a page-number control; returns ``(window, start)``.
+
+    Only one page of widgets is ever rendered, whatever the number of items.
+    The page lives in ``st.session_state[f"{key}_page"]`` and jumps to the
+    page holding ``focus`` (or the first page) whenever ``items`` change.
+    """
+    state_key, items_key = f"{key}_page", f"{key}_items"
+    n_pages = max(1, -(-len(items) // page_size))
+    signature = (len(items), items[0], items[-1]) if items else (0,)
+    if st.session_state.get(items_key) != signature:
+        st.session_state[items_key] = signature
+        try:
+            st.session_state[state_key] = items.index(focus) // page_size + 1 if focus is not None else 1
+        except ValueError:
+            st.session_state[state_key] = 1
+    st.session_state[state_key] = min(max(1, st.session_state.get(state_key, 1)), n_pages)
+
+    if n_pages > 1:
+        st.number_input(
+            f"Page (of {n_pages:,})", min_value=1, max_value=n_pages, step=1, key=state_key,
+            help="Type a page number or use the arrow keys / ± buttons.",
+        )
+    start = (st.session_state[state_key] - 1) * page_size
+    end = min(start + page_size, len(items))
+    if items:
+        st.caption(f"Showing {start + 1:,}–{end:,} of {len(items):,}")
+    return items[start:end], start
+
+
+def paper_radio(label, items, key, format_func=str, page_size=PAGE_SIZE):
+    """Paginated radio over ``items`` whose selection survives paging.
+
+    The selection is kept in ``st.session_state[f"{key}_selected"]``; it
+    falls back to the first item when it is not among ``items`` (initially,
+    or after a filter excluded it). Returns ``None`` only for no items.
+    Arrow keys move within the page.
+    """
+    if not items:
+        return None
+    selected_key = f"{key}_selected"
+    selected = st.session_state.get(selected_key)
+    if selected not in items:
+        selected = st.session_state[selected_key] = items[0]
+
+    window, start = pager(items, key, page_size, focus=selected)
+    index = window.index(selected) if selected in window else None
+    # One widget per page and item set, so its default always reflects the stored selection
+    choice = st.radio(
+        label, window, index=index, format_func=format_func,
+        key=f"{key}_radio_{start}_{hash(st.session_state[f'{key}_items'])}",
+    )
+    if choice is not None:
+        selected = st.session_state[selected_key] = choice
+    return selected
+
+
+def _toggle(selected_key, item):
+    chosen = st.session_state[selected_key]
+    if item in chosen:
+        chosen.remove(item)
+    else:
+        chosen.append(item)
+
+
+def set_selection(key, items):
+    """Replace the selection of :func:`paper_picker` ``key`` (usable as an ``on_click`` callback)."""
+    st.session_state[f"{key}_selected"] = list(items)
+    for name in [k for k in st.session_state if str(k).startswith(f"{key}_item_")]:
+        del st.session_state[name]
+
+
+def paper_picker(items, key, format_func=str, default=(), page_size=PAGE_SIZE):
+    """Paginated multi-selection over ``items``; returns the selected items in selection order.
+
+    The selection is kept in ``st.session_state[f"{key}_selected"]``
+    (initialised from ``default``) and is not affected by paging or by
+    ``items`` changing, so a filter can be narrowed after choosing papers.
+    """
+    selected_key = f"{key}_selected"
+    if selected_key not in st.session_state:
+        st.session_state[selected_key] = list(default)
+    chosen = st.session_state[selected_key]
+
+    window, _ = pager(items, key, page_size)
+    for item in window:
+        st.checkbox(
+            format_func(item), value=item in chosen, key=f"{key}_item_{item}",
+            on_change=_toggle, args=(selected_key, item),
+        )
+    if chosen:
+        st.caption(f"✅ {len(chosen)} selected")
+        st.button("Clear selection", key=f"{key}_clear", on_click=set_selection, args=(key, []))
+    return list(chosen)
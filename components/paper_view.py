@@ -0,0 +1,17 @@
+import streamlit as st
+
+from corpus.render import render_paper
+
+
+def show_paper(paper, expanded=1):
+    """Render a normalized ``Papers/`` record as a header plus one collapsible element per section.
+
+    The markdown is built once per file hash and reused across reruns; the
+    first ``expanded`` sections start open.
+    """
+    rendered = render_paper(paper)
+    st.markdown(rendered.header)
+    st.markdown("---")
+    for i, (title, body) in enumerate(rendered.sections):
+        with st.expander(title, expanded=i < expanded):
+            st.markdown(body)
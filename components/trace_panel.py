@@ -0,0 +1,28 @@
+import streamlit as st
+
+from corpus import trace
+
+
+def trace_panel():
+    """End the traced rerun and show its spans and counters in a sidebar expander.
+
+    Call it last in a page script that started with ``trace.begin_run``.
+    Nothing is shown unless tracing is enabled (``CORPUS_TRACE=1``).
+    """
+    run = trace.end_run()
+    if run is None:
+        return
+    with st.sidebar.expander("⏱️ Trace", expanded=False):
+        st.caption(f"Rerun of `{run['page']}`: {run['seconds'] * 1000:.1f} ms")
+        # Collapse repeated spans (e.g. one corpus.read per file) into one row
+        rows = {}
+        for s in sorted(run["spans"], key=lambda s: s["start"]):
+            row = rows.setdefault(s["name"], {"span": "· " * s["depth"] + s["name"], "calls": 0, "ms": 0.0})
+            row["calls"] += 1
+            row["ms"] += s["seconds"] * 1000
+        st.dataframe([{**row, "ms": round(row["ms"], 2)} for row in rows.values()], hide_index=True)
+        if run["counters"]:
+            st.markdown("\n".join(f"- **{name}**: {value:,}" for name, value in sorted(run["counters"].items())))
+        st.download_button(
+            "Prometheus metrics", trace.prometheus_text(), file_name="trace.prom", mime="text/plain",
+        )
@@ -0,0 +1,38 @@
+"""Shared data layer for the Streamlit pages."""
+
+from corpus.config import CACHE_DIR, EXHYTE_DIR, PAPERS_DIR
+from corpus.coverage import CoverageIndex, get_coverage_index
+from corpus.dates import parse_date
+from corpus.loader import CorpusCache, cache_stats, get_cache, load_paper, read_paper
+from corpus.manifest import Manifest, get_manifest
+from corpus.similarity import SimilarityIndex, get_similarity_index
+from corpus.snapshot import Snapshot, build_snapshot, get_snapshot
+from corpus.store import Collection, Store, get_collection, get_store
+from corpus.watch import Watcher, get_watcher
+
+__all__ = [
+    "CACHE_DIR",
+    "EXHYTE_DIR",
+    "PAPERS_DIR",
+    "Collection",
+    "CorpusCache",
+    "CoverageIndex",
+    "Manifest",
+    "SimilarityIndex",
+    "Snapshot",
+    "Store",
+    "Watcher",
+    "build_snapshot",
+    "cache_stats",
+    "get_cache",
+    "get_collection",
+    "get_coverage_index",
+    "get_manifest",
+    "get_similarity_index",
+    "get_snapshot",
+    "get_store",
+    "get_watcher",
+    "load_paper",
+    "parse_date",
+    "read_paper",
+]
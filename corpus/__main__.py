@@ -0,0 +1,109 @@
+"""Build steps for the corpus caches.
+
+    python -m corpus manifest [FOLDER ...]
+    python -m corpus snapshot [--output PATH]
+    python -m corpus similar
+    python -m corpus coverage
+    python -m corpus store
+    python -m corpus export --out DIR
+"""
+
+import argparse
+import os
+
+from corpus.config import EXHYTE_DIR, PAPERS_DIR
+from corpus.coverage import CoverageIndex
+from corpus.export import export_site
+from corpus.manifest import Manifest
+from corpus.similarity import SimilarityIndex
+from corpus.snapshot import SNAPSHOT_PATH, build_snapshot
+from corpus.store import Store
+
+
+def _manifest(args):
+    for folder in args.folders or [PAPERS_DIR, EXHYTE_DIR]:
+        manifest = Manifest(folder)
+        updated = manifest.refresh()
+        print(f"{folder}: {len(manifest)} papers, {updated} updated -> {manifest.path}")
+
+
+def _snapshot(args):
+    count = build_snapshot([PAPERS_DIR, EXHYTE_DIR], args.output)
+    print(f"{count} papers -> {args.output} ({os.path.getsize(args.output)} bytes)")
+
+
+def _similar(args):
+    store = Store()
+    for folder in [PAPERS_DIR, EXHYTE_DIR]:
+        store.sync(folder)
+        index = SimilarityIndex(folder)
+        updated = index.refresh(store.collection(folder))
+        labels, _ = index.clusters()
+        print(f"{folder}: {len(index)} papers, {updated} updated, {len(set(labels.tolist()))} clusters "
+              f"-> {index.path}.npy")
+
+
+def _coverage(args):
+    store = Store()
+    store.sync(EXHYTE_DIR)
+    index = CoverageIndex(EXHYTE_DIR)
+    updated = index.refresh(store.collection(EXHYTE_DIR))
+    print(f"{EXHYTE_DIR}: {len(index)} papers, {len(index.stages)} stages, {len(index.columns)} sub-steps, "
+          f"{updated} updated -> {index.path}.npz")
+
+
+def _store(args):
+    store = Store()
+    for folder in [PAPERS_DIR, EXHYTE_DIR]:
+        updated = store.sync(folder)
+        collection = store.collection(folder)
+        report = collection.import_report() if updated else None
+        timing = ""
+        if report:
+            timing = (f" in {report['seconds']:.1f}s (parsing {report['parse_seconds']:.1f}s on "
+                      f"{report['workers']} workers with {report['backend']})")
+        errors = collection.errors()
+        print(f"{folder}: {len(collection)} papers, {updated} updated{timing}, {len(errors)} unreadable "
+              f"-> {store.path}")
+        for name, error in errors.items():
+            print(f"  {name}: {error}")
+
+
+def _export(args):
+    stats = export_site(args.out, args.folder)
+    print(f"{args.folder}: {stats['rendered']} paper pages rendered, {stats['written']} files written, "
+          f"{stats['unchanged']} listing pages unchanged, {stats['removed']} removed -> {args.out}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m corpus")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("manifest", help="build or refresh the metadata manifests")
+    p.add_argument("folders", nargs="*")
+    p.set_defaults(func=_manifest)
+
+    p = sub.add_parser("snapshot", help="compile both folders into one memory-mapped snapshot")
+    p.add_argument("--output", default=SNAPSHOT_PATH)
+    p.set_defaults(func=_snapshot)
+
+    p = sub.add_parser("similar", help="build or refresh the related-paper similarity matrices")
+    p.set_defaults(func=_similar)
+
+    p = sub.add_parser("coverage", help="build or refresh the workflow-coverage matrix of exhyte_data/")
+    p.set_defaults(func=_coverage)
+
+    p = sub.add_parser("store", help="import or update both folders in the SQLite store")
+    p.set_defaults(func=_store)
+
+    p = sub.add_parser("export", help="export Papers/ as static HTML with a client-side search index")
+    p.add_argument("--out", default="site")
+    p.add_argument("--folder", default=PAPERS_DIR)
+    p.set_defaults(func=_export)
+
+    args = ap.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+"""Locations of the paper folders and of generated cache artifacts."""
+
+import os
+
+PAPERS_DIR = os.environ.get("PAPERS_DIR", "Papers")
+EXHYTE_DIR = os.environ.get("EXHYTE_DIR", "exhyte_data")
+CACHE_DIR = os.environ.get("CORPUS_CACHE_DIR", ".corpus_cache")
+TRACE = os.environ.get("CORPUS_TRACE", "") not in ("", "0")
+WATCH = os.environ.get("CORPUS_WATCH", "auto")  # auto | inotify | poll | off
@@ -0,0 +1,251 @@
+"""Columnar workflow-coverage matrix of ``exhyte_data/`` records.
+
+Every record marks each workflow stage, and each sub-step of a stage, as
+performed (``"Yes"``) or not (``"No"``). :class:`CoverageIndex` keeps those
+flags as two boolean matrices, papers × stages and papers × sub-steps, next to
+each paper's publication year. A sub-step only counts as performed when its
+stage was, which is also what the survey prompt sees (see
+:mod:`survey.compact`); sub-steps missing from a record count as not
+performed. The matrices are built from the paper bodies in
+:mod:`corpus.store`, stored under ``CACHE_DIR`` with each paper's content hash
+and refreshed like the similarity index: only papers whose hash changed are
+re-read, and only once the store's revision of the folder moved.
+
+The aggregates behind the coverage page are array reductions over a row
+selection: adoption counts are column sums, per-year shares a grouped mean,
+and co-occurrence one matrix product.
+
+    python -m corpus coverage     # prebuild the matrix of exhyte_data/
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from corpus import trace, watch
+from corpus.config import CACHE_DIR
+
+COVERAGE_VERSION = 2
+# Workflow order; stages found in records but not listed here follow them
+STAGES = (
+    "Inputs to the workflow",
+    "Query Structuring",
+    "Data Retrieval",
+    "Knowledge Assembly",
+    "Hypothesis/Idea Generation",
+    "Hypothesis/Idea Prioritization",
+    "Test",
+)
+NORMALIZATIONS = ("jaccard", "conditional", "papers")
+
+
+def performed(value):
+    """False only for stages/sub-steps explicitly marked as not performed."""
+    return str(value.get("performed", "Yes")).strip().lower() != "no"
+
+
+def paper_flags(data):
+    """``({stage: performed}, {(stage, sub-step): performed})`` of one record."""
+    stages, steps = {}, {}
+    for stage, content in data.items():
+        if not isinstance(content, dict) or "performed" not in content:
+            continue  # paper_title, authors, ...
+        stages[stage] = done = performed(content)
+        for step, value in content.items():
+            if isinstance(value, dict):
+                steps[(stage, step)] = done and performed(value)
+    return stages, steps
+
+
+class CoverageIndex:
+    """Papers × stages and papers × sub-steps performed flags of one folder."""
+
+    def __init__(self, folder, path=None):
+        self.folder = folder
+        self.path = path or os.path.join(CACHE_DIR, os.path.basename(os.path.normpath(folder)) + ".coverage")
+        self.names = []          # row -> filename
+        self.rows = {}           # filename -> row
+        self.hashes = {}         # filename -> sha256 of the content
+        self.stages = []         # stage column -> stage
+        self.columns = []        # sub-step column -> (stage, sub-step)
+        self.stage_matrix = np.zeros((0, 0), dtype=bool)
+        self.step_matrix = np.zeros((0, 0), dtype=bool)
+        self.years = np.zeros(0, dtype=np.int16)  # 0 when unknown
+        self._revision = None    # store revision of the last refresh
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self):
+        return len(self.names)
+
+    def _load(self):
+        try:
+            with open(self.path + ".json", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != COVERAGE_VERSION:
+                return
+            with np.load(self.path + ".npz") as arrays:
+                stage_matrix, step_matrix, years = arrays["stages"], arrays["steps"], arrays["years"]
+        except (OSError, ValueError, KeyError):
+            return
+        if not len(stage_matrix) == len(step_matrix) == len(years) == len(meta["names"]):
+            return
+        self.names, self.hashes = meta["names"], meta["hashes"]
+        self.stages, self.columns = meta["stages"], [tuple(c) for c in meta["columns"]]
+        self.stage_matrix, self.step_matrix, self.years = stage_matrix, step_matrix, years
+        self.rows = {name: i for i, name in enumerate(self.names)}
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp.npz"
+            np.savez(tmp, stages=self.stage_matrix, steps=self.step_matrix, years=self.years)
+            os.replace(tmp, self.path + ".npz")
+            tmp = self.path + ".json.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": COVERAGE_VERSION, "names": self.names, "hashes": self.hashes,
+                           "stages": self.stages, "columns": self.columns}, f)
+            os.replace(tmp, self.path + ".json")
+        except OSError:
+            pass
+
+    def _add_columns(self, flags):
+        """Append stages and sub-steps not seen before, keeping stages in workflow order."""
+        stages = {stage for stage_flags, _ in flags for stage in stage_flags}
+        order = {stage: i for i, stage in enumerate(STAGES)}
+        self.stages += sorted(stages - set(self.stages), key=lambda s: (order.get(s, len(STAGES)), s))
+        known = set(self.columns)
+        for _, step_flags in flags:
+            for column in step_flags:
+                if column not in known:
+                    known.add(column)
+                    self.columns.append(column)
+
+    @trace.traced("coverage.refresh")
+    def refresh(self, papers):
+        """Re-read the flags of papers whose content changed, drop deleted ones; returns the number of updates.
+
+        ``papers`` is the :class:`corpus.store.Collection` of the folder.
+        """
+        with self._lock:
+            revision = papers.store.revision(papers.key)
+            if revision == self._revision:
+                return 0
+            first, self._revision = self._revision is None, revision
+            hashes = papers.hashes()
+            changed = sorted(name for name, sha in hashes.items() if self.hashes.get(name) != sha)
+            removed = [name for name in self.rows if name not in hashes]
+            if not changed and not removed:
+                return 0
+
+            flags = {}
+            for name in changed:
+                try:
+                    data = papers.paper(name)
+                except (KeyError, ValueError):
+                    data = None  # deleted since, or malformed
+                flags[name] = paper_flags(data) if isinstance(data, dict) else ({}, {})
+            old_stages, old_columns = len(self.stages), len(self.columns)
+            self._add_columns(flags.values())
+
+            names = sorted(set(self.names).difference(removed).union(changed))
+            rows = {name: i for i, name in enumerate(names)}
+            stage_matrix = np.zeros((len(names), len(self.stages)), dtype=bool)
+            step_matrix = np.zeros((len(names), len(self.columns)), dtype=bool)
+            years = np.zeros(len(names), dtype=np.int16)
+            kept = [(rows[name], row) for name, row in self.rows.items() if name in rows and name not in flags]
+            if kept:
+                new_rows, old_rows = map(list, zip(*kept))
+                stage_matrix[new_rows, :old_stages] = self.stage_matrix[old_rows]
+                step_matrix[new_rows, :old_columns] = self.step_matrix[old_rows]
+                years[new_rows] = self.years[old_rows]
+            stage_index = {stage: i for i, stage in enumerate(self.stages)}
+            column_index = {column: i for i, column in enumerate(self.columns)}
+            kept_hashes = {name: self.hashes[name] for name in names if name not in flags}
+            paper_years = papers.paper_years()
+            for name, (stage_flags, step_flags) in flags.items():
+                row = rows[name]
+                stage_matrix[row, [stage_index[s] for s, done in stage_flags.items() if done]] = True
+                step_matrix[row, [column_index[c] for c, done in step_flags.items() if done]] = True
+                years[row] = paper_years.get(name) or 0
+                kept_hashes[name] = hashes[name]
+
+            self.names, self.rows, self.hashes = names, rows, kept_hashes
+            self.stage_matrix, self.step_matrix, self.years = stage_matrix, step_matrix, years
+            watch.persist(self.folder, self._lock, self._save, not first)
+            return len(changed) + len(removed)
+
+    def available_years(self, descending=True):
+        """Distinct known publication years."""
+        years = np.unique(self.years[self.years > 0]).tolist()
+        return years[::-1] if descending else years
+
+    def select(self, years=None):
+        """Row indices of papers published in ``years`` (all papers, undated included, when ``None``)."""
+        if years is None:
+            return np.arange(len(self.names))
+        return np.flatnonzero(np.isin(self.years, np.asarray(list(years), dtype=np.int16)))
+
+    def _level(self, level):
+        """``(matrix, labels)`` of the stages (``level=None``) or of one stage's sub-steps."""
+        if level is None:
+            return self.stage_matrix, list(self.stages)
+        columns = [i for i, (stage, _) in enumerate(self.columns) if stage == level]
+        return self.step_matrix[:, columns], [self.columns[i][1] for i in columns]
+
+    def adoption(self, rows=None, level=None):
+        """``DataFrame`` of papers and share of papers performing each stage (or sub-step of stage ``level``)."""
+        matrix, labels = self._level(level)
+        selected = matrix if rows is None else matrix[rows]
+        papers = selected.sum(axis=0)
+        share = papers / len(selected) if len(selected) else np.zeros(len(labels))
+        return pd.DataFrame({"papers": papers, "share": share}, index=pd.Index(labels, name=level or "stage"))
+
+    def trend(self, rows=None, level=None):
+        """``DataFrame`` of yearly shares (rows: years, columns: stages or sub-steps); undated papers are left out."""
+        matrix, labels = self._level(level)
+        rows = np.arange(len(self.names)) if rows is None else np.asarray(rows)
+        rows = rows[self.years[rows] > 0]
+        frame = pd.DataFrame(matrix[rows], columns=labels)
+        return frame.groupby(self.years[rows], sort=True).mean().rename_axis("year")
+
+    def cooccurrence(self, rows=None, level=None, normalize="jaccard"):
+        """Square ``DataFrame`` of how often two stages (or sub-steps) are performed by the same paper.
+
+        ``normalize`` is ``"papers"`` (raw counts), ``"jaccard"`` (papers
+        with both over papers with either) or ``"conditional"`` (share of the
+        row's papers that also perform the column).
+        """
+        if normalize not in NORMALIZATIONS:
+            raise ValueError(f"normalize must be one of {NORMALIZATIONS}, not {normalize!r}")
+        matrix, labels = self._level(level)
+        selected = (matrix if rows is None else matrix[rows]).astype(np.float32)
+        both = selected.T @ selected
+        if normalize == "papers":
+            values = both.astype(np.int64)
+        else:
+            each = np.diag(both)
+            total = each[:, None] + each[None, :] - both if normalize == "jaccard" else each[:, None]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                values = np.where(total > 0, both / total, 0.0)
+        return pd.DataFrame(values, index=labels, columns=labels)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_coverage_index(folder):
+    """The shared, freshly refreshed :class:`CoverageIndex` for ``folder``."""
+    from corpus.store import get_collection  # the store imports paper_flags from here
+
+    key = os.path.abspath(folder)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = CoverageIndex(folder)
+        index = _indexes[key]
+    index.refresh(get_collection(folder))
+    return index
@@ -0,0 +1,67 @@
+"""Publication dates of papers.
+
+``published`` is free text (``2025-03-25``, ``2025-03``, ``2025``, or prose).
+:func:`parse_date` normalizes it once per file into year, month, day, the raw
+string and how confidently it was parsed; ISO-like strings take a regex fast
+path and only the rest go through ``dateutil``'s fuzzy parser.
+"""
+
+import re
+from datetime import datetime
+
+from dateutil import parser
+
+# Confidence levels, most to least certain
+EXACT = "exact"          # full ISO date
+MONTH = "month"          # ISO year and month
+YEAR = "year"            # a bare year
+FUZZY = "fuzzy"          # dateutil found a date in free text
+FILENAME = "filename"    # year taken from "Author - 2025 - Title.json"
+UNKNOWN = "unknown"
+
+_ISO_RE = re.compile(r"^\s*(\d{4})(?:[-/.](\d{1,2})(?:[-/.](\d{1,2}))?)?(?:[T\s].*)?$")
+_YEAR_RE = re.compile(r"\b(1[89]\d\d|2\d\d\d)\b")
+_FILENAME_YEAR_RE = re.compile(r" - (\d{4}) - ")
+_SENTINEL_A = datetime(1, 1, 1)
+_SENTINEL_B = datetime(2, 2, 2)
+
+
+def parse_date(raw, filename=""):
+    """``{"year", "month", "day", "raw", "confidence"}`` for a ``published`` string."""
+    raw = "" if raw is None else str(raw)
+    date = {"year": None, "month": None, "day": None, "raw": raw, "confidence": UNKNOWN}
+
+    match = _ISO_RE.match(raw)
+    if match and (match.group(2) is None or 1 <= int(match.group(2)) <= 12):
+        date["year"] = int(match.group(1))
+        if match.group(2):
+            date["month"] = int(match.group(2))
+        if match.group(3):
+            date["day"] = int(match.group(3))
+        date["confidence"] = EXACT if date["day"] else MONTH if date["month"] else YEAR
+        return date
+
+    if raw.strip():
+        try:
+            # Parse twice with different defaults to tell which fields were present
+            a = parser.parse(raw, fuzzy=True, default=_SENTINEL_A)
+            b = parser.parse(raw, fuzzy=True, default=_SENTINEL_B)
+        except (ValueError, OverflowError):
+            a = b = None
+        if a is not None and a.year == b.year:
+            date["year"] = a.year
+            date["month"] = a.month if a.month == b.month else None
+            date["day"] = a.day if a.day == b.day else None
+            date["confidence"] = FUZZY
+            return date
+        match = _YEAR_RE.search(raw)
+        if match:
+            date["year"] = int(match.group(1))
+            date["confidence"] = FUZZY
+            return date
+
+    match = _FILENAME_YEAR_RE.search(filename)
+    if match:
+        date["year"] = int(match.group(1))
+        date["confidence"] = FILENAME
+    return date
@@ -0,0 +1,319 @@
+"""Static HTML export of ``Papers/``, for browsing without a Streamlit process.
+
+Browsing a paper in the viewers reruns a page script per click. The export
+writes the same content once as plain files that any static file server
+(or the browser, from disk) can serve:
+
+* ``papers/<slug>.html``: one page per paper, with the header and sections
+  of :mod:`corpus.render`, converted from its markdown to HTML;
+* ``index.html``: the search box;
+* ``subjects/<slug>.html`` and ``years/<year>.html``: the papers of each
+  subject and publication year, newest first;
+* ``search-index.js``: title, authors and year of every paper, plus an
+  inverted index of the terms of its title, authors, facet values and its
+  ``KEYWORDS`` most frequent body terms, which ``search.js`` queries in
+  the browser.
+
+``export.json`` in the output folder records the hash of each exported
+paper and what the listing pages need from it. A rerun only renders the
+papers whose JSON changed, removes the pages of removed papers, and
+rewrites a listing page only when its content changed.
+
+    python -m corpus export --out site/
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+from collections import Counter
+
+from corpus.config import PAPERS_DIR
+from corpus.render import render_paper
+from corpus.search import document_fields, tokenize
+from corpus.store import get_store
+
+EXPORT_VERSION = 1
+KEYWORDS = 20
+FACETS = ("subject", "method_type", "tool", "dataset")
+
+_ITEM_RE = re.compile(r"^( *)(-|\d+\.) (.*)$")
+_BOLD_RE = re.compile(r"\*\*(.+?)\*\*")
+_LINK_RE = re.compile(r"\[([^\]]*)\]\((https?://[^)\s]+)\)")
+
+_STYLE = """body { font-family: system-ui, sans-serif; max-width: 60rem; margin: 0 auto; padding: 1rem 1.5rem;
+       line-height: 1.5; color: #222; }
+nav a { margin-right: 1rem; }
+details { border: 1px solid #ddd; border-radius: .4rem; padding: .3rem .8rem; margin: .6rem 0; }
+summary { cursor: pointer; font-weight: 600; }
+.meta, .count { color: #666; }
+input[type=search] { width: 100%; font-size: 1.1rem; padding: .4rem; box-sizing: border-box; }
+ul.papers li { margin: .2rem 0; }
+"""
+
+_SEARCH_JS = """(function () {
+  var stop = new Set("a an and are as at be by for from has have in is it its of on or that the this to was were with".split(" "));
+  var index = window.SEARCH_INDEX, terms = Object.keys(index.terms);
+  var box = document.getElementById("search"), out = document.getElementById("results");
+  function postings(term, prefix) {
+    if (!prefix) return new Set(index.terms[term] || []);
+    var found = new Set();
+    terms.forEach(function (t) { if (t.startsWith(term)) index.terms[t].forEach(function (d) { found.add(d); }); });
+    return found;
+  }
+  box.addEventListener("input", function () {
+    var words = (box.value.toLowerCase().match(/[a-z0-9]+/g) || []).filter(function (w) { return !stop.has(w); });
+    out.innerHTML = "";
+    if (!words.length) return;
+    var hits = null;
+    words.forEach(function (word, i) {
+      var found = postings(word, i === words.length - 1);
+      hits = hits === null ? found : new Set([...hits].filter(function (d) { return found.has(d); }));
+    });
+    var docs = [...hits].map(function (d) { return index.docs[d]; });
+    docs.sort(function (a, b) { return (b[2] || 0) - (a[2] || 0); });
+    docs.slice(0, 100).forEach(function (doc) {
+      var li = document.createElement("li"), a = document.createElement("a");
+      a.href = doc[1]; a.textContent = doc[0];
+      li.appendChild(a);
+      li.appendChild(document.createTextNode(" — " + doc[3] + (doc[2] ? ", " + doc[2] : "")));
+      out.appendChild(li);
+    });
+    var note = document.createElement("li");
+    note.className = "count"; note.textContent = hits.size + " matching papers";
+    out.appendChild(note);
+  });
+})();
+"""
+
+
+def _inline(text):
+    # Links are matched on the raw text, so their URLs are escaped once
+    parts, last = [], 0
+    for m in _LINK_RE.finditer(text):
+        parts.append(html.escape(text[last:m.start()], quote=False))
+        parts.append(f'<a href="{html.escape(m[2])}">{html.escape(m[1], quote=False)}</a>')
+        last = m.end()
+    parts.append(html.escape(text[last:], quote=False))
+    return _BOLD_RE.sub(r"<strong>\1</strong>", "".join(parts))
+
+
+def markdown_html(markdown):
+    """HTML of the markdown that :mod:`corpus.render` writes: ``###`` headings, nested lists, bold, links."""
+    out, lists = [], []  # lists: (indent, tag) of the open lists, innermost last
+    for line in markdown.split("\n"):
+        item = _ITEM_RE.match(line)
+        if item:
+            indent, tag = len(item[1]), "ul" if item[2] == "-" else "ol"
+            while lists and (lists[-1][0] > indent or (lists[-1][0] == indent and lists[-1][1] != tag)):
+                out.append(f"</li></{lists.pop()[1]}>")
+            if lists and lists[-1][0] == indent:
+                out.append("</li><li>")
+            else:
+                out.append(f"<{tag}><li>")
+                lists.append((indent, tag))
+            out.append(_inline(item[3]))
+            continue
+        while lists:
+            out.append(f"</li></{lists.pop()[1]}>")
+        if not line.strip():
+            continue
+        if line.startswith("### "):
+            out.append(f"<h3>{_inline(line[4:])}</h3>")
+        elif line == "---":
+            out.append("<hr>")
+        else:
+            out.append(f"<p>{_inline(line)}</p>")
+    while lists:
+        out.append(f"</li></{lists.pop()[1]}>")
+    return "\n".join(out)
+
+
+def slug(name):
+    """File-name-safe, collision-free form of ``name``."""
+    base = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")[:80] or "x"
+    return f"{base}-{hashlib.sha1(name.encode('utf-8')).hexdigest()[:8]}"
+
+
+def _page(title, body, root="", scripts=()):
+    scripts = "".join(f'<script src="{root}{script}"></script>' for script in scripts)
+    return (
+        f'<!DOCTYPE html>\n<html lang="en"><head><meta charset="utf-8">'
+        f'<meta name="viewport" content="width=device-width, initial-scale=1">'
+        f'<title>{html.escape(title)}</title><link rel="stylesheet" href="{root}style.css"></head>\n'
+        f'<body><nav><a href="{root}index.html">🔎 Search</a><a href="{root}subjects/index.html">📚 Subjects</a>'
+        f'<a href="{root}years/index.html">📅 Years</a></nav>\n{body}\n{scripts}</body></html>\n'
+    )
+
+
+def _paper_page(record, entry):
+    rendered = render_paper(record)
+    links = [f'<a href="../years/{entry["year"]}.html">{entry["year"]}</a>'] if entry["year"] is not None else []
+    links += [f'<a href="../subjects/{slug(s)}.html">{html.escape(s)}</a>' for s in entry["subjects"]]
+    body = [markdown_html(rendered.header)]
+    if links:
+        body.append(f'<p class="meta">{" · ".join(links)}</p>')
+    body.append("<hr>")
+    for i, (title, section) in enumerate(rendered.sections):
+        body.append(f"<details{' open' if i == 0 else ''}><summary>{html.escape(title)}</summary>\n"
+                    f"{markdown_html(section)}\n</details>")
+    return _page(record.title, "\n".join(body), "../")
+
+
+def _entry(collection, filename, record, sha256):
+    """What the listing pages and the search index keep of one paper."""
+    facets = collection.facets(filename)
+    words = Counter()
+    for texts in document_fields(filename, collection.paper(filename)).values():
+        for text in texts:
+            words.update(token for token in tokenize(text) if len(token) > 2 and not token.isdigit())
+    terms = set(tokenize(" ".join([record.title, *record.authors, *(v for f in FACETS for v in facets[f])])))
+    terms.update(word for word, _ in words.most_common(KEYWORDS))
+    return {
+        "sha256": sha256,
+        "page": f"papers/{slug(filename[: -len('.json')])}.html",
+        "title": record.title,
+        "authors": record.authors,
+        "year": facets["year"][0] if facets["year"] else None,
+        "subjects": facets["subject"],
+        "terms": sorted(terms),
+    }
+
+
+def _newest_first(entries):
+    return sorted(entries, key=lambda e: (-(e["year"] or 0), e["title"].lower()))
+
+
+def _paper_list(entries, root):
+    items = []
+    for entry in _newest_first(entries):
+        authors = ", ".join(entry["authors"][:3]) + (" et al." if len(entry["authors"]) > 3 else "")
+        meta = ", ".join(str(v) for v in (authors, entry["year"]) if v)
+        items.append(f'<li><a href="{root}{entry["page"]}">{html.escape(entry["title"])}</a>'
+                     f'<span class="meta"> — {html.escape(meta)}</span></li>')
+    return '<ul class="papers">\n' + "\n".join(items) + "\n</ul>"
+
+
+def _listing_pages(entries):
+    """``{path: html}`` of the index, subject and year pages, and of the search index."""
+    by_subject, by_year = {}, {}
+    for entry in entries.values():
+        for subject in entry["subjects"]:
+            by_subject.setdefault(subject, []).append(entry)
+        if entry["year"] is not None:
+            by_year.setdefault(entry["year"], []).append(entry)
+    subjects = sorted(by_subject, key=str.lower)
+    years = sorted(by_year, reverse=True)
+
+    def links(items, path, label=html.escape):
+        return '<ul class="papers">\n' + "\n".join(
+            f'<li><a href="{path(item)}">{label(item)}</a> <span class="count">({len(group):,})</span></li>'
+            for item, group in items) + "\n</ul>"
+
+    subject_links = links([(s, by_subject[s]) for s in subjects], lambda s: f"{slug(s)}.html")
+    year_links = links([(y, by_year[y]) for y in years], lambda y: f"{y}.html", str)
+    pages = {
+        "index.html": _page("Scientific Paper Explorer", (
+            f"<h1>📄 Scientific Paper Explorer</h1><p class=\"count\">{len(entries):,} papers</p>\n"
+            f'<input type="search" id="search" placeholder="Search titles, authors, subjects, tools, datasets...">'
+            f'<ul class="papers" id="results"></ul>'
+        ), scripts=("search-index.js", "search.js")),
+        "subjects/index.html": _page("Subjects", f"<h1>📚 Subjects</h1>\n{subject_links}", "../"),
+        "years/index.html": _page("Years", f"<h1>📅 Years</h1>\n{year_links}", "../"),
+        "style.css": _STYLE,
+        "search.js": _SEARCH_JS,
+    }
+    for subject in subjects:
+        pages[f"subjects/{slug(subject)}.html"] = _page(subject, (
+            f"<h1>📚 {html.escape(subject)}</h1><p class=\"count\">{len(by_subject[subject]):,} papers</p>\n"
+            + _paper_list(by_subject[subject], "../")
+        ), "../")
+    for year in years:
+        pages[f"years/{year}.html"] = _page(str(year), (
+            f"<h1>📅 {year}</h1><p class=\"count\">{len(by_year[year]):,} papers</p>\n"
+            + _paper_list(by_year[year], "../")
+        ), "../")
+
+    docs, terms = [], {}
+    for i, (filename, entry) in enumerate(sorted(entries.items())):
+        authors = ", ".join(entry["authors"][:2]) + (" et al." if len(entry["authors"]) > 2 else "")
+        docs.append([entry["title"], entry["page"], entry["year"], authors])
+        for term in entry["terms"]:
+            terms.setdefault(term, []).append(i)
+    index = json.dumps({"docs": docs, "terms": terms}, ensure_ascii=False, separators=(",", ":"))
+    pages["search-index.js"] = f"window.SEARCH_INDEX = {index};\n"
+    return pages
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def export_site(out, folder=PAPERS_DIR):
+    """Export ``folder`` as static HTML into ``out``; returns ``{"rendered", "written", "unchanged", "removed"}``.
+
+    ``rendered`` counts the paper pages built, ``written`` every file
+    written (papers and listing pages), ``unchanged`` the listing pages
+    left as they were and ``removed`` the deleted paper pages.
+    """
+    store = get_store()
+    store.sync(folder)
+    collection = store.collection(folder)
+    state_path = os.path.join(out, "export.json")
+    try:
+        with open(state_path, encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("version") != EXPORT_VERSION:
+            state = None
+    except (OSError, ValueError):
+        state = None
+    state = state or {"version": EXPORT_VERSION, "papers": {}, "pages": {}}
+    stats = {"rendered": 0, "written": 0, "unchanged": 0, "removed": 0}
+
+    hashes = collection.hashes()
+    errors = collection.errors()
+    entries = {}
+    for filename in sorted(hashes):
+        if filename in errors:
+            continue
+        entry = state["papers"].get(filename)
+        if entry is None or entry["sha256"] != hashes[filename] or not os.path.exists(os.path.join(out, entry["page"])):
+            record = collection.record(filename)
+            entry = _entry(collection, filename, record, hashes[filename])
+            _write(os.path.join(out, entry["page"]), _paper_page(record, entry))
+            stats["rendered"] += 1
+            stats["written"] += 1
+        entries[filename] = entry
+    for filename, entry in state["papers"].items():
+        if filename not in entries:
+            try:
+                os.remove(os.path.join(out, entry["page"]))
+                stats["removed"] += 1
+            except FileNotFoundError:
+                pass
+
+    pages = _listing_pages(entries)
+    for path in set(state["pages"]) - set(pages):
+        try:
+            os.remove(os.path.join(out, path))
+        except FileNotFoundError:
+            pass
+    digests = {}
+    for path, text in pages.items():
+        digests[path] = _digest(text)
+        if state["pages"].get(path) == digests[path] and os.path.exists(os.path.join(out, path)):
+            stats["unchanged"] += 1
+            continue
+        _write(os.path.join(out, path), text)
+        stats["written"] += 1
+    _write(state_path, json.dumps({"version": EXPORT_VERSION, "papers": entries, "pages": digests}))
+    return stats
@@ -0,0 +1,58 @@
+"""Facet values of ``Papers/`` entries for browsing.
+
+:func:`paper_facets` gives every paper its subjects, method types, year,
+tools and benchmark datasets; :class:`corpus.store.Collection` stores them
+and answers facet counts and multi-facet filters.
+"""
+
+import re
+
+FACETS = ("subject", "method_type", "year", "tool", "dataset")
+FACET_LABELS = {
+    "subject": "Subject area",
+    "method_type": "Method type",
+    "year": "Year",
+    "tool": "Tool",
+    "dataset": "Benchmark dataset",
+}
+
+_PAREN_RE = re.compile(r"\s*\(.*\)\s*$")
+
+
+def _item_name(item):
+    """Short name of a tool/dataset entry: a dict ``name`` or the text before ``:``."""
+    if isinstance(item, dict):
+        name = item.get("name", "")
+    else:
+        name = str(item).split(":", 1)[0]
+        name = _PAREN_RE.sub("", name) or name
+    name = name.strip()
+    if not name or name.lower().startswith("not reported"):
+        return None
+    return name[:80]
+
+
+def _item_names(items):
+    if isinstance(items, (str, dict)):
+        items = [items]
+    names = []
+    for item in items or []:
+        name = _item_name(item)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def paper_facets(entry, data):
+    """``{facet: [value, ...]}`` for one paper given its manifest entry and body."""
+    method = data.get("method", {})
+    datasets = _item_names(method.get("benchmark_datasets", []))
+    datasets += [n for n in _item_names(data.get("performance_summary", {}).get("benchmark_datasets", []))
+                 if n not in datasets]
+    return {
+        "subject": list(entry["subjects"]),
+        "method_type": list(entry["method_types"]),
+        "year": [entry["year"]] if entry["year"] is not None else [],
+        "tool": _item_names(method.get("tools", [])),
+        "dataset": datasets,
+    }
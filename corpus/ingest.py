@@ -0,0 +1,141 @@
+"""Parallel reading and parsing of new and changed paper files.
+
+A cold start, or a rebuild after the cache was removed, used to read and
+parse a folder one file at a time. :func:`prepare_files` spreads that work:
+
+* files are read in chunks of ``CHUNK`` by a pool of ``READ_THREADS``
+  threads (file I/O releases the GIL);
+* each chunk is parsed and prepared in a pool of ``WORKERS`` processes once
+  there are ``PARALLEL_MIN`` files or more, and otherwise in the calling
+  thread while the next chunks are being read;
+* JSON is parsed with ``orjson`` when it is installed (:func:`loads`);
+* chunks are yielded as soon as they are ready, so the caller can store and
+  show the first papers before the whole folder is parsed;
+* every file comes back as a :class:`Parsed` with its parse time and, if
+  preparing it raised, the error instead of the result.
+
+``WORKERS`` defaults to the number of CPUs; set ``CORPUS_WORKERS=1`` to
+parse in this process only.
+"""
+
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional
+    orjson = None
+
+WORKERS = int(os.environ.get("CORPUS_WORKERS", "0")) or os.cpu_count() or 1
+READ_THREADS = 8
+CHUNK = 100
+PARALLEL_MIN = 2000
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def loads(raw):
+    """Parsed JSON of ``raw`` (bytes, memoryview or str), with ``orjson`` when it is installed.
+
+    ``orjson`` parses a memoryview in place; ``json`` needs a copy of it.
+    Documents ``orjson`` rejects but ``json`` accepts (``NaN``, integers
+    beyond 64 bits) are parsed with ``json``, so results do not depend on
+    the backend.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(bytes(raw) if isinstance(raw, memoryview) else raw)
+
+
+class Parsed:
+    """One prepared file: ``result`` of the prepare function, or the ``error`` it raised."""
+
+    __slots__ = ("name", "result", "seconds", "error")
+
+    def __init__(self, name, result, seconds, error=None):
+        self.name = name
+        self.result = result
+        self.seconds = seconds
+        self.error = error
+
+
+def _read(folder, name):
+    """``(name, raw, stat)`` of a file, or ``None`` when it disappeared."""
+    path = os.path.join(folder, name)
+    try:
+        st = os.stat(path)
+        with open(path, "rb") as f:
+            return name, f.read(), st
+    except FileNotFoundError:
+        return None
+
+
+def _prepare_chunk(prepare, args, files):
+    """``[Parsed, ...]`` of ``files`` (``(name, raw, stat)``), each prepared by ``prepare(*args, name, raw, st)``."""
+    parsed = []
+    for name, raw, st in files:
+        started = time.perf_counter()
+        try:
+            result, error = prepare(*args, name, raw, st), None
+        except Exception as e:
+            result, error = None, f"{type(e).__name__}: {e}"
+        parsed.append(Parsed(name, result, time.perf_counter() - started, error))
+    return parsed
+
+
+def _context():
+    # Pages run next to watcher and scheduler threads, which fork() would copy mid-flight
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def prepare_files(folder, names, prepare, *args, workers=None):
+    """Yield lists of :class:`Parsed` for the files ``names`` of ``folder``, chunk by chunk as they are ready.
+
+    ``prepare(*args, name, raw, st)`` turns a file's bytes and ``os.stat``
+    result into what the caller stores; it must be a module-level function
+    so worker processes can run it. Files that disappeared are skipped.
+    Chunks come in completion order, not in the order of ``names``.
+    """
+    workers = WORKERS if workers is None else workers
+    if len(names) < CHUNK:
+        files = [found for found in (_read(folder, name) for name in names) if found is not None]
+        if files:
+            yield _prepare_chunk(prepare, args, files)
+        return
+    processes = None
+    if workers > 1 and len(names) >= PARALLEL_MIN:
+        processes = ProcessPoolExecutor(workers, mp_context=_context())
+
+    def chunk(names):
+        files = [found for found in (_read(folder, name) for name in names) if found is not None]
+        if processes is None:
+            return files
+        return processes.submit(_prepare_chunk, prepare, args, files).result()
+
+    chunks = iter(names[start:start + CHUNK] for start in range(0, len(names), CHUNK))
+    # One thread per busy worker; twice as many chunks in flight bounds the file contents held in memory
+    threads = max(READ_THREADS, workers if processes is not None else 0)
+    try:
+        with ThreadPoolExecutor(threads, thread_name_prefix="corpus-ingest") as readers:
+            pending = set()
+            while True:
+                while len(pending) < 2 * threads:
+                    part = next(chunks, None)
+                    if part is None:
+                        break
+                    pending.add(readers.submit(chunk, part))
+                if not pending:
+                    return
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    # Without worker processes, parsing in the reading threads would only contend for the GIL
+                    yield future.result() if processes is not None else _prepare_chunk(prepare, args, future.result())
+    finally:
+        if processes is not None:
+            processes.shutdown(cancel_futures=True)
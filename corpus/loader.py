@@ -0,0 +1,124 @@
+"""Process-wide cache of the JSON paper folders.
+
+Streamlit re-executes a page script on every widget interaction. Pages import
+this module instead of reading ``Papers/`` or ``exhyte_data/`` themselves: the
+parsed files live in module state, so they survive reruns and are shared by
+every session served by the same process. Each access only stats the file
+and re-parses it when its mtime or size changed since the last parse.
+Unchanged files are parsed straight from the memory-mapped snapshot when one
+is available (see :mod:`corpus.snapshot`).
+"""
+
+import hashlib
+import os
+import threading
+
+from corpus import trace
+from corpus.ingest import loads
+from corpus.snapshot import get_snapshot
+
+
+class _Entry:
+    __slots__ = ("signature", "data", "sha256")
+
+    def __init__(self, signature, data, sha256):
+        self.signature = signature
+        self.data = data
+        self.sha256 = sha256
+
+
+class CorpusCache:
+    """Parsed JSON files of one folder, keyed by filename."""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_read = 0
+
+    @trace.traced("corpus.read")
+    def _read(self, name, signature):
+        self.misses += 1
+        snapshot = get_snapshot()
+        found = snapshot.body(self.folder, name, signature) if snapshot else None
+        if found is not None:
+            body, sha256 = found
+            trace.count("bytes_parsed", len(body))
+            return _Entry(signature, loads(body), sha256)
+        with open(os.path.join(self.folder, name), "rb") as f:
+            raw = f.read()
+        self.bytes_read += len(raw)
+        trace.count("files_read")
+        trace.count("bytes_parsed", len(raw))
+        return _Entry(signature, loads(raw), hashlib.sha256(raw).hexdigest())
+
+    def _parse(self, name, signature):
+        entry = self._read(name, signature)
+        self._entries[name] = entry
+        return entry
+
+    def _entry(self, name, signature):
+        entry = self._entries.get(name)
+        if entry is not None and entry.signature == signature:
+            self.hits += 1
+            return entry
+        return self._parse(name, signature)
+
+    def get(self, name):
+        """Parsed content of ``name``; raises if the file is missing or malformed."""
+        st = os.stat(os.path.join(self.folder, name))
+        with self._lock:
+            return self._entry(name, (st.st_mtime_ns, st.st_size)).data
+
+    def read(self, name):
+        """Like :meth:`get`, but a file that is not cached yet is not retained.
+
+        Index builders use this to walk the whole folder without pinning every
+        paper body in memory.
+        """
+        st = os.stat(os.path.join(self.folder, name))
+        signature = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry.signature == signature:
+                self.hits += 1
+                return entry.data
+            return self._read(name, signature).data
+
+    def stats(self):
+        return {
+            "folder": self.folder,
+            "files": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes_read": self.bytes_read,
+        }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(folder):
+    """The shared :class:`CorpusCache` for ``folder``."""
+    key = os.path.abspath(folder)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = CorpusCache(folder)
+        return _caches[key]
+
+
+def load_paper(folder, name):
+    return get_cache(folder).get(name)
+
+
+def read_paper(folder, name):
+    return get_cache(folder).read(name)
+
+
+def cache_stats():
+    """Hit/miss counters of every folder cache created in this process."""
+    with _caches_lock:
+        return [cache.stats() for cache in _caches.values()]
@@ -0,0 +1,197 @@
+"""Metadata-only manifest of a paper folder.
+
+Sidebars only need a handful of fields per paper (title, authors, year,
+subjects, method types), so they are built from a small manifest instead of
+the parsed paper bodies. Bodies are fetched lazily through
+:func:`corpus.loader.load_paper` once a paper is actually selected.
+
+The manifest is seeded from the binary snapshot when one exists (see
+:mod:`corpus.snapshot`), otherwise from its own file under ``CACHE_DIR``, and
+is refreshed incrementally: only files whose mtime or size differ from the
+stored entry are re-read. While :mod:`corpus.watch` watches the folder, only
+the files it reported are even stat-ed.
+
+    python -m corpus manifest            # (re)build both manifests
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import threading
+
+from corpus import trace, watch
+from corpus.config import CACHE_DIR
+from corpus.dates import parse_date
+from corpus.ingest import loads
+from corpus.snapshot import get_snapshot
+
+MANIFEST_VERSION = 2
+
+
+def _names(items):
+    names = []
+    for item in items or []:
+        if isinstance(item, dict):
+            names.append(item.get("name", "Unknown"))
+        else:
+            names.append(str(item))
+    return names
+
+
+def extract_metadata(filename, raw, data=None):
+    """Manifest fields for one paper given the raw bytes of its JSON file (and, if already parsed, its data)."""
+    entry = {
+        "filename": filename,
+        "title": filename[: -len(".json")],
+        "authors": [],
+        "published": "",
+        "year": None,
+        "subjects": [],
+        "method_types": [],
+        "sha256": hashlib.sha256(raw).hexdigest(),
+        "offset": 0,
+        "size": len(raw),
+        "error": None,
+    }
+    if data is None:
+        try:
+            data = loads(raw)
+        except ValueError as e:
+            entry["error"] = str(e)
+            return entry
+
+    entry["title"] = data.get("paper_title", entry["title"])
+    authors = data.get("authors", [])
+    entry["authors"] = authors if isinstance(authors, list) else [str(authors)]
+    entry["published"] = str(data.get("published", ""))
+    entry["year"] = parse_date(entry["published"], filename)["year"]
+    entry["subjects"] = _names(data.get("subject_area", {}).get("areas", []))
+    entry["method_types"] = _names(data.get("method_type", {}).get("methods", []))
+    return entry
+
+
+class Manifest:
+    """Manifest entries of one folder, keyed by filename."""
+
+    def __init__(self, folder, path=None):
+        self.folder = folder
+        self.path = path or os.path.join(CACHE_DIR, os.path.basename(os.path.normpath(folder)) + ".manifest.json")
+        self.entries = {}
+        self._names = []  # sorted filenames of ``entries``
+        self._generation = None  # watcher generation of the last refresh
+        self._lock = threading.Lock()
+        snapshot = get_snapshot()
+        if snapshot is not None and snapshot.has(folder):
+            self.entries = snapshot.entries(folder)
+        else:
+            self._load()
+        self._names = sorted(self.entries)
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        if stored.get("version") == MANIFEST_VERSION:
+            self.entries = {e["filename"]: e for e in stored["entries"]}
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": MANIFEST_VERSION, "entries": list(self)}, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass  # read-only checkout: keep the in-memory manifest
+
+    def _update(self, name, path, st):
+        entry = self.entries.get(name)
+        if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            return 0
+        with open(path, "rb") as f:
+            raw = f.read()
+        trace.count("files_read")
+        trace.count("bytes_parsed", len(raw))
+        entry = extract_metadata(name, raw)
+        entry["mtime_ns"] = st.st_mtime_ns
+        self.entries[name] = entry
+        return 1
+
+    def _rescan(self):
+        changed = 0
+        seen = set()
+        with os.scandir(self.folder) as it:
+            for dirent in it:
+                name = dirent.name
+                if not name.endswith(".json") or name.startswith("."):
+                    continue
+                seen.add(name)
+                changed += self._update(name, dirent.path, dirent.stat())
+        for name in set(self.entries) - seen:
+            del self.entries[name]
+            changed += 1
+        if changed:
+            self._names = sorted(self.entries)
+        return changed
+
+    def _refresh_files(self, names):
+        # Only a few files change between refreshes, so the sorted names are patched in place
+        changed = 0
+        for name in names:
+            path = os.path.join(self.folder, name)
+            known = name in self.entries
+            try:
+                changed += self._update(name, path, os.stat(path))
+            except FileNotFoundError:
+                if known:
+                    del self.entries[name]
+                    del self._names[bisect.bisect_left(self._names, name)]
+                    changed += 1
+                continue
+            if not known:
+                bisect.insort(self._names, name)
+        return changed
+
+    @trace.traced("manifest.refresh")
+    def refresh(self):
+        """Re-read new or changed files, drop deleted ones; returns the number of updates.
+
+        While the folder is watched (:mod:`corpus.watch`), only the files
+        reported as changed are looked at.
+        """
+        with self._lock:
+            generation, names = watch.changes(self.folder, self._generation)
+            changed = self._rescan() if names is None else self._refresh_files(names)
+            self._generation = generation
+            if changed:
+                watch.persist(self.folder, self._lock, self._save, names is not None)
+            return changed
+
+    def __iter__(self):
+        """Entries in filename order."""
+        return iter([self.entries[name] for name in self._names])
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, filename):
+        return self.entries.get(filename)
+
+
+_manifests = {}
+_manifests_lock = threading.Lock()
+
+
+def get_manifest(folder):
+    """The shared, freshly refreshed :class:`Manifest` for ``folder``."""
+    key = os.path.abspath(folder)
+    with _manifests_lock:
+        if key not in _manifests:
+            _manifests[key] = Manifest(folder)
+        manifest = _manifests[key]
+    manifest.refresh()
+    return manifest
+
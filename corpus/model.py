@@ -0,0 +1,212 @@
+"""Normalized in-memory model of ``Papers/`` records.
+
+The JSON records are loosely typed: a list of tools may be a string, a dict
+or a list; an item is labelled by ``name`` or ``label`` and described by
+``description`` or ``explanation``; answers and evidence are a string or a
+list. :func:`normalize_paper` resolves all of that once, when a paper is
+loaded, into small ``__slots__`` records, so the renderer never inspects
+value types. Names that repeat across papers (authors, tools, datasets,
+metrics, baselines, subject areas, method types) are interned, so every
+paper shares one copy of each string.
+"""
+
+import sys
+
+METADATA = ("paper_title", "authors", "published", "link")
+
+_DATASET_DETAILS = (("data_description", "📊 Description"), ("usage", "🔧 Usage"))
+_METRIC_DETAILS = (("purpose", "🎯 Purpose"), ("application", "⚙️ Application"))
+_LISTED = {
+    "method_type": ("methods", "### 🧠 Method Types", False),
+    "subject_area": ("areas", "### 🧪 Subject Areas", False),
+    "limitations": ("limitations", "### ⚠️ Limitations", False),
+    "future_directions": ("future_directions", "### 🔮 Future Directions", True),
+}
+
+
+def _text(value):
+    return "" if value is None else str(value)
+
+
+def _name(value):
+    return sys.intern(_text(value))
+
+
+class Item:
+    """A named entry (tool, dataset, metric, baseline, limitation, ...).
+
+    ``name`` is ``None`` for entries that were plain strings; their text is
+    in ``description``. ``details`` holds ``(label, text)`` pairs such as a
+    dataset's usage.
+    """
+
+    __slots__ = ("name", "description", "evidence", "details")
+
+    def __init__(self, name, description, evidence=None, details=()):
+        self.name = name
+        self.description = description
+        self.evidence = evidence
+        self.details = details
+
+
+class Step:
+    """A method step; ``input``, ``output`` and ``evidence`` are ``None`` for plain-string steps."""
+
+    __slots__ = ("step", "input", "output", "evidence")
+
+    def __init__(self, step, input=None, output=None, evidence=None):
+        self.step = step
+        self.input = input
+        self.output = output
+        self.evidence = evidence
+
+
+class Section:
+    __slots__ = ("key", "title")
+
+    def __init__(self, key):
+        self.key = key
+        self.title = f"🔹 {key.replace('_', ' ').title()}"
+
+
+class LinkSection(Section):
+    __slots__ = ("url", "evidence")
+
+
+class AnswerSection(Section):
+    """``answers`` are ``numbered`` when the record had a list; ``evidence`` likewise ``bulleted``."""
+
+    __slots__ = ("answers", "numbered", "evidence", "bulleted")
+
+
+class MethodSection(Section):
+    __slots__ = ("steps", "tools", "datasets", "metrics")
+
+
+class PerformanceSection(Section):
+    __slots__ = ("summaries", "baselines", "datasets", "metrics")
+
+
+class ListSection(Section):
+    __slots__ = ("heading", "items", "numbered", "evidence")
+
+
+class GenericSection(Section):
+    """Any other section: ``pairs`` of (key, text), numbered ``items``, or ``text``."""
+
+    __slots__ = ("pairs", "items", "text")
+
+
+class Paper:
+    """A normalized paper; ``sections`` keep the record's order, ``sha256`` is its file hash."""
+
+    __slots__ = ("title", "authors", "published", "link", "sections", "sha256")
+
+    def __init__(self, title, authors, published, link, sections, sha256=None):
+        self.title = title
+        self.authors = authors
+        self.published = published
+        self.link = link
+        self.sections = sections
+        self.sha256 = sha256
+
+
+def _as_list(value, wrap=(str, dict)):
+    if isinstance(value, wrap):
+        return [value]
+    return value or []
+
+
+def _item(value, details=()):
+    if not isinstance(value, dict):
+        return Item(None, _text(value))
+    return Item(
+        _name(value.get("name") or value.get("label") or ""),
+        _text(value.get("description") or value.get("explanation") or ""),
+        _text(value.get("evidence")) or None,
+        tuple((label, _text(value[key])) for key, label in details if value.get(key)),
+    )
+
+
+def _items(values, details=()):
+    return tuple(_item(v, details) for v in _as_list(values))
+
+
+def _step(value):
+    if not isinstance(value, dict):
+        return Step(_text(value))
+    return Step(_text(value.get("step", "")), _text(value.get("input", "")), _text(value.get("output", "")),
+                _text(value.get("evidence", "")))
+
+
+def _answer(value):
+    """``(texts, was_list)``."""
+    if isinstance(value, list):
+        return tuple(_text(v) for v in value), True
+    return (_text(value),), False
+
+
+def _section(key, content):
+    is_dict = isinstance(content, dict)
+    if key == "resource_link" and is_dict:
+        section = LinkSection(key)
+        section.url = _text(content.get("answer", ""))
+        section.evidence = _text(content.get("evidence", "No evidence provided."))
+    elif is_dict and "answer" in content:
+        section = AnswerSection(key)
+        section.answers, section.numbered = _answer(content["answer"])
+        section.evidence, section.bulleted = _answer(content.get("evidence", ""))
+    elif key == "method" and is_dict:
+        section = MethodSection(key)
+        section.steps = tuple(_step(s) for s in content.get("steps", []))
+        section.tools = _items(content.get("tools", []))
+        section.datasets = _items(content.get("benchmark_datasets", []), _DATASET_DETAILS)
+        section.metrics = _items(content.get("evaluation_metrics", []), _METRIC_DETAILS)
+    elif key == "performance_summary" and is_dict:
+        section = PerformanceSection(key)
+        section.summaries = tuple(
+            Item(None, _text(p.get("summary", "")), _text(p.get("evidence")) or None) if isinstance(p, dict)
+            else Item(None, _text(p))
+            for p in _as_list(content.get("performance_summary", []))
+        )
+        section.baselines = _items(content.get("baselines", []))
+        section.datasets = _items(content.get("benchmark_datasets", []), _DATASET_DETAILS)
+        section.metrics = _items(content.get("evaluation_metrics", []), _METRIC_DETAILS)
+    elif key in _LISTED and is_dict:
+        field, heading, numbered = _LISTED[key]
+        section = ListSection(key)
+        section.heading, section.numbered = heading, numbered
+        section.items = tuple(_item(v) for v in content.get(field, []))
+        # Subject areas are short names shared by many papers
+        if key == "subject_area":
+            for item in section.items:
+                if item.name is None:
+                    item.description = sys.intern(item.description)
+        evidence = content.get("evidence", []) if key == "subject_area" else ()
+        section.evidence = tuple(_text(e) for e in _as_list(evidence, wrap=str))
+    else:
+        section = GenericSection(key)
+        section.pairs, section.items, section.text = (), (), None
+        if is_dict:
+            section.pairs = tuple(
+                (sys.intern(k), ", ".join(_text(x) for x in v) if isinstance(v, list) else _text(v))
+                for k, v in content.items()
+            )
+        elif isinstance(content, list):
+            section.items = tuple(_text(v) for v in content)
+        else:
+            section.text = _text(content)
+    return section
+
+
+def normalize_paper(data, sha256=None):
+    """:class:`Paper` for a parsed ``Papers/`` record."""
+    authors = data.get("authors")
+    return Paper(
+        _text(data.get("paper_title", "Untitled Paper")),
+        tuple(_name(a) for a in _as_list(authors, wrap=str)),
+        _text(data.get("published") or ""),
+        _text(data.get("link") or ""),
+        tuple(_section(key, content) for key, content in data.items() if key not in METADATA),
+        sha256,
+    )
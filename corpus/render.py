@@ -0,0 +1,194 @@
+"""Markdown rendering of ``Papers/`` records, shared by both viewers.
+
+A normalized paper (see :mod:`corpus.model`) is rendered once into a header
+plus one markdown document per section, instead of one ``st.markdown`` call
+per step, tool or metric. The result is memoized by file hash in a bounded
+LRU, so switching back to a paper costs a dictionary lookup and a handful of
+frontend elements.
+"""
+
+import threading
+from collections import OrderedDict
+
+from corpus import trace
+from corpus.model import (
+    AnswerSection,
+    GenericSection,
+    LinkSection,
+    ListSection,
+    MethodSection,
+    PerformanceSection,
+)
+
+RENDER_CACHE_SIZE = 256
+
+
+def _evidence(lines, evidence, indent="  "):
+    if evidence:
+        lines.append(f"{indent}- 📌 Evidence: {evidence}")
+
+
+def _named_items(lines, items):
+    """``- **name**: description`` entries with optional labelled sub-lines."""
+    for item in items:
+        if item.name is None:
+            lines.append(f"- {item.description}")
+            _evidence(lines, item.evidence)
+            continue
+        lines.append(f"- **{item.name}**: {item.description}" if item.description else f"- **{item.name}**")
+        lines.extend(f"  - {label}: {text}" for label, text in item.details)
+        _evidence(lines, item.evidence)
+
+
+def _datasets_and_metrics(lines, section):
+    if section.datasets:
+        lines.append("### 📚 Benchmark Datasets")
+        _named_items(lines, section.datasets)
+    if section.metrics:
+        lines.append("### 📏 Evaluation Metrics")
+        _named_items(lines, section.metrics)
+
+
+def _link(lines, section):
+    if section.url:
+        lines.append(f"[{section.url}]({section.url})")
+    lines.append(f"📌 Evidence: {section.evidence}")
+
+
+def _answer(lines, section):
+    lines.append("**✅ Answer**")
+    if section.numbered:
+        lines.extend(f"{i}. {a}" for i, a in enumerate(section.answers, 1))
+    else:
+        lines.extend(section.answers)
+    lines.append("**📌 Evidence**")
+    if section.bulleted:
+        lines.extend(f"- {e}" for e in section.evidence)
+    else:
+        lines.extend(section.evidence)
+
+
+def _method(lines, section):
+    lines.append("### 🔄 Steps")
+    for step in section.steps:
+        lines.append(f"- **{step.step}**" if step.input is not None else f"- {step.step}")
+        if step.input is not None:
+            lines.append(f"  - 📥 Input: {step.input}")
+            lines.append(f"  - 📤 Output: {step.output}")
+            lines.append(f"  - 📌 Evidence: {step.evidence}")
+    if section.tools:
+        lines.append("### 🛠️ Tools")
+        _named_items(lines, section.tools)
+    _datasets_and_metrics(lines, section)
+
+
+def _performance(lines, section):
+    lines.append("### 📈 Performance Summary")
+    _named_items(lines, section.summaries)
+    if section.baselines:
+        lines.append("### 📊 Baselines")
+        _named_items(lines, section.baselines)
+    _datasets_and_metrics(lines, section)
+
+
+def _listed(lines, section):
+    lines.append(section.heading)
+    for i, item in enumerate(section.items, 1):
+        if item.name is None:
+            lines.append(f"{i}. {item.description}" if section.numbered else f"- {item.description}")
+            continue
+        name = item.name or "Unnamed"
+        if section.numbered:
+            lines.append(f"{i}. **{name}** — {item.description}")
+        else:
+            lines.append(f"- **{name}**: {item.description}")
+        _evidence(lines, item.evidence, indent="   " if section.numbered else "  ")
+    if section.evidence:
+        lines.append("📌 Evidence:")
+        lines.extend(f"- {e}" for e in section.evidence)
+
+
+def _generic(lines, section):
+    lines.extend(f"- **{key}**: {value}" for key, value in section.pairs)
+    lines.extend(f"{i}. {item}" for i, item in enumerate(section.items, 1))
+    if section.text is not None:
+        lines.append(section.text)
+
+
+_RENDERERS = {
+    LinkSection: _link,
+    AnswerSection: _answer,
+    MethodSection: _method,
+    PerformanceSection: _performance,
+    ListSection: _listed,
+    GenericSection: _generic,
+}
+
+
+def _to_markdown(lines):
+    """Join lines, with a blank line around everything but consecutive list items."""
+    out = []
+    prev_item = False
+    for line in lines:
+        is_item = line.startswith(("-", " ")) or line.split(".", 1)[0].isdigit()
+        if out and not (is_item and prev_item):
+            out.append("")
+        out.append(line)
+        prev_item = is_item
+    return "\n".join(out)
+
+
+def render_header(paper):
+    """Title, authors, publication date and link of a paper."""
+    lines = [f"### 📝 {paper.title}"]
+    if paper.authors:
+        lines.append(f"👩‍🔬 **Authors**: {', '.join(paper.authors)}")
+    if paper.published:
+        lines.append(f"📅 **Published**: {paper.published}")
+    if paper.link:
+        lines.append(f"🔗 [Paper Link]({paper.link})")
+    return "\n\n".join(lines)
+
+
+def render_section(section):
+    """Markdown body of one section."""
+    lines = []
+    _RENDERERS[type(section)](lines, section)
+    return _to_markdown(lines)
+
+
+class RenderedPaper:
+    __slots__ = ("header", "sections")
+
+    def __init__(self, header, sections):
+        self.header = header
+        self.sections = sections  # [(title, markdown), ...]
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+@trace.traced("render_paper")
+def render_paper(paper):
+    """Memoized :class:`RenderedPaper` for a :class:`corpus.model.Paper`, keyed by its file hash."""
+    with _cache_lock:
+        rendered = _cache.get(paper.sha256)
+        if rendered is not None:
+            _cache.move_to_end(paper.sha256)
+            _stats["hits"] += 1
+            return rendered
+    rendered = RenderedPaper(render_header(paper), [(s.title, render_section(s)) for s in paper.sections])
+    with _cache_lock:
+        _stats["misses"] += 1
+        if paper.sha256 is not None:
+            _cache[paper.sha256] = rendered
+            while len(_cache) > RENDER_CACHE_SIZE:
+                _cache.popitem(last=False)
+    return rendered
+
+
+def render_stats():
+    with _cache_lock:
+        return {"entries": len(_cache), **_stats}
@@ -0,0 +1,81 @@
+"""Text fields and query parsing for full-text search over the ``Papers/`` schema.
+
+:func:`document_fields` splits a paper into its text fields (``objective``,
+``knowledge_gap``, ``method.steps``, ``method.tools``,
+``benchmark_datasets``, ``limitations``, ...), which
+:class:`corpus.store.Collection` indexes and ranks with BM25;
+:func:`parse_query` turns a query into terms and ``field:term`` filters.
+"""
+
+import re
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were with".split()
+)
+_SKIP_SECTIONS = ("link", "published")
+
+
+def tokenize(text):
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def text_values(value):
+    """Every string in a nested JSON value."""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for v in value.values():
+            yield from text_values(v)
+    elif isinstance(value, list):
+        for v in value:
+            yield from text_values(v)
+    elif value is not None:
+        yield str(value)
+
+
+def document_fields(filename, data):
+    """``{field: [text, ...]}`` for one paper.
+
+    Nested method parts become ``method.<part>``; the lists under
+    ``performance_summary`` (``benchmark_datasets``, ``baselines``, ...) keep
+    their own names. Every other section is a single field.
+    """
+    fields = {"filename": [filename[: -len(".json")]]}
+    for section, content in data.items():
+        if section in _SKIP_SECTIONS:
+            continue
+        if isinstance(content, dict) and section in ("method", "performance_summary"):
+            for sub, value in content.items():
+                if sub == "evidence" or sub == section:
+                    field = section
+                elif section == "method":
+                    field = f"method.{sub}"
+                else:
+                    field = sub
+                fields.setdefault(field, []).extend(text_values(value))
+        else:
+            fields.setdefault(section, []).extend(text_values(content))
+    return fields
+
+
+def resolve_fields(names, fields):
+    """The ``fields`` that ``names`` refer to, by full name or last dotted component (``tools``: ``method.tools``)."""
+    resolved = set()
+    for name in names:
+        for field in fields:
+            if field == name or field.rsplit(".", 1)[-1] == name:
+                resolved.add(field)
+    return resolved
+
+
+def parse_query(query, fields):
+    """Split ``query`` into terms and the inline ``field:term`` filters naming one of ``fields``."""
+    terms, selected = [], set()
+    for word in query.split():
+        name, sep, rest = word.partition(":")
+        if sep and resolve_fields([name], fields):
+            selected |= resolve_fields([name], fields)
+            word = rest
+        terms.extend(tokenize(word))
+    return terms, selected
@@ -0,0 +1,295 @@
+"""Related-paper similarity and clustering over one paper folder.
+
+Every paper becomes a hashed TF-IDF vector: the tokens of all its text
+fields (the same fields as :mod:`corpus.search`, so ``method.*`` and
+``inspirational_papers`` included) are hashed into ``DIM`` signed buckets
+with sublinear term frequency, weighted by bucket IDF and L2-normalised.
+The vectors form one ``float32`` matrix stored as ``.npy`` under
+``CACHE_DIR`` and opened memory-mapped, so a cosine top-k query is a single
+matrix-vector product (about 20 ms for 100k papers at ``DIM = 512``).
+
+The vectors are built from the paper bodies in :mod:`corpus.store`. The raw
+term-frequency rows are stored alongside, with each paper's content hash, so
+a refresh does nothing while the store's revision of the folder is unchanged
+and otherwise only re-reads papers whose hash changed; the IDF weighting is
+then reapplied to the whole matrix with array operations (a new paper changes
+every paper's IDF weights, so this step stays linear in the corpus even when
+the folder is watched). Clusters come from spherical k-means, fitted on a
+sample for large corpora and computed once per matrix.
+
+    python -m corpus similar     # prebuild the matrices of both folders
+"""
+
+import json
+import math
+import os
+import threading
+import zlib
+from collections import Counter
+
+import numpy as np
+
+from corpus import trace, watch
+from corpus.config import CACHE_DIR
+from corpus.search import document_fields, tokenize
+from corpus.store import get_collection
+
+SIMILARITY_VERSION = 2
+DIM = 512
+KMEANS_ITERATIONS = 25
+KMEANS_SAMPLE = 20000
+_CHUNK = 8192
+
+
+def paper_vector(filename, data):
+    """Hashed sublinear term frequencies of one paper (not IDF-weighted)."""
+    counts = Counter(t for texts in document_fields(filename, data).values() for text in texts for t in tokenize(text))
+    hashes = np.fromiter(map(zlib.crc32, map(str.encode, counts)), dtype=np.uint32, count=len(counts))
+    tf = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+    weights = np.where(hashes & 0x80000000, 1.0, -1.0) * (1.0 + np.log(tf))
+    return np.bincount(hashes % DIM, weights, minlength=DIM).astype(np.float32)
+
+
+def _top_k(scores, k):
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def kmeans(matrix, k, iterations=KMEANS_ITERATIONS, sample=KMEANS_SAMPLE, seed=0):
+    """Spherical k-means of L2-normalised rows; returns ``(labels, centroids)``.
+
+    Centroids are fitted on at most ``sample`` rows (k-means++ seeding),
+    then every row is assigned to its most similar centroid.
+    """
+    n = len(matrix)
+    rng = np.random.default_rng(seed)
+    fit = np.asarray(matrix if n <= sample else matrix[np.sort(rng.choice(n, sample, replace=False))])
+    k = max(1, min(k, len(fit)))
+
+    centroids = np.empty((k, fit.shape[1]), dtype=np.float32)
+    centroids[0] = fit[rng.integers(len(fit))]
+    distance = np.maximum(1.0 - fit @ centroids[0], 0.0)
+    for i in range(1, k):
+        total = distance.sum()
+        pick = rng.choice(len(fit), p=distance / total) if total > 0 else rng.integers(len(fit))
+        centroids[i] = fit[pick]
+        distance = np.minimum(distance, np.maximum(1.0 - fit @ centroids[i], 0.0))
+
+    for _ in range(iterations):
+        labels = np.argmax(fit @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, fit)
+        norms = np.linalg.norm(sums, axis=1)
+        empty = norms == 0
+        sums[empty], norms[empty] = centroids[empty], 1.0  # empty clusters keep their centroid
+        updated = sums / norms[:, None]
+        converged = np.allclose(updated, centroids, atol=1e-6)
+        centroids = updated.astype(np.float32)
+        if converged:
+            break
+
+    labels = np.empty(n, dtype=np.int32)
+    for start in range(0, n, _CHUNK):
+        labels[start:start + _CHUNK] = np.argmax(np.asarray(matrix[start:start + _CHUNK]) @ centroids.T, axis=1)
+    return labels, centroids
+
+
+class SimilarityIndex:
+    """Memory-mapped TF-IDF matrix of one folder with top-k and cluster queries."""
+
+    def __init__(self, folder, path=None):
+        self.folder = folder
+        self.path = path or os.path.join(CACHE_DIR, os.path.basename(os.path.normpath(folder)) + ".similar")
+        self.names = []          # row -> filename
+        self.rows = {}           # filename -> row
+        self.hashes = {}         # filename -> sha256 of the content
+        self.tf = np.zeros((0, DIM), dtype=np.float32)
+        self.matrix = np.zeros((0, DIM), dtype=np.float32)
+        self._clusters = None
+        self._revision = None    # store revision of the last refresh
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, filename):
+        return filename in self.rows
+
+    def _load(self):
+        try:
+            with open(self.path + ".json", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != SIMILARITY_VERSION or meta.get("dim") != DIM:
+                return
+            tf = np.load(self.path + ".tf.npy", mmap_mode="r")
+            matrix = np.load(self.path + ".npy", mmap_mode="r")
+        except (OSError, ValueError):
+            return
+        if tf.shape != matrix.shape or len(tf) != len(meta["names"]):
+            return
+        self.names, self.hashes, self.tf, self.matrix = meta["names"], meta["hashes"], tf, matrix
+        self.rows = {name: i for i, name in enumerate(self.names)}
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            for suffix, array in ((".tf.npy", self.tf), (".npy", self.matrix)):
+                tmp = self.path + ".tmp" + suffix
+                np.save(tmp, array)
+                os.replace(tmp, self.path + suffix)
+            tmp = self.path + ".json.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": SIMILARITY_VERSION, "dim": DIM, "names": self.names,
+                           "hashes": self.hashes}, f)
+            os.replace(tmp, self.path + ".json")
+        except OSError:
+            return
+        # Serve queries from the page cache instead of process memory
+        self.tf = np.load(self.path + ".tf.npy", mmap_mode="r")
+        self.matrix = np.load(self.path + ".npy", mmap_mode="r")
+
+    @trace.traced("similarity.refresh")
+    def refresh(self, papers):
+        """Re-vectorise papers whose content changed, drop deleted ones; returns the number of updates.
+
+        ``papers`` is the :class:`corpus.store.Collection` of the folder.
+        """
+        with self._lock:
+            revision = papers.store.revision(papers.key)
+            if revision == self._revision:
+                return 0
+            first, self._revision = self._revision is None, revision
+            hashes = papers.hashes()
+            changed = sorted(name for name, sha in hashes.items() if self.hashes.get(name) != sha)
+            removed = [name for name in self.rows if name not in hashes]
+            if not changed and not removed:
+                return 0
+
+            names = sorted(set(self.names).difference(removed).union(changed))
+            rows = {name: i for i, name in enumerate(names)}
+            tf = np.zeros((len(names), DIM), dtype=np.float32)
+            stale = set(changed)
+            kept = [(rows[name], row) for name, row in self.rows.items() if name in rows and name not in stale]
+            if kept:
+                new_rows, old_rows = map(list, zip(*kept))
+                tf[new_rows] = self.tf[old_rows]
+            kept_hashes = {name: self.hashes[name] for name in names if name not in stale}
+            for name in changed:
+                try:
+                    data = papers.paper(name)
+                except (KeyError, ValueError):
+                    data = {}  # deleted since, or malformed
+                tf[rows[name]] = paper_vector(name, data)
+                kept_hashes[name] = hashes[name]
+
+            self.names, self.rows, self.hashes, self.tf = names, rows, kept_hashes, tf
+            self.matrix = self._weight(tf)
+            self._clusters = None
+            watch.persist(self.folder, self._lock, self._save, not first)
+            return len(changed) + len(removed)
+
+    @staticmethod
+    def _weight(tf):
+        """IDF-weighted, L2-normalised rows of ``tf``."""
+        df = np.count_nonzero(tf, axis=0)
+        idf = (np.log((1.0 + len(tf)) / (1.0 + df)) + 1.0).astype(np.float32)
+        matrix = tf * idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _candidates(self, within):
+        if within is None:
+            return None
+        return np.fromiter((self.rows[n] for n in within if n in self.rows), dtype=np.intp)
+
+    def similar(self, filename, k=10, within=None):
+        """``[(filename, cosine), ...]`` of the ``k`` papers most similar to ``filename``.
+
+        ``within`` restricts the answers to those filenames.
+        """
+        return self.similar_batch([filename], k, within)[0]
+
+    @trace.traced("similarity.query")
+    def similar_batch(self, filenames, k=10, within=None):
+        """:meth:`similar` for several papers with one matrix product."""
+        queries = [self.rows[name] for name in filenames if name in self.rows]
+        results = {name: [] for name in filenames}
+        if not queries:
+            return [results[name] for name in filenames]
+        candidates = self._candidates(within)
+        scores = np.asarray(self.matrix) @ np.asarray(self.matrix[queries]).T
+        if candidates is not None:
+            scores = scores[candidates]
+        for column, row in enumerate(queries):
+            column_scores = scores[:, column].copy()
+            self_row = row if candidates is None else np.flatnonzero(candidates == row)
+            column_scores[self_row] = -np.inf
+            top = _top_k(column_scores, k + 1)
+            picked = top if candidates is None else candidates[top]
+            results[self.names[row]] = [
+                (self.names[i], float(column_scores[t])) for t, i in zip(top, picked) if np.isfinite(column_scores[t])
+            ][:k]
+        return [results[name] for name in filenames]
+
+    def clusters(self):
+        """``(labels, centroids)`` of the corpus, about ``sqrt(n / 2)`` clusters."""
+        with self._lock:
+            if self._clusters is None:
+                k = max(2, round(math.sqrt(len(self.names) / 2)))
+                self._clusters = kmeans(self.matrix, k) if len(self.names) else (np.empty(0, np.int32), None)
+            return self._clusters
+
+    @trace.traced("similarity.cluster")
+    def cluster(self, seed=None, within=None, limit=None, min_size=3):
+        """Members of one cluster, most central first, and the cluster's coherence.
+
+        The cluster is the one holding ``seed`` or, without a seed, the most
+        coherent one with at least ``min_size`` members in ``within`` (small
+        clusters are trivially coherent). Coherence is the
+        norm of the members' mean vector (1.0 for identical papers). Returns
+        ``([], 0.0)`` when there is nothing to cluster.
+        """
+        labels, centroids = self.clusters()
+        candidates = self._candidates(within)
+        rows = np.arange(len(self.names)) if candidates is None else candidates
+        if not len(rows):
+            return [], 0.0
+        members_of = {label: rows[labels[rows] == label] for label in np.unique(labels[rows])}
+
+        def coherence(members):
+            return float(np.linalg.norm(np.asarray(self.matrix[np.sort(members)]).mean(axis=0)))
+
+        if seed in self.rows:
+            label = labels[self.rows[seed]]
+            members = members_of.get(label, np.empty(0, np.intp))
+            if self.rows[seed] not in members:
+                members = np.append(members, self.rows[seed])
+        else:
+            groups = [m for m in members_of.values() if len(m) >= min_size] or list(members_of.values())
+            members = max(groups, key=coherence)
+            label = labels[members[0]]
+        centrality = np.asarray(self.matrix[np.sort(members)]) @ centroids[label]
+        ordered = np.sort(members)[np.argsort(-centrality, kind="stable")]
+        if limit:
+            ordered = ordered[:limit]
+        return [self.names[i] for i in ordered], coherence(ordered)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_similarity_index(folder):
+    """The shared, freshly refreshed :class:`SimilarityIndex` for ``folder``."""
+    key = os.path.abspath(folder)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = SimilarityIndex(folder)
+        index = _indexes[key]
+    index.refresh(get_collection(folder))
+    return index
@@ -0,0 +1,194 @@
+"""Precompiled binary snapshot of the paper folders.
+
+``python -m corpus snapshot`` compiles ``Papers/`` and ``exhyte_data/`` into a
+single file that the app memory-maps, so a cold start opens one file instead
+of one per paper. Layout (little endian)::
+
+    header    magic, version, counts and section offsets
+    strings   (n + 1) u64 offsets followed by a UTF-8 blob; string 0 is ""
+    lists     u32 string ids referenced by (start, count) pairs of records
+    records   one fixed-size struct per paper
+    bodies    compact JSON of each paper
+
+Every string (folder, filename, title, author, subject, ...) is stored once.
+Each record keeps the mtime/size of its source file; a record whose source
+has since changed is ignored and the caller falls back to the JSON file.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+
+from corpus.config import CACHE_DIR
+
+SNAPSHOT_PATH = os.environ.get("CORPUS_SNAPSHOT", os.path.join(CACHE_DIR, "corpus.snap"))
+
+MAGIC = b"CORPSNAP"
+VERSION = 1
+HEADER = struct.Struct("<8sIIIIQQQQ")
+RECORD = struct.Struct("<IIIIiIqQQQIIIIIII")
+U32 = struct.Struct("<I")
+U64 = struct.Struct("<Q")
+
+
+def _folder_key(folder):
+    return os.path.basename(os.path.normpath(folder))
+
+
+class Snapshot:
+    """Read-only view over a memory-mapped snapshot file."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+        (magic, version, self._n_strings, n_lists, n_records,
+         self._strings_off, self._lists_off, records_off, self._bodies_off) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a version {VERSION} corpus snapshot")
+        self._blob_off = self._strings_off + U64.size * (self._n_strings + 1)
+
+        # folder -> {filename: record tuple}
+        self._index = {}
+        for i in range(n_records):
+            rec = RECORD.unpack_from(self._mm, records_off + i * RECORD.size)
+            folder = self.string(rec[0])
+            self._index.setdefault(folder, {})[self.string(rec[1])] = rec
+
+    def string(self, sid):
+        start, end = struct.unpack_from("<QQ", self._mm, self._strings_off + U64.size * sid)
+        return str(self._view[self._blob_off + start:self._blob_off + end], "utf-8")
+
+    def _list(self, start, count):
+        return [self.string(U32.unpack_from(self._mm, self._lists_off + U32.size * (start + k))[0])
+                for k in range(count)]
+
+    def has(self, folder):
+        return _folder_key(folder) in self._index
+
+    def entries(self, folder):
+        """Manifest entries (see :mod:`corpus.manifest`) for every paper of ``folder``."""
+        entries = {}
+        for name, rec in self._index.get(_folder_key(folder), {}).items():
+            (_, _, title, published, year, sha, mtime_ns, size, _, _,
+             a_start, a_count, s_start, s_count, m_start, m_count, error) = rec
+            entries[name] = {
+                "filename": name,
+                "title": self.string(title),
+                "authors": self._list(a_start, a_count),
+                "published": self.string(published),
+                "year": None if year < 0 else year,
+                "subjects": self._list(s_start, s_count),
+                "method_types": self._list(m_start, m_count),
+                "sha256": self.string(sha),
+                "offset": 0,
+                "size": size,
+                "error": self.string(error) or None,
+                "mtime_ns": mtime_ns,
+            }
+        return dict(sorted(entries.items()))
+
+    def body(self, folder, filename, signature=None):
+        """Zero-copy ``(memoryview, sha256)`` of a paper body, or ``None``.
+
+        With ``signature=(mtime_ns, size)`` the record must match the current
+        source file, otherwise ``None`` is returned and the caller should read
+        the JSON file instead.
+        """
+        rec = self._index.get(_folder_key(folder), {}).get(filename)
+        if rec is None or rec[9] == 0:
+            return None
+        if signature is not None and (rec[6], rec[7]) != tuple(signature):
+            return None
+        start = self._bodies_off + rec[8]
+        return self._view[start:start + rec[9]], self.string(rec[5])
+
+
+def build_snapshot(folders, path=SNAPSHOT_PATH):
+    """Compile ``folders`` into a snapshot at ``path``; returns the paper count."""
+    from corpus.manifest import extract_metadata
+
+    strings = {"": 0}
+    lists = []
+    records = []
+    bodies = bytearray()
+
+    def sid(value):
+        return strings.setdefault(value, len(strings))
+
+    def add_list(values):
+        start = len(lists)
+        lists.extend(sid(str(v)) for v in values)
+        return start, len(values)
+
+    for folder in folders:
+        folder_sid = sid(_folder_key(folder))
+        for name in sorted(os.listdir(folder)):
+            if not name.endswith(".json") or name.startswith("."):
+                continue
+            file_path = os.path.join(folder, name)
+            st = os.stat(file_path)
+            with open(file_path, "rb") as f:
+                raw = f.read()
+            meta = extract_metadata(name, raw)
+            body = b""
+            if meta["error"] is None:
+                body = json.dumps(json.loads(raw), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            records.append((
+                folder_sid, sid(name), sid(meta["title"]), sid(meta["published"]),
+                -1 if meta["year"] is None else meta["year"], sid(meta["sha256"]),
+                st.st_mtime_ns, st.st_size, len(bodies), len(body),
+                *add_list(meta["authors"]), *add_list(meta["subjects"]), *add_list(meta["method_types"]),
+                sid(meta["error"] or ""),
+            ))
+            bodies += body
+
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = [0]
+    for s in encoded:
+        offsets.append(offsets[-1] + len(s))
+
+    strings_off = HEADER.size
+    lists_off = strings_off + U64.size * len(offsets) + offsets[-1]
+    records_off = lists_off + U32.size * len(lists)
+    bodies_off = records_off + RECORD.size * len(records)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(encoded), len(lists), len(records),
+                            strings_off, lists_off, records_off, bodies_off))
+        f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+        f.write(b"".join(encoded))
+        f.write(struct.pack(f"<{len(lists)}I", *lists))
+        for rec in records:
+            f.write(RECORD.pack(*rec))
+        f.write(bodies)
+    os.replace(tmp, path)
+    return len(records)
+
+
+_snapshot = None
+_snapshot_stat = None
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot(path=SNAPSHOT_PATH):
+    """The process-wide :class:`Snapshot`, reopened if the file was rebuilt; ``None`` if absent."""
+    global _snapshot, _snapshot_stat
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = (path, st.st_ino, st.st_mtime_ns, st.st_size)
+    with _snapshot_lock:
+        if key != _snapshot_stat:
+            try:
+                _snapshot = Snapshot(path)
+            except (OSError, ValueError, struct.error):
+                _snapshot = None
+            _snapshot_stat = key
+        return _snapshot
@@ -0,0 +1,799 @@
+"""SQLite store of both paper folders, with FTS5 full-text search.
+
+One database under ``CACHE_DIR`` holds the ``Papers/`` and ``exhyte_data/``
+records side by side, keyed by folder and filename:
+
+* ``papers``: title, authors, publication date, link, file signature,
+  content hash; the zlib-compressed JSON bodies are kept apart in
+  ``bodies``, so listing titles or hashes does not read them;
+* ``subjects``, ``method_types``, ``tools`` and ``datasets``: one row per
+  distinct name, linked to papers through ``paper_<table>`` tables (the
+  same values as :mod:`corpus.facets`);
+* ``stages``: one row per workflow stage and per ``(stage, sub-step)``,
+  linked through ``paper_stages`` to the papers that performed them;
+* ``paper_text``: an FTS5 table with one row per text field of a paper (the
+  fields of :func:`corpus.search.document_fields`, or the performed stages
+  of a workflow record). Its rowid is ``paper id * FIELD_SLOTS + field id``
+  (see ``field_names``), so a paper's rows are replaced with a rowid range
+  delete and field filters never read the stored text;
+* ``paper_docs``: a contentless FTS5 table with all the text of a paper in
+  one row, whose rowid is ``folder id * DOC_SLOTS + paper id``. Searches
+  without a field filter rank its rows in FTS5 with ``ORDER BY rank
+  LIMIT``, scoring only the folder's rowid range.
+
+:meth:`Store.sync` upserts new and changed files in batches of ``BATCH``
+files per transaction and deletes removed ones. While :mod:`corpus.watch`
+watches the folder, only the reported files are looked at. Files are read
+and parsed in parallel by :mod:`corpus.ingest`; an import of
+``PROGRESSIVE_MIN`` files or more can continue on a background thread once
+its first chunk is stored, so pages show the first papers right away. Each
+import records its parse times and the files that failed (see
+:meth:`Collection.import_report`). Pages query a
+folder through a :class:`Collection`. Its lists, facet counts, filters and
+searches are memoized until the next import into that folder, by any
+process.
+Connections are per thread, in WAL mode, with a page cache of ``CACHE_KIB``
+each, so memory stays bounded whatever the corpus size.
+
+    python -m corpus store       # import or update both folders
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from corpus import trace, watch
+from corpus.config import CACHE_DIR
+from corpus.coverage import paper_flags
+from corpus.dates import parse_date
+from corpus.facets import paper_facets
+from corpus.ingest import BACKEND, PARALLEL_MIN, WORKERS, loads, prepare_files
+from corpus.manifest import extract_metadata
+from corpus.model import normalize_paper
+from corpus.search import document_fields, parse_query, resolve_fields, text_values
+
+STORE_PATH = os.path.join(CACHE_DIR, "corpus.db")
+STORE_VERSION = 2
+BATCH = 500
+PROGRESSIVE_MIN = 2000
+SLOWEST = 10
+CACHE_KIB = 16384
+FIELD_SLOTS = 1024
+DOC_SLOTS = 1 << 40
+RECORD_CACHE = 256
+MEMO_SIZE = 1024
+# facet -> table of its values; "year" is a column of papers
+FACET_TABLES = {"subject": "subjects", "method_type": "method_types", "tool": "tools", "dataset": "datasets"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+CREATE TABLE IF NOT EXISTS papers (
+    id INTEGER PRIMARY KEY,
+    folder TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    title TEXT NOT NULL,
+    authors TEXT NOT NULL,
+    published TEXT NOT NULL,
+    year INTEGER,
+    month INTEGER,
+    day INTEGER,
+    link TEXT,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    error TEXT,
+    UNIQUE (folder, filename)
+);
+CREATE TABLE IF NOT EXISTS bodies (
+    paper_id INTEGER PRIMARY KEY REFERENCES papers (id) ON DELETE CASCADE,
+    body BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS papers_date ON papers (folder, year, month, day);
+CREATE TABLE IF NOT EXISTS stages (
+    id INTEGER PRIMARY KEY, stage TEXT NOT NULL, step TEXT NOT NULL, UNIQUE (stage, step)
+);
+CREATE TABLE IF NOT EXISTS paper_stages (
+    paper_id INTEGER NOT NULL REFERENCES papers (id) ON DELETE CASCADE,
+    value_id INTEGER NOT NULL,
+    PRIMARY KEY (value_id, paper_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS paper_stages_paper ON paper_stages (paper_id);
+CREATE TABLE IF NOT EXISTS fields (folder TEXT NOT NULL, name TEXT NOT NULL, PRIMARY KEY (folder, name)) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS paper_text USING fts5 (field UNINDEXED, text);
+CREATE VIRTUAL TABLE IF NOT EXISTS paper_docs USING fts5 (text, content='');
+CREATE TABLE IF NOT EXISTS field_names (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS folders (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+""" + "".join(f"""
+CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS paper_{table} (
+    paper_id INTEGER NOT NULL REFERENCES papers (id) ON DELETE CASCADE,
+    value_id INTEGER NOT NULL REFERENCES {table} (id),
+    PRIMARY KEY (value_id, paper_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS paper_{table}_paper ON paper_{table} (paper_id);
+""" for table in FACET_TABLES.values())
+
+_UPSERT = """
+INSERT INTO papers (folder, filename, title, authors, published, year, month, day, link, mtime_ns, size, sha256,
+                    error)
+VALUES (:folder, :filename, :title, :authors, :published, :year, :month, :day, :link, :mtime_ns, :size, :sha256,
+        :error)
+ON CONFLICT (folder, filename) DO UPDATE SET
+    title = excluded.title, authors = excluded.authors, published = excluded.published, year = excluded.year,
+    month = excluded.month, day = excluded.day, link = excluded.link, mtime_ns = excluded.mtime_ns,
+    size = excluded.size, sha256 = excluded.sha256, error = excluded.error
+"""
+
+
+def _workflow_fields(data):
+    """``{stage: [text, ...]}`` of the performed sub-steps of a workflow record."""
+    fields = {}
+    for stage, content in data.items():
+        if not isinstance(content, dict) or str(content.get("performed", "Yes")).strip().lower() == "no":
+            continue
+        for step, value in content.items():
+            if isinstance(value, dict) and str(value.get("performed", "Yes")).strip().lower() != "no":
+                texts = fields.setdefault(stage, [])
+                texts.append(step)
+                for name, text in value.items():
+                    if name != "performed":
+                        texts.extend(text_values(text))
+    return fields
+
+
+def prepare_row(folder_key, filename, raw, st):
+    """Everything :meth:`Store.sync` writes for one file, from its raw bytes and ``os.stat`` result."""
+    try:
+        data = loads(raw)
+    except ValueError:
+        data = None
+    entry = extract_metadata(filename, raw, data if isinstance(data, dict) else None)
+    date = parse_date(entry["published"], filename)
+    row = {
+        "folder": folder_key,
+        "filename": filename,
+        "title": entry["title"],
+        "authors": json.dumps(entry["authors"]),
+        "published": entry["published"],
+        "year": date["year"],
+        "month": date["month"],
+        "day": date["day"],
+        "link": data.get("link") if isinstance(data, dict) else None,
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "sha256": entry["sha256"],
+        "error": entry["error"],
+        "body": zlib.compress(raw, 1),
+    }
+    facets, stages, fields = {}, [], {}
+    if isinstance(data, dict) and not entry["error"]:
+        stage_flags, step_flags = paper_flags(data)
+        if stage_flags:
+            stages = [(s, "") for s, done in stage_flags.items() if done]
+            stages += [column for column, done in step_flags.items() if done]
+            fields = {"filename": [filename[: -len(".json")]], **_workflow_fields(data)}
+        else:
+            facets = paper_facets(entry, data)
+            fields = document_fields(filename, data)
+    return row, facets, stages, fields
+
+
+class ImportProgress:
+    """Files stored so far by a background import."""
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.finished = False
+        self._changed = threading.Condition()
+
+    def advance(self, done):
+        with self._changed:
+            self.done = done
+            self._changed.notify_all()
+
+    def finish(self):
+        with self._changed:
+            self.finished = True
+            self._changed.notify_all()
+
+    def wait_started(self, timeout=None):
+        """Wait until the first chunk is stored or the import ended."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.done or self.finished, timeout)
+
+
+class Store:
+    """The SQLite database holding every imported folder."""
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self._generations = {}   # folder key -> watcher generation of the last sync
+        self._imports = {}       # folder key -> ImportProgress of a background import
+        self._value_ids = {}     # (table, name) -> id
+        self._failed = {}        # folder key -> files whose import raised, retried by the next sync
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._write_lock:
+            conn = self.connection()
+            if conn.execute("PRAGMA user_version").fetchone()[0] not in (0, STORE_VERSION):
+                conn.close()
+                self._local.conn = None
+                for suffix in ("", "-wal", "-shm"):
+                    if os.path.exists(self.path + suffix):
+                        os.remove(self.path + suffix)
+                conn = self.connection()
+            conn.executescript(_SCHEMA)
+            conn.execute(f"PRAGMA user_version = {STORE_VERSION}")
+
+    def connection(self):
+        """This thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.execute(f"PRAGMA cache_size = -{CACHE_KIB}")
+            conn.execute("PRAGMA temp_store = MEMORY")
+            self._local.conn = conn
+        return conn
+
+    def revision(self, key):
+        """Counter bumped by every import into folder ``key``, by any process."""
+        found = self.connection().execute("SELECT value FROM meta WHERE key = ?", ("revision:" + key,)).fetchone()
+        return found[0] if found else 0
+
+    @staticmethod
+    def _bump(conn, key):
+        conn.execute("INSERT INTO meta VALUES (?, 1) ON CONFLICT (key) DO UPDATE SET value = value + 1",
+                     ("revision:" + key,))
+
+    def _signatures(self, conn, key, names=None):
+        if names is None:
+            rows = conn.execute("SELECT filename, mtime_ns, size FROM papers WHERE folder = ?", (key,))
+            return {name: (mtime_ns, size) for name, mtime_ns, size in rows}
+        signatures = {}
+        for name in names:
+            found = conn.execute("SELECT mtime_ns, size FROM papers WHERE folder = ? AND filename = ?",
+                                 (key, name)).fetchone()
+            if found:
+                signatures[name] = found
+        return signatures
+
+    def importing(self, key):
+        """:class:`ImportProgress` of the background import into folder ``key`` still running, else ``None``."""
+        return self._imports.get(key)
+
+    @trace.traced("store.sync")
+    def sync(self, folder, background=False):
+        """Import new and changed files of ``folder``, delete removed ones; returns the number of updates.
+
+        With ``background``, an import of ``PROGRESSIVE_MIN`` files or more
+        returns once its first chunk is stored and goes on in a thread (see
+        :meth:`importing`); syncs of the folder are skipped until it ends.
+        """
+        key = folder_key(folder)
+        if key in self._imports:
+            return 0
+        with self._write_lock:
+            if key in self._imports:
+                return 0
+            generation, names = watch.changes(folder, self._generations.get(key))
+            if names is not None:
+                # A watched folder only reports changed files; failed ones are retried anyway
+                names = sorted(set(names) | self._failed.get(key, set()))
+            conn = self.connection()
+            stored = self._signatures(conn, key, names)
+            on_disk = {}
+            if names is None:
+                with os.scandir(folder) as it:
+                    for dirent in it:
+                        if dirent.name.endswith(".json") and not dirent.name.startswith("."):
+                            st = dirent.stat()
+                            on_disk[dirent.name] = (st.st_mtime_ns, st.st_size)
+            else:
+                for name in names:
+                    try:
+                        st = os.stat(os.path.join(folder, name))
+                    except FileNotFoundError:
+                        continue
+                    on_disk[name] = (st.st_mtime_ns, st.st_size)
+            changed = sorted(name for name, signature in on_disk.items() if stored.get(name) != signature)
+            removed = [name for name in stored if name not in on_disk]
+            self._failed.get(key, set()).difference_update(name for name in names or () if name not in on_disk)
+            updated = self._delete(conn, key, removed)
+            if not background or len(changed) < PROGRESSIVE_MIN:
+                updated += self._import(folder, key, changed)
+                self._generations[key] = generation
+                return updated
+            progress = self._imports[key] = ImportProgress(len(changed))
+
+        def run():
+            try:
+                self._import(folder, key, changed, progress)
+                with self._write_lock:
+                    self._generations[key] = generation
+            finally:
+                with self._write_lock:
+                    del self._imports[key]
+                progress.finish()
+
+        threading.Thread(target=run, name=f"corpus-import-{key}", daemon=True).start()
+        progress.wait_started()
+        return updated + progress.done
+
+    def _import(self, folder, key, names, progress=None):
+        """Store the files ``names`` of ``folder`` as their chunks are parsed; returns how many were stored."""
+        if not names:
+            return 0
+        conn = self.connection()
+        started = time.perf_counter()
+        timings, errors, pending = [], {}, []
+        raised = set()
+        imported = 0
+        for parsed in prepare_files(folder, names, prepare_row, key):
+            for item in parsed:
+                timings.append((item.seconds, item.name))
+                if item.error is not None:
+                    errors[item.name] = item.error
+                    raised.add(item.name)
+                    continue
+                pending.append(item.result)
+                trace.count("files_read")
+                trace.count("bytes_parsed", item.result[0]["size"])
+                if item.result[0]["error"]:
+                    errors[item.name] = item.result[0]["error"]
+            # The first chunk is stored right away, so a progressive import shows papers early
+            if len(pending) >= BATCH or (pending and not imported):
+                imported += self._write(conn, key, pending)
+                pending = []
+                if progress is not None:
+                    progress.advance(imported)
+        report = {
+            "files": len(names),
+            "imported": imported + len(pending),
+            "seconds": round(time.perf_counter() - started, 3),
+            "parse_seconds": round(sum(seconds for seconds, _ in timings), 3),
+            "workers": WORKERS if len(names) >= PARALLEL_MIN else 1,
+            "backend": BACKEND,
+            "slowest": [[name, round(seconds, 4)] for seconds, name in sorted(timings, reverse=True)[:SLOWEST]],
+            "errors": errors,
+        }
+        imported += self._write(conn, key, pending, report)
+        with self._write_lock:
+            failed = self._failed.setdefault(key, set())
+            failed.difference_update(names)
+            failed.update(raised)
+        if progress is not None:
+            progress.advance(imported)
+        return imported
+
+    def _write(self, conn, key, prepared, report=None):
+        """Upsert one batch of prepared files in a transaction, with the import ``report`` when it is the last."""
+        with self._write_lock:
+            try:
+                with conn:
+                    # Clear changed papers first: a delete on paper_text between inserts flushes FTS5's pending data
+                    existing = {}
+                    for row, *_ in prepared:
+                        found = conn.execute("SELECT id FROM papers WHERE folder = ? AND filename = ?",
+                                             (key, row["filename"])).fetchone()
+                        if found:
+                            existing[row["filename"]] = found[0]
+                            self._clear(conn, key, found[0])
+                    for row, facets, stages, fields in prepared:
+                        self._upsert(conn, existing.get(row["filename"]), row, facets, stages, fields)
+                    if report is not None:
+                        conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", ("import:" + key, json.dumps(report)))
+                    self._bump(conn, key)
+            except BaseException:
+                # Ids looked up in the rolled-back transaction may not exist
+                self._value_ids.clear()
+                raise
+        return len(prepared)
+
+    def _value_id(self, conn, table, name, columns="name"):
+        cache_key = (table, name)
+        value_id = self._value_ids.get(cache_key)
+        if value_id is None:
+            values = name if isinstance(name, tuple) else (name,)
+            where = " AND ".join(f"{c} = ?" for c in columns.split(", "))
+            conn.execute(f"INSERT OR IGNORE INTO {table} ({columns}) VALUES ({', '.join('?' * len(values))})", values)
+            value_id = conn.execute(f"SELECT id FROM {table} WHERE {where}", values).fetchone()[0]
+            self._value_ids[cache_key] = value_id
+        return value_id
+
+    def _upsert(self, conn, paper_id, row, facets, stages, fields):
+        """Write one prepared file; ``paper_id`` is its id when it was already stored (and cleared)."""
+        conn.execute(_UPSERT, row)
+        if paper_id is None:
+            paper_id = conn.execute("SELECT id FROM papers WHERE folder = ? AND filename = ?",
+                                    (row["folder"], row["filename"])).fetchone()[0]
+            conn.execute("INSERT INTO bodies VALUES (?, ?)", (paper_id, row["body"]))
+        else:
+            conn.execute("UPDATE bodies SET body = ? WHERE paper_id = ?", (row["body"], paper_id))
+        for facet, table in FACET_TABLES.items():
+            conn.executemany(f"INSERT OR IGNORE INTO paper_{table} VALUES (?, ?)",
+                             [(paper_id, self._value_id(conn, table, value)) for value in facets.get(facet, [])])
+        conn.executemany("INSERT OR IGNORE INTO paper_stages VALUES (?, ?)",
+                         [(paper_id, self._value_id(conn, "stages", stage, "stage, step")) for stage in stages])
+        # Rows in field id order, which is also the order _clear reads them back in
+        rows = sorted((self._value_id(conn, "field_names", field), field, "\n".join(texts))
+                      for field, texts in fields.items() if texts)
+        rows = [(field_id, field, text) for field_id, field, text in rows if field_id < FIELD_SLOTS]
+        conn.executemany("INSERT OR IGNORE INTO fields VALUES (?, ?)", [(row["folder"], f) for _, f, _ in rows])
+        conn.executemany("INSERT INTO paper_text (rowid, field, text) VALUES (?, ?, ?)",
+                         [(paper_id * FIELD_SLOTS + field_id, field, text) for field_id, field, text in rows])
+        if rows:
+            conn.execute("INSERT INTO paper_docs (rowid, text) VALUES (?, ?)",
+                         (self._doc_id(conn, row["folder"], paper_id), "\n".join(text for *_, text in rows)))
+
+    def _doc_id(self, conn, key, paper_id):
+        return self._value_id(conn, "folders", key) * DOC_SLOTS + paper_id
+
+    def _clear(self, conn, key, paper_id):
+        for table in (*FACET_TABLES.values(), "stages"):
+            conn.execute(f"DELETE FROM paper_{table} WHERE paper_id = ?", (paper_id,))
+        bounds = (paper_id * FIELD_SLOTS, (paper_id + 1) * FIELD_SLOTS)
+        texts = [text for text, in conn.execute(
+            "SELECT text FROM paper_text WHERE rowid >= ? AND rowid < ? ORDER BY rowid", bounds)]
+        if texts:
+            # A contentless table is given the deleted row's text to remove its tokens
+            conn.execute("INSERT INTO paper_docs (paper_docs, rowid, text) VALUES ('delete', ?, ?)",
+                         (self._doc_id(conn, key, paper_id), "\n".join(texts)))
+        conn.execute("DELETE FROM paper_text WHERE rowid >= ? AND rowid < ?", bounds)
+
+    def _delete(self, conn, key, names):
+        with conn:
+            for name in names:
+                found = conn.execute("SELECT id FROM papers WHERE folder = ? AND filename = ?", (key, name)).fetchone()
+                if found:
+                    self._clear(conn, key, found[0])
+                    conn.execute("DELETE FROM papers WHERE id = ?", found)
+            if names:
+                self._bump(conn, key)
+        return len(names)
+
+    def collection(self, folder):
+        return Collection(self, folder)
+
+
+def folder_key(folder):
+    """Name a folder's papers are stored under (its base name, like the other cache files)."""
+    return os.path.basename(os.path.normpath(folder))
+
+
+class Collection:
+    """Queries over the papers of one folder."""
+
+    def __init__(self, store, folder):
+        self.store = store
+        self.folder = folder
+        self.key = folder_key(folder)
+        self._memo = OrderedDict()
+        self._records = OrderedDict()  # filename -> (sha256, Paper)
+        self._lock = threading.Lock()
+
+    def _query(self, sql, params=()):
+        return self.store.connection().execute(sql, params)
+
+    def _memoized(self, key, compute):
+        """``compute()`` cached until the folder changes."""
+        version = self.store.revision(self.key)
+        with self._lock:
+            found = self._memo.get(key)
+            if found is not None and found[0] == version:
+                self._memo.move_to_end(key)
+                return found[1]
+        value = compute()
+        with self._lock:
+            self._memo[key] = (version, value)
+            while len(self._memo) > MEMO_SIZE:
+                self._memo.popitem(last=False)
+        return value
+
+    def __len__(self):
+        return self._memoized(("len",), lambda: self._query(
+            "SELECT count(*) FROM papers WHERE folder = ?", (self.key,)).fetchone()[0])
+
+    def __contains__(self, filename):
+        return filename is not None and self._query(
+            "SELECT 1 FROM papers WHERE folder = ? AND filename = ?", (self.key, filename)).fetchone() is not None
+
+    def importing(self):
+        """``(stored, total)`` files of a background import into this folder still running, else ``None``."""
+        progress = self.store.importing(self.key)
+        return None if progress is None else (progress.done, progress.total)
+
+    def import_report(self):
+        """Summary of the last import into this folder, or ``None``.
+
+        ``{"files", "imported", "seconds", "parse_seconds", "workers",
+        "backend", "slowest": [[filename, seconds], ...], "errors":
+        {filename: error}}``; times are in seconds.
+        """
+        def compute():
+            found = self._query("SELECT value FROM meta WHERE key = ?", ("import:" + self.key,)).fetchone()
+            return json.loads(found[0]) if found else None
+
+        return self._memoized(("import_report",), compute)
+
+    def errors(self):
+        """``{filename: error}`` of the files that are malformed or failed to import."""
+        def compute():
+            errors = dict(self._query("SELECT filename, error FROM papers WHERE folder = ? AND error IS NOT NULL",
+                                      (self.key,)))
+            # Files whose import raised are not stored, and are retried by the next sync
+            for name, error in ((self.import_report() or {}).get("errors") or {}).items():
+                if name not in errors and name not in self:
+                    errors[name] = error
+            return dict(sorted(errors.items()))
+
+        return self._memoized(("errors",), compute)
+
+    def filenames(self):
+        """Sorted filenames."""
+        return self._memoized(("filenames",), lambda: [name for name, in self._query(
+            "SELECT filename FROM papers WHERE folder = ? ORDER BY filename", (self.key,))])
+
+    def titles(self):
+        """``{filename: title}``."""
+        return self._memoized(("titles",), lambda: dict(self._query(
+            "SELECT filename, title FROM papers WHERE folder = ?", (self.key,))))
+
+    def hashes(self):
+        """``{filename: sha256}`` of the file contents."""
+        return self._memoized(("hashes",), lambda: dict(self._query(
+            "SELECT filename, sha256 FROM papers WHERE folder = ?", (self.key,))))
+
+    def paper_years(self):
+        """``{filename: year}``, ``None`` when unknown."""
+        return self._memoized(("paper_years",), lambda: dict(self._query(
+            "SELECT filename, year FROM papers WHERE folder = ?", (self.key,))))
+
+    def years(self, descending=True):
+        """Distinct known years."""
+        order = "DESC" if descending else "ASC"
+        return self._memoized(("years", descending), lambda: [year for year, in self._query(
+            f"SELECT DISTINCT year FROM papers WHERE folder = ? AND year IS NOT NULL ORDER BY year {order}",
+            (self.key,))])
+
+    def by_date(self, years=None, descending=True):
+        """Filenames published in ``years`` (default: all, undated included) ordered by date, newest first."""
+        order = "DESC" if descending else "ASC"
+        where, params = "folder = ?", [self.key]
+        if years is not None:
+            years = sorted(set(years))
+            where += f" AND year IN ({', '.join('?' * len(years))})"
+            params += years
+        sql = (f"SELECT filename FROM papers WHERE {where} ORDER BY coalesce(year, 0) {order}, "
+               f"coalesce(month, 0) {order}, coalesce(day, 0) {order}, filename {order}")
+        return self._memoized(("by_date", tuple(years or ()) if years is not None else None, descending),
+                              lambda: [name for name, in self._query(sql, params)])
+
+    def _filter(self, selections, match_all, skip=None):
+        """SQL condition on ``p`` and its parameters for ``{facet: [values]}`` selections."""
+        clauses, params = ["p.folder = ?"], [self.key]
+        for facet, values in selections.items():
+            if facet == skip or not values:
+                continue
+            values = list(dict.fromkeys(values))
+            marks = ", ".join("?" * len(values))
+            if facet == "year":
+                if match_all and len(values) > 1:
+                    clauses.append("0")  # a paper has one year
+                else:
+                    clauses.append(f"p.year IN ({marks})")
+                    params += values
+                continue
+            table = FACET_TABLES[facet]
+            sub = (f"SELECT x.paper_id FROM paper_{table} x JOIN {table} v ON v.id = x.value_id "
+                   f"WHERE v.name IN ({marks})")
+            params += values
+            if match_all and len(values) > 1:
+                sub += " GROUP BY x.paper_id HAVING count(*) = ?"
+                params.append(len(values))
+            clauses.append(f"p.id IN ({sub})")
+        return " AND ".join(clauses), params
+
+    @staticmethod
+    def _selection_key(selections):
+        return tuple(sorted((facet, tuple(values)) for facet, values in selections.items() if values))
+
+    @trace.traced("store.counts")
+    def counts(self, facet, selections, match_all=False):
+        """``{value: count}`` of ``facet`` among papers matching the other selected facets."""
+        def compute():
+            where, params = self._filter(selections, match_all, skip=None if match_all else facet)
+            if facet == "year":
+                sql = f"SELECT p.year, count(*) FROM papers p WHERE {where} AND p.year IS NOT NULL GROUP BY p.year"
+            else:
+                table = FACET_TABLES[facet]
+                sql = (f"SELECT v.name, count(*) FROM papers p JOIN paper_{table} x ON x.paper_id = p.id "
+                       f"JOIN {table} v ON v.id = x.value_id WHERE {where} GROUP BY v.id")
+            return dict(self._query(sql, params))
+
+        return self._memoized(("counts", facet, self._selection_key(selections), match_all), compute)
+
+    @trace.traced("store.match")
+    def match(self, selections, match_all=False):
+        """Sorted filenames of papers matching ``{facet: [values]}`` (any value, or all with ``match_all``)."""
+        def compute():
+            where, params = self._filter(selections, match_all)
+            return [name for name, in self._query(f"SELECT p.filename FROM papers p WHERE {where} ORDER BY 1", params)]
+
+        return self._memoized(("match", self._selection_key(selections), match_all), compute)
+
+    def facets(self, filename):
+        """``{facet: [value, ...]}`` of one paper (``year`` and the :data:`FACET_TABLES` facets)."""
+        found = self._query("SELECT id, year FROM papers WHERE folder = ? AND filename = ?",
+                            (self.key, filename)).fetchone()
+        if found is None:
+            raise KeyError(filename)
+        facets = {"year": [found[1]] if found[1] is not None else []}
+        for facet, table in FACET_TABLES.items():
+            facets[facet] = [name for name, in self._query(
+                f"SELECT v.name FROM paper_{table} x JOIN {table} v ON v.id = x.value_id WHERE x.paper_id = ? "
+                f"ORDER BY v.name", (found[0],))]
+        return facets
+
+    def fields(self):
+        """Searchable field names."""
+        return self._memoized(("fields",), lambda: [name for name, in self._query(
+            "SELECT name FROM fields WHERE folder = ? ORDER BY name", (self.key,))])
+
+    def parse_query(self, query):
+        """Split ``query`` into terms and inline ``field:term`` filters."""
+        return parse_query(query, self.fields())
+
+    def _match_clause(self, query, fields):
+        """FTS5 expression of ``query`` and the ids of the fields it is restricted to (``None``: all fields)."""
+        terms, inline_fields = self.parse_query(query)
+        selected = sorted(inline_fields | resolve_fields(fields or [], self.fields()))
+        expression = " OR ".join(f'"{term}"' for term in dict.fromkeys(terms))
+        field_ids = None
+        if selected:
+            field_ids = [field_id for field_id, in self._query(
+                f"SELECT id FROM field_names WHERE name IN ({', '.join('?' * len(selected))})", selected)]
+        return expression, field_ids
+
+    @staticmethod
+    def _field_filter(field_ids):
+        return f"paper_text.rowid % {FIELD_SLOTS} IN ({', '.join(map(str, field_ids))})"
+
+    def _doc_range(self):
+        found = self._query("SELECT id FROM folders WHERE name = ?", (self.key,)).fetchone()
+        start = (found[0] if found else 0) * DOC_SLOTS
+        return start, start + DOC_SLOTS
+
+    @trace.traced("store.search")
+    def search(self, query, fields=None, limit=50):
+        """Ranked ``[(filename, score), ...]`` of the best ``limit`` matches for ``query`` (``None``: all).
+
+        Papers are ranked by FTS5 BM25 over their whole text; ``fields``
+        restricts matching to those fields (or their last dotted component,
+        so ``tools`` means ``method.tools``), in addition to any inline
+        ``field:term`` filters in the query, and then scores are summed
+        over the matching fields. :meth:`matches` counts all matches.
+        """
+        def compute():
+            expression, field_ids = self._match_clause(query, fields)
+            if not expression or field_ids == []:
+                return []
+            if field_ids is None:
+                # Only the top rows leave FTS5, which scores just this folder's rowid range
+                sql = ("SELECT p.filename, -hit.rank FROM (SELECT rowid, rank FROM paper_docs "
+                       "WHERE paper_docs MATCH ? AND rowid >= ? AND rowid < ? ORDER BY rank LIMIT ?) hit "
+                       f"JOIN papers p ON p.id = hit.rowid % {DOC_SLOTS} ORDER BY hit.rank")
+                params = [expression, *self._doc_range(), -1 if limit is None else limit]
+            else:
+                # bm25() (the rank column) cannot be aggregated directly, so rank the field rows first
+                sql = (f"SELECT p.filename, -sum(hit.rank) AS score FROM "
+                       f"(SELECT rowid / {FIELD_SLOTS} AS paper_id, rank FROM paper_text "
+                       f"WHERE paper_text MATCH ? AND {self._field_filter(field_ids)}) hit "
+                       f"JOIN papers p ON p.id = hit.paper_id WHERE p.folder = ? GROUP BY p.id "
+                       f"ORDER BY score DESC LIMIT ?")
+                params = [expression, self.key, -1 if limit is None else limit]
+            return [(name, score) for name, score in self._query(sql, params)]
+
+        return self._memoized(("search", query, tuple(fields or ()), limit), compute)
+
+    @trace.traced("store.matches")
+    def matches(self, query, fields=None):
+        """Number of papers matching ``query``, of which :meth:`search` returns the best ones."""
+        def compute():
+            expression, field_ids = self._match_clause(query, fields)
+            if not expression or field_ids == []:
+                return 0
+            if field_ids is None:
+                return self._query("SELECT count(*) FROM paper_docs WHERE paper_docs MATCH ? AND rowid >= ? "
+                                   "AND rowid < ?", [expression, *self._doc_range()]).fetchone()[0]
+            sql = (f"SELECT count(*) FROM papers p WHERE p.folder = ? AND p.id IN "
+                   f"(SELECT rowid / {FIELD_SLOTS} FROM paper_text "
+                   f"WHERE paper_text MATCH ? AND {self._field_filter(field_ids)})")
+            return self._query(sql, [self.key, expression]).fetchone()[0]
+
+        return self._memoized(("matches", query, tuple(fields or ())), compute)
+
+    @trace.traced("store.snippet")
+    def snippet(self, filename, query, fields=None, tokens=24):
+        """Best matching passage of ``filename`` with query terms in bold, and its field."""
+        def compute():
+            expression, field_ids = self._match_clause(query, fields)
+            found = self._query("SELECT id FROM papers WHERE folder = ? AND filename = ?",
+                                (self.key, filename)).fetchone()
+            if not expression or not found or field_ids == []:
+                return "", ""
+            where = "" if field_ids is None else " AND " + self._field_filter(field_ids)
+            sql = (f"SELECT field, snippet(paper_text, 1, '**', '**', '…', {tokens}) FROM paper_text "
+                   f"WHERE paper_text MATCH ? AND rowid >= ? AND rowid < ?{where} ORDER BY rank LIMIT 1")
+            start = found[0] * FIELD_SLOTS
+            best = self._query(sql, [expression, start, start + FIELD_SLOTS]).fetchone()
+            if best is None:
+                return "", ""
+            field, text = best
+            return " ".join(text.split()), field
+
+        return self._memoized(("snippet", filename, query, tuple(fields or ()), tokens), compute)
+
+    def paper(self, filename):
+        """Parsed JSON body of ``filename``; raises ``KeyError`` when it is not in the store."""
+        found = self._query("SELECT b.body FROM papers p JOIN bodies b ON b.paper_id = p.id "
+                            "WHERE p.folder = ? AND p.filename = ?", (self.key, filename)).fetchone()
+        if found is None:
+            raise KeyError(filename)
+        return loads(zlib.decompress(found[0]))
+
+    @trace.traced("store.record")
+    def record(self, filename):
+        """Normalized :class:`corpus.model.Paper` of ``filename``; recently used ones are kept."""
+        found = self._query("SELECT sha256 FROM papers WHERE folder = ? AND filename = ?",
+                            (self.key, filename)).fetchone()
+        if found is None:
+            raise KeyError(filename)
+        with self._lock:
+            cached = self._records.get(filename)
+            if cached is not None and cached[0] == found[0]:
+                self._records.move_to_end(filename)
+                return cached[1]
+        paper = normalize_paper(self.paper(filename), found[0])
+        with self._lock:
+            self._records[filename] = (found[0], paper)
+            while len(self._records) > RECORD_CACHE:
+                self._records.popitem(last=False)
+        return paper
+
+
+_stores = {}
+_collections = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path=STORE_PATH):
+    """The shared :class:`Store` at ``path``."""
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = Store(path)
+        return _stores[path]
+
+
+def get_collection(folder):
+    """The shared, freshly synced :class:`Collection` of ``folder``.
+
+    A large import goes on in the background after its first chunk (see
+    :meth:`Collection.importing`).
+    """
+    store = get_store()
+    key = os.path.abspath(folder)
+    with _stores_lock:
+        if key not in _collections:
+            _collections[key] = store.collection(folder)
+        collection = _collections[key]
+    store.sync(folder, background=True)
+    return collection
@@ -0,0 +1,238 @@
+"""Lightweight tracing of the hot paths.
+
+Tracing is off unless ``CORPUS_TRACE=1`` is set (or :func:`enable` is
+called). While it is off, :func:`span` returns a shared no-op context manager
+and :func:`count` returns at once, so instrumented code costs one global
+lookup per call. While it is on, the following are recorded:
+
+* named spans (directory scans, JSON parses, index refreshes, rendering, page
+  sections), with their duration and nesting depth;
+* counters such as ``files_read``, ``bytes_parsed`` and LLM tokens;
+* process-wide totals per span and counter.
+
+A page brackets its script with :func:`begin_run` and :func:`end_run` (the
+debug panel in :mod:`components.trace_panel` ends the run and shows it).
+Every finished rerun is appended to ``CACHE_DIR/trace.jsonl``. The process
+totals are rewritten to ``CACHE_DIR/trace.prom`` in the Prometheus text
+format, so a textfile collector can scrape them.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+
+from corpus.config import CACHE_DIR, TRACE
+
+TRACE_PATH = os.path.join(CACHE_DIR, "trace.jsonl")
+PROM_PATH = os.path.join(CACHE_DIR, "trace.prom")
+
+_enabled = TRACE
+_local = threading.local()
+_lock = threading.Lock()
+_spans = {}            # name -> [calls, total seconds, max seconds]
+_counters = Counter()
+_reruns = Counter()    # page -> finished reruns
+_recent = deque(maxlen=50)
+
+
+def enabled():
+    return _enabled
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+
+class _Noop:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _Noop()
+
+
+class _Run:
+    """Spans and counters of one page rerun."""
+
+    def __init__(self, page):
+        self.page = page
+        self.started = time.perf_counter()
+        self.spans = []        # (name, start offset, seconds, depth)
+        self.counters = Counter()
+        self.depth = 0
+
+
+def _record(name, started, elapsed, depth, run):
+    with _lock:
+        totals = _spans.get(name)
+        if totals is None:
+            _spans[name] = [1, elapsed, elapsed]
+        else:
+            totals[0] += 1
+            totals[1] += elapsed
+            totals[2] = max(totals[2], elapsed)
+    if run is not None:
+        run.spans.append((name, started - run.started, elapsed, depth))
+
+
+class _Span:
+    __slots__ = ("name", "started", "depth", "run")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.run = getattr(_local, "run", None)
+        self.depth = self.run.depth if self.run is not None else 0
+        if self.run is not None:
+            self.run.depth += 1
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        if self.run is not None:
+            self.run.depth -= 1
+        _record(self.name, self.started, elapsed, self.depth, self.run)
+        return False
+
+
+def span(name):
+    """Context manager timing the enclosed block as ``name``."""
+    if not _enabled:
+        return _NOOP
+    return _Span(name)
+
+
+def traced(name=None):
+    """Decorator timing every call of a function as a span (default: its qualified name)."""
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(label):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def count(name, n=1):
+    """Add ``n`` to counter ``name``."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] += n
+    run = getattr(_local, "run", None)
+    if run is not None:
+        run.counters[name] += n
+
+
+def llm(model, seconds, prompt_tokens=None, completion_tokens=None):
+    """Account one LLM request: its latency as an ``llm.request`` span, plus request and token counters."""
+    if not _enabled:
+        return
+    now = time.perf_counter()
+    _record("llm.request", now - seconds, seconds, 0, getattr(_local, "run", None))
+    count("llm.requests")
+    count(f"llm.requests.{model}")
+    if prompt_tokens:
+        count("llm.prompt_tokens", prompt_tokens)
+    if completion_tokens:
+        count("llm.completion_tokens", completion_tokens)
+
+
+def begin_run(page):
+    """Start collecting the spans of one rerun of ``page`` in this thread."""
+    _local.run = _Run(page) if _enabled else None
+
+
+def end_run():
+    """Finish the current rerun; returns its summary dict, or ``None`` when not tracing.
+
+    The summary is kept in memory (:func:`recent_runs`) and appended to
+    ``TRACE_PATH``, and the totals are written to ``PROM_PATH``.
+    """
+    run = getattr(_local, "run", None)
+    _local.run = None
+    if run is None:
+        return None
+    summary = {
+        "time": time.time(),
+        "page": run.page,
+        "seconds": time.perf_counter() - run.started,
+        "spans": [{"name": n, "start": s, "seconds": d, "depth": depth} for n, s, d, depth in run.spans],
+        "counters": dict(run.counters),
+    }
+    with _lock:
+        _reruns[run.page] += 1
+        _recent.append(summary)
+        text = _prometheus_text()
+    try:
+        os.makedirs(os.path.dirname(TRACE_PATH) or ".", exist_ok=True)
+        with open(TRACE_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(summary) + "\n")
+        tmp = PROM_PATH + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, PROM_PATH)
+    except OSError:
+        pass
+    return summary
+
+
+def recent_runs():
+    with _lock:
+        return list(_recent)
+
+
+def totals():
+    """``{"spans": {name: {"calls", "seconds", "max"}}, "counters": {...}}`` for this process."""
+    with _lock:
+        return {
+            "spans": {n: {"calls": c, "seconds": t, "max": m} for n, (c, t, m) in sorted(_spans.items())},
+            "counters": dict(sorted(_counters.items())),
+        }
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prometheus_text():
+    lines = [
+        "# HELP corpus_span_seconds_total Time spent in each traced span.",
+        "# TYPE corpus_span_seconds_total counter",
+    ]
+    lines += [f'corpus_span_seconds_total{{span="{_label(n)}"}} {t:.6f}' for n, (_, t, _) in sorted(_spans.items())]
+    lines += ["# HELP corpus_span_calls_total Completed calls of each traced span.",
+              "# TYPE corpus_span_calls_total counter"]
+    lines += [f'corpus_span_calls_total{{span="{_label(n)}"}} {c}' for n, (c, _, _) in sorted(_spans.items())]
+    lines += ["# HELP corpus_span_seconds_max Longest call of each traced span.",
+              "# TYPE corpus_span_seconds_max gauge"]
+    lines += [f'corpus_span_seconds_max{{span="{_label(n)}"}} {m:.6f}' for n, (_, _, m) in sorted(_spans.items())]
+    lines += ["# HELP corpus_events_total Traced counters (files read, bytes parsed, LLM tokens, ...).",
+              "# TYPE corpus_events_total counter"]
+    lines += [f'corpus_events_total{{name="{_label(n)}"}} {v}' for n, v in sorted(_counters.items())]
+    lines += ["# HELP corpus_reruns_total Traced page reruns.", "# TYPE corpus_reruns_total counter"]
+    lines += [f'corpus_reruns_total{{page="{_label(p)}"}} {v}' for p, v in sorted(_reruns.items())]
+    return "\n".join(lines) + "\n"
+
+
+def prometheus_text():
+    """Process totals in the Prometheus text exposition format."""
+    with _lock:
+        return _prometheus_text()
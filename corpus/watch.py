@@ -0,0 +1,290 @@
+"""Filesystem watcher that turns folder changes into incremental refreshes.
+
+Without a watcher, every ``get_*`` accessor rescans its folder on each rerun,
+which stats every file. With one, a background thread per folder collects the
+names of created, modified, moved and deleted ``*.json`` files, and an index
+refresh only looks at the names that changed since its last refresh (usually
+none). A new paper is then parsed and inserted once per index, whatever the
+corpus size.
+
+The watcher uses inotify (through ``ctypes``, Linux only) and falls back to
+polling the folder every ``POLL_INTERVAL`` seconds elsewhere, or when
+``CORPUS_WATCH=poll``. ``CORPUS_WATCH=off`` disables it, which brings back the
+full rescan on every access.
+
+Partially written files are debounced. With inotify, a file settles
+``DEBOUNCE`` seconds after it is closed or moved into place. A file that is
+still open for writing settles ``WRITE_TIMEOUT`` seconds after its last
+write. When polling, a file settles once its size and mtime stop changing.
+If the kernel queue overflows, or the folder itself is moved or deleted,
+consumers are told to do one full rescan.
+
+Each settled batch bumps the watcher's ``generation``. Consumers remember the
+generation they last refreshed at and ask :func:`changes` what happened since.
+Rewriting a whole sidecar after every new paper would be O(corpus) again, so
+indexes hand their ``_save`` to :func:`persist`. The watcher thread then writes
+it once the folder has been quiet for ``SAVE_DELAY`` seconds, and at exit.
+"""
+
+import atexit
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from collections import deque
+
+from corpus.config import WATCH
+
+DEBOUNCE = 0.5
+WRITE_TIMEOUT = 10.0
+POLL_INTERVAL = 2.0
+SAVE_DELAY = 5.0
+LOG_SIZE = 100000
+
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+_WRITING = IN_CREATE | IN_MODIFY
+_SETTLING = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+_LOST = IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+def _is_paper(name):
+    return name.endswith(".json") and not name.startswith(".")
+
+
+def _scan(folder):
+    signatures = {}
+    try:
+        with os.scandir(folder) as it:
+            for dirent in it:
+                if _is_paper(dirent.name):
+                    try:
+                        st = dirent.stat()
+                    except FileNotFoundError:
+                        continue
+                    signatures[dirent.name] = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        pass
+    return signatures
+
+
+class _Inotify:
+    """Non-blocking inotify descriptor watching one directory."""
+
+    def __init__(self, folder):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = _WRITING | _SETTLING | IN_DELETE_SELF | IN_MOVE_SELF
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {folder}")
+
+    def read(self, timeout):
+        """``[(mask, filename), ...]`` received within ``timeout`` seconds."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            _, mask, _, length = _EVENT.unpack_from(data, offset)
+            start = offset + _EVENT.size
+            events.append((mask, os.fsdecode(data[start:start + length].rstrip(b"\0"))))
+            offset = start + length
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class Watcher:
+    """Background thread recording which paper files of ``folder`` changed."""
+
+    def __init__(self, folder, backend="auto"):
+        self.folder = folder
+        self.generation = 0
+        self._log = deque()          # (generation, filename), oldest first
+        self._full = 0               # consumers older than this must rescan
+        self._pending = {}           # filename -> time it settles (watcher thread only)
+        self._saves = {}             # save callable -> (lock, due time)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._inotify = None
+        self._signatures = None
+        if backend in ("auto", "inotify"):
+            try:
+                self._inotify = _Inotify(folder)
+            except (OSError, AttributeError):
+                if backend == "inotify":
+                    raise
+        if self._inotify is None:
+            self._signatures = _scan(folder)
+        self.backend = "inotify" if self._inotify is not None else "poll"
+        self._thread = threading.Thread(
+            target=self._run, name=f"corpus-watch:{os.path.basename(os.path.normpath(folder))}", daemon=True,
+        )
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            now = time.monotonic()
+            wakeups = list(self._pending.values())
+            with self._lock:
+                wakeups += [due for _, due in self._saves.values()]
+            timeout = min([max(due - now, 0.0) for due in wakeups] + [1.0])
+            if self._inotify is not None:
+                self._read_events(timeout)
+            elif not self._stop.wait(min(timeout, POLL_INTERVAL) if self._pending else POLL_INTERVAL):
+                self._poll()
+            self._settle()
+            self._run_saves()
+        if self._inotify is not None:
+            self._inotify.close()
+
+    def _read_events(self, timeout):
+        events = self._inotify.read(timeout)
+        now = time.monotonic()
+        for mask, name in events:
+            if mask & IN_Q_OVERFLOW:
+                self._invalidate()
+            elif mask & _LOST:
+                # The folder was moved or deleted: poll it from now on
+                self._inotify.close()
+                self._inotify, self._signatures, self.backend = None, _scan(self.folder), "poll"
+                self._invalidate()
+                return
+            elif _is_paper(name):
+                self._pending[name] = now + (DEBOUNCE if mask & _SETTLING else WRITE_TIMEOUT)
+
+    def _poll(self):
+        signatures = _scan(self.folder)
+        now = time.monotonic()
+        for name in signatures.keys() ^ self._signatures.keys():
+            self._pending[name] = now + DEBOUNCE
+        for name, signature in signatures.items():
+            if self._signatures.get(name, signature) != signature:
+                self._pending[name] = now + DEBOUNCE
+        self._signatures = signatures
+
+    def _settle(self):
+        now = time.monotonic()
+        settled = [name for name, due in self._pending.items() if due <= now]
+        if not settled:
+            return
+        for name in settled:
+            del self._pending[name]
+        with self._lock:
+            self.generation += 1
+            self._log.extend((self.generation, name) for name in settled)
+            while len(self._log) > LOG_SIZE:
+                self._full = max(self._full, self._log.popleft()[0])
+
+    def _invalidate(self):
+        self._pending.clear()
+        with self._lock:
+            self.generation += 1
+            self._full = self.generation
+            self._log.clear()
+
+    def _run_saves(self, force=False):
+        now = time.monotonic()
+        with self._lock:
+            due = [(save, lock) for save, (lock, at) in self._saves.items() if force or at <= now]
+            for save, _ in due:
+                del self._saves[save]
+        for save, lock in due:
+            with lock:
+                save()
+
+    def changes(self, since):
+        """``(generation, filenames)`` changed after generation ``since``.
+
+        ``filenames`` is ``None`` when the consumer has to rescan the whole
+        folder: on its first refresh (``since`` is ``None``), after a queue
+        overflow, or when the change log was trimmed past ``since``.
+        """
+        with self._lock:
+            if since is None or since < self._full:
+                return self.generation, None
+            names = set()
+            for generation, name in reversed(self._log):
+                if generation <= since:
+                    break
+                names.add(name)
+            return self.generation, names
+
+    def defer(self, lock, save):
+        """Call ``save()`` under ``lock`` from the watcher thread once changes quiet down."""
+        with self._lock:
+            self._saves.setdefault(save, (lock, time.monotonic() + SAVE_DELAY))
+
+    def flush(self):
+        """Run every deferred save now."""
+        self._run_saves(force=True)
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def get_watcher(folder):
+    """The running :class:`Watcher` of ``folder``, started on first use; ``None`` when watching is off."""
+    if WATCH == "off":
+        return None
+    key = os.path.abspath(folder)
+    with _watchers_lock:
+        if key not in _watchers:
+            _watchers[key] = Watcher(folder, WATCH) if os.path.isdir(folder) else None
+        return _watchers[key]
+
+
+def changes(folder, since):
+    """:meth:`Watcher.changes` for ``folder``; ``(None, None)`` (rescan) when it is not watched."""
+    watcher = get_watcher(folder)
+    if watcher is None:
+        return None, None
+    return watcher.changes(since)
+
+
+def persist(folder, lock, save, incremental):
+    """Persist an index: at once after a full rescan, deferred after an incremental refresh.
+
+    Call it while holding ``lock``; deferred saves take it again themselves.
+    """
+    watcher = get_watcher(folder) if incremental else None
+    if watcher is None:
+        save()
+    else:
+        watcher.defer(lock, save)
+
+
+@atexit.register
+def _flush_all():
+    with _watchers_lock:
+        watchers = [w for w in _watchers.values() if w is not None]
+    for watcher in watchers:
+        watcher.flush()
@@ -1,14 +1,46 @@
-import os
-import json
-import re
 import streamlit as st
-from openai import OpenAI
-from dateutil import parser
+
+from components.import_status import import_status
+from components.paper_list import paper_picker, set_selection
+from components.trace_panel import trace_panel
+from corpus import EXHYTE_DIR, get_collection, get_similarity_index, trace
+from survey import (
+    DELTA_PROMPT_TEMPLATE,
+    DIGEST_MODEL,
+    DIGEST_PROMPT_TEMPLATE,
+    MAX_TOKENS,
+    MODEL,
+    REDUCE_MAX_TOKENS,
+    REDUCE_MODEL,
+    REDUCE_PROMPT_TEMPLATE,
+    SECTION_HEADINGS,
+    STAGE_MAX_TOKENS,
+    STAGE_PROMPT_TEMPLATE,
+    SURVEY_PROMPT_TEMPLATE,
+    SYSTEM_PROMPT,
+    TEMPERATURE,
+    SectionSplitter,
+    StreamMetrics,
+    astream_completion,
+    build_messages,
+    compaction_report,
+    build_missing,
+    count_tokens,
+    digest_content,
+    find_base,
+    generate_survey,
+    get_digest_store,
+    get_response_cache,
+    get_scheduler,
+    make_key,
+    revise_survey,
+)
 
 # --------------------------
 # Configuration
 # --------------------------
-JSON_FOLDER = "exhyte_data"
+JSON_FOLDER = EXHYTE_DIR
+trace.begin_run("survey_exhyte")
 st.set_page_config(page_title="Scientific Survey Generator", layout="wide")
 
 # Sidebar: OpenAI API key input
@@ -23,8 +55,29 @@ if not openai_api_key:
     st.sidebar.warning("Please enter your OpenAI API key to generate surveys.")
     st.stop()
 
-# Initialize OpenAI client
-client = OpenAI(api_key=openai_api_key)
+# Requests of every session go through one scheduler (shared connections, queue, rate budgets)
+scheduler = get_scheduler()
+
+
+def queue_note(flight):
+    """Queue position and ETA of ``flight`` while none of its requests is running, else ``""``."""
+    if flight.running or not flight.position:
+        return ""
+    eta = flight.eta
+    return f"🚦 Queued: #{flight.position} in line" + (f", about {eta:.0f}s." if eta is not None else ".")
+
+
+def follow_sections(flight, status, note):
+    """Render the ``(heading, text)`` sections ``flight`` emits as they complete; returns its result."""
+    placeholders = {heading: st.empty() for heading in SECTION_HEADINGS}
+    for heading, placeholder in placeholders.items():
+        placeholder.markdown(f"**{heading}**  \n⏳ _Writing..._")
+    for events in flight.follow():
+        for heading, text in events:
+            placeholders[heading].markdown(f"**{heading}**  \n{text}")
+        status.caption(queue_note(flight) or note)
+    return flight.result()
+
 # --------------------------
 # Streamlit UI
 # --------------------------
@@ -36,46 +89,21 @@ st.write("Generate a structured, scientific-style survey from selected JSON pape
 st.sidebar.header("📂 Select Papers for Survey")
 
 # --------------------------
-# Load JSON files and extract titles + year
+# Titles and dates from the SQLite store (paper bodies load on demand)
 # --------------------------
-available_files = [f for f in os.listdir(JSON_FOLDER) if f.endswith(".json")]
+papers = get_collection(JSON_FOLDER)
+import_status(papers)
 
-if not available_files:
+if not len(papers):
     st.sidebar.warning(f"No JSON files found in '{JSON_FOLDER}' folder.")
     st.stop()
 
-paper_titles = {}  # title -> filename
-paper_years = {}   # title -> year
-
-for file_name in available_files:
-    file_path = os.path.join(JSON_FOLDER, file_name)
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        title = data.get("paper_title", file_name.replace(".json", ""))
-        paper_titles[title] = file_name
-
-        # Extract year robustly
-        published_raw = data.get("published", "")
-        year = None
-        try:
-            dt = parser.parse(published_raw, fuzzy=True, default=None)
-            if dt:
-                year = dt.year
-        except Exception:
-            match = re.search(r"(\d{4})", published_raw)
-            if match:
-                year = int(match.group(1))
-
-        paper_years[title] = year
-    except Exception:
-        paper_titles[file_name.replace(".json", "")] = file_name
-        paper_years[file_name.replace(".json", "")] = None
+file_titles = papers.titles()  # filename -> title
 
 # --------------------------
 # Sidebar: Year filter
 # --------------------------
-available_years = sorted({y for y in paper_years.values() if y is not None}, reverse=True)
+available_years = papers.years()
 selected_years = st.sidebar.multiselect(
     "Filter papers by publication year:",
     options=available_years,
@@ -83,171 +111,296 @@ selected_years = st.sidebar.multiselect(
 )
 
 # --------------------------
-# Filter paper titles by selected years
+# Filter papers by selected years, newest first
 # --------------------------
-filtered_titles = [
-    title for title, year in paper_years.items()
-    if year in selected_years
-]
+filtered_files = papers.by_date(selected_years)
 
 # --------------------------
-# Paper selection
+# Paper selection (one page of checkboxes; the selection survives paging and filtering)
 # --------------------------
-selected_titles = st.sidebar.multiselect(
-    "Choose one or more papers:",
-    options=filtered_titles,
-    default=filtered_titles[:2] if filtered_titles else []
+MAX_CLUSTER_PAPERS = 12
+
+
+def select_cluster(seed, candidates):
+    """Replace the selection with the most central papers of a similarity cluster."""
+    cluster, coherence = get_similarity_index(JSON_FOLDER).cluster(seed, candidates, limit=MAX_CLUSTER_PAPERS)
+    set_selection("survey_papers", cluster)
+    st.session_state["survey_cluster_note"] = (
+        f"🧲 Selected {len(cluster)} related papers (coherence {coherence:.2f})"
+        + (" around the first selected paper." if seed else ".")
+    )
+
+
+with st.sidebar, trace.span("page.paper_picker"):
+    st.markdown("**Choose one or more papers:**")
+    current = st.session_state.get("survey_papers_selected") or []
+    st.button(
+        "🧲 Auto-select a coherent cluster", on_click=select_cluster,
+        args=(current[0] if current else None, filtered_files),
+        help="Selects papers similar to the first selected one (or the tightest group of papers) "
+             "among those shown, using a local text-similarity index.",
+    )
+    if st.session_state.get("survey_cluster_note"):
+        st.caption(st.session_state.pop("survey_cluster_note"))
+    # Papers deleted since they were picked drop out of the selection
+    picked = st.session_state.get("survey_papers_selected", [])
+    if any(name not in papers for name in picked):
+        set_selection("survey_papers", [name for name in picked if name in papers])
+    selected_names = paper_picker(
+        filtered_files, "survey_papers", format_func=file_titles.get, default=filtered_files[:2]
+    )
+
+stream_output = st.sidebar.checkbox(
+    "Stream output", value=True, help="Render each section as it is generated."
+)
+generation_mode = st.sidebar.radio(
+    "Generation mode:",
+    ["Single request", "Parallel per stage"],
+    help="Parallel writes each stage section with its own concurrent request.",
+)
+incremental = st.sidebar.checkbox(
+    "Revise the closest stored survey", value=True,
+    help="When a survey stored with the same generation mode and prompt payload covers most of the "
+         "selected papers, only its stage sections that added papers contribute to are rewritten, and "
+         "removed papers' citations are stripped locally.",
+)
+prompt_format = st.sidebar.radio(
+    "Prompt payload:",
+    ["Compact", "Digests", "Full JSON"],
+    help="Compact sends only the performed stages as dense stage-ordered text; "
+         "Digests sends a stored per-stage summary of each paper, built once per paper.",
 )
 
-# --- Define the survey prompt template ---
-# survey_prompt_template = """
-# You are a scientific writer tasked with summarizing multiple LLM-guided workflow papers from structured JSON files.
-# Each JSON file contains information about a workflow, including:
-
-# - Inputs to the Workflow: describe user inputs and research context.
-# - E1:Query Structuring- explain how raw queries or tasks are transformed into structured forms.
-# - E2:Data Retrieval- summarize how relevant data and literature are collected.
-# - E3:Knowledge Assembly- explain how structured knowledge is extracted and represented.
-# - H1:Hypothesis/Idea Generation- describe how systems synthesize hypotheses or ideas.
-# - H2:Hypothesis or Idea Prioritization- outline how hypotheses are evaluated or ranked.
-# - T1:Experimental Design Generation - describe how experiment are designed and executed to test generated ideas or hypotheses.
-# - T2:Iterative refinement: Refinement describe feedback and continuous improvement mechanisms.
-# - Publication details: paper title, authors, publication date, link
-
-# Your task is to generate a *survey-style, scientific-article summary* comparing the workflows in terms of these stages.
-
-# Follow these rules: I found that survey often time do not include all stages in the workflow. 
-# Please make sure it includes all. Even if it has only one papper in one json avalilable. 
-# Also make sure paragraph always start with a bold face. 
-# 1. Keep the stage definitions explicitly in the text (Inputs, Query Structuring, Data Retrieval, Hypothesis/Idea Generation, Iterative Refinement, Conclusion).
-# 2. Integrate information from all JSON files provided.
-# 3. Use formal scientific language, in full paragraphs (no bullet points).
-# 4. Cite the papers within the paragraph using the authors and year from the JSON files.
-# 5. Do not include any information beyond the JSON files.
-# 6. End with a References section listing all papers with title, authors, publication date, and link.
-
-# Input:
-# Below are the JSON workflow descriptions:
-
-# Output:
-# A multi-paragraph, stage-preserving scientific survey comparing the workflows, with in-text citations and a reference list.
-# """
-
-survey_prompt_template = """
-You are a scientific writer tasked with summarizing multiple LLM-guided workflow papers based on structured JSON files.
-
-Each JSON file contains information about a discovery workflow with the following standardized sections:
-1. Inputs to the Workflow
-2. E1: Query Structuring
-3. E2: Data Retrieval
-4. E3: Knowledge Assembly
-5. H1: Hypothesis/Idea Generation
-6. H2: Hypothesis or Idea Prioritization
-7. T1: Experimental Design Generation
-8. T2: Iterative Refinement
-9. Publication Details (title, authors, publication date, and link)
-
----
-
-### OBJECTIVE
-Generate a *scientific survey-style summary* that compares and synthesizes the workflows from all provided JSON files.
-
----
-
-### OUTPUT REQUIREMENTS
-Your output **must follow the exact same section order and headings** as the input schema, formatted as follows:
-
-**Inputs to the Workflow**  
-[Write one or more formal paragraphs integrating all JSONs that describe what users provided — goals, datasets, research context, or formal specifications. Cite papers using author and year.]
-
-**E1: Query Structuring**  
-[Summarize how queries or tasks were structured, reformulated, or decomposed. Cite all relevant papers.]
-
-**E2: Data Retrieval**  
-[Describe how relevant data, literature, or other sources were gathered or filtered. Cite all relevant papers.]
-
-**E3: Knowledge Assembly**  
-[Explain how structured knowledge was constructed, encoded, or represented. Cite all relevant papers.]
-
-**H1: Hypothesis/Idea Generation**  
-[Describe how the systems generated hypotheses or ideas, including tools or reasoning strategies. Cite all relevant papers.]
-
-**H2: Hypothesis or Idea Prioritization**  
-[Describe how hypotheses were ranked, filtered, or evaluated. Cite all relevant papers.]
-
-**T1: Experimental Design Generation**  
-[Summarize how experiments were planned or designed to test generated hypotheses. Cite all relevant papers.]
-
-**T2: Iterative Refinement**  
-[Describe any feedback loops or iterative improvement mechanisms used in the workflow. Cite all relevant papers.]
-
-**Conclusion**  
-[Provide an integrative summary comparing how the workflows collectively advance automated scientific discovery.]
-
-**References**  
-[List all papers, formatted as: Authors (Year). Title. Publication Date. Link.]
-
----
-
-### ADDITIONAL RULES
-1. Every section heading (Inputs to the Workflow, E1, E2, etc.) **must appear in the output** — even if only one paper contributes.
-2. Each paragraph **must begin with a bolded heading**, as shown above.
-3. Use **formal academic writing** — complete sentences, no bullet points.
-4. Only use information contained in the JSON files.
-5. Ensure in-text citations follow the form *(Author et al., Year)*.
-6. Always include a final **References** section with full paper metadata.
-
----
-
-### INPUT
-Below are the JSON workflow descriptions:
-
-### OUTPUT
-A structured, stage-preserving, multi-paragraph scientific survey comparing the workflows, formatted according to the stage order above.
-"""
-
+# --------------------------
+# Prompt size of the selection
+# --------------------------
+file_hashes = papers.hashes()  # filename -> sha256
+selected_names = [name for name in selected_names if name in file_hashes]
+selected_files = {name: file_hashes[name] for name in selected_names}
+json_objects = [papers.paper(file_name) for file_name in selected_names]
+digest_store = get_digest_store()
+missing_digests = digest_store.missing(selected_files, DIGEST_MODEL)
+report = None
+if json_objects:
+    reserved, _ = count_tokens(SYSTEM_PROMPT + SURVEY_PROMPT_TEMPLATE)
+    with trace.span("survey.compaction"):
+        report = compaction_report(json_objects, selected_names, reserved=reserved)
+    approx = "" if report["exact"] else "≈"
+    st.sidebar.caption(
+        f"📏 Input: {approx}{report['tokens'] + reserved:,} tokens compact vs "
+        f"{approx}{report['json_tokens'] + reserved:,} as JSON ({report['saved_pct']:.0f}% saved)."
+        + (f" Dropped {', '.join(report['dropped'])} to fit the context window." if report["dropped"] else "")
+    )
+    if missing_digests:
+        st.sidebar.caption(f"🧾 {len(missing_digests)} of {len(selected_names)} papers have no digest yet.")
+    else:
+        digest_tokens, _ = count_tokens(digest_content(
+            json_objects, selected_names, [digest_store.get(selected_files[n], DIGEST_MODEL) for n in selected_names]
+        ))
+        st.sidebar.caption(f"🧾 Digests: {approx}{digest_tokens + reserved:,} tokens.")
 
 # --------------------------
 # Generate Survey
 # --------------------------
-if st.sidebar.button("🚀 Generate Survey Summary"):
-    if not selected_titles:
+if st.sidebar.button("🚀 Generate Survey Summary", key="generate"):
+    if not selected_names:
         st.warning("Please select at least one paper.")
         st.stop()
 
     try:
-        json_objects = []
-        for title in selected_titles:
-            file_name = paper_titles[title]
-            file_path = os.path.join(JSON_FOLDER, file_name)
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            json_objects.append(data)
-
-        user_content = f"Here are {len(json_objects)} JSON files representing selected papers:\n" + "\n\n".join(
-            json.dumps(obj, indent=2) for obj in json_objects
-        )
-
-        messages = [
-            {"role": "system", "content": "You are a helpful assistant for writing scientific surveys."},
-            {"role": "user", "content": survey_prompt_template + "\n\n" + user_content},
-        ]
-
-        with st.spinner("Generating survey summary... this may take a minute ⏳"):
-            response = client.chat.completions.create(
-                model="gpt-4.1",
-                messages=messages,
-                temperature=0.1,
-                max_tokens=12000,
+        response_cache = get_response_cache()
+        response_cache.invalidate(file_hashes)
+        compact = prompt_format == "Compact"
+        use_digests = prompt_format == "Digests"
+        parallel = generation_mode == "Parallel per stage"
+        payload = {"Compact": "compact", "Digests": "digest", "Full JSON": "json"}[prompt_format]
+        # Only a survey generated the same way is revised into this one
+        variant = {"mode": "map-reduce" if parallel else "single", "model": MODEL,
+                   "format": None if parallel else payload}
+        if parallel:
+            cache_key = make_key(
+                selected_files, STAGE_PROMPT_TEMPLATE + REDUCE_PROMPT_TEMPLATE, MODEL, TEMPERATURE,
+                mode="map-reduce", reduce_model=REDUCE_MODEL, max_tokens=STAGE_MAX_TOKENS,
+                reduce_max_tokens=REDUCE_MAX_TOKENS,
             )
-
-        survey_text = response.choices[0].message.content.strip()
+        else:
+            cache_key = make_key(
+                selected_files, SURVEY_PROMPT_TEMPLATE, MODEL, TEMPERATURE, max_tokens=MAX_TOKENS,
+                prompt_format=payload,
+                dropped=report["dropped"] if compact else [], digest_model=DIGEST_MODEL if use_digests else None,
+            )
+        cached = response_cache.get(cache_key)
+        base_text = None
+        revised = None  # (base key, added, removed) when this survey revises a stored one
+        if not cached and incremental:
+            # Start from the stored survey closest to this selection, unless it covers the same papers
+            base = find_base(response_cache, selected_files, variant)
+            if base and (base[1] or base[2]):
+                base_key, added, removed = base
+                delta_key = make_key(selected_files, DELTA_PROMPT_TEMPLATE, MODEL, TEMPERATURE, mode="delta",
+                                     base=base_key, reduce_model=REDUCE_MODEL, max_tokens=STAGE_MAX_TOKENS,
+                                     reduce_max_tokens=REDUCE_MAX_TOKENS)
+                cached = response_cache.get(delta_key)
+                base_entry = None if cached else response_cache.get(base_key)
+                if cached or base_entry:
+                    cache_key, revised = delta_key, base
+                    base_text = base_entry and base_entry["text"]
 
         st.subheader("📘 Generated Survey Summary")
-        st.markdown(survey_text)
+        status = st.empty()
+        metrics = None
+        timing = ""
+        joined = False
+        if revised:
+            base_files = response_cache.entries().get(revised[0], {}).get("files") or {}
+            with st.expander(f"🔁 Revises a stored survey of {len(base_files)} papers: "
+                             f"+{len(revised[1])} added / −{len(revised[2])} removed"):
+                st.markdown("\n".join(
+                    f"- {file_titles.get(name) or name}" + (" — **removed**" if name in revised[2] else "")
+                    for name in sorted(base_files)
+                ) + "".join(f"\n- {file_titles.get(name) or name} — **added**" for name in revised[1]))
+
+        if cached:
+            survey_text = cached["text"]
+            st.markdown(survey_text)
+        elif base_text is not None:
+            async def revise_stages(flight):
+                result = await revise_survey(
+                    flight.client, base_text, json_objects, selected_names, added, removed,
+                    on_section=lambda heading, text: flight.emit((heading, text)),
+                )
+                response_cache.put(cache_key, selected_files, result.text, usage=result.usage, variant=variant,
+                                   model=MODEL, timings=result.timings, base=base_key)
+                return result
+
+            flight, joined = scheduler.submit(cache_key, openai_api_key, revise_stages)
+            result = follow_sections(flight, status, "⏳ Revising the sections the added papers contribute to...")
+            survey_text = result.text
+            timing = (
+                f"🔁 Revised a stored survey: +{len(added)} / −{len(removed)} papers, {len(result.timings)} "
+                f"requests in {result.latency:.1f}s, {result.usage['prompt_tokens']:,} prompt tokens "
+                f"(vs {approx}{report['tokens'] + reserved:,} for a full compact request). "
+            )
+        elif parallel:
+            async def write_stages(flight):
+                result = await generate_survey(
+                    flight.client, json_objects, selected_names,
+                    on_section=lambda heading, text: flight.emit((heading, text)),
+                )
+                response_cache.put(cache_key, selected_files, result.text, usage=result.usage, variant=variant,
+                                   model=MODEL, timings=result.timings)
+                return result
+
+            flight, joined = scheduler.submit(cache_key, openai_api_key, write_stages)
+            # Sections fill in as their stage requests complete
+            result = follow_sections(flight, status, "⏳ Writing all stage sections in parallel...")
+            survey_text = result.text
+            stage_times = [t for name, t in result.timings.items() if name != "Conclusion"]
+            timing = (
+                f"⏱️ {len(result.timings)} requests in {result.latency:.1f}s "
+                f"(slowest stage {max(stage_times, default=0):.1f}s, "
+                f"sum of all requests {sum(result.timings.values()):.1f}s). "
+            )
+        else:
+            if compact and not report["fits"]:
+                st.warning("The compact payload still exceeds the context window; the request may fail.")
+            content = report["content"] if compact else None
+            if use_digests:
+                if missing_digests:
+                    progress = st.progress(0.0, text=f"Digesting {len(missing_digests)} papers...")
+
+                    async def write_digests(flight):
+                        return await build_missing(
+                            flight.client, digest_store, JSON_FOLDER, selected_files, DIGEST_MODEL,
+                            on_done=lambda name, done, total: flight.emit((done, total)),
+                        )
+
+                    digest_key = make_key({name: selected_files[name] for name in missing_digests},
+                                          DIGEST_PROMPT_TEMPLATE, DIGEST_MODEL, TEMPERATURE, mode="digests")
+                    flight, _ = scheduler.submit(digest_key, openai_api_key, write_digests)
+                    for events in flight.follow():
+                        for done, total in events[-1:]:
+                            progress.progress(done / total, text=f"Digested {done} of {total} papers")
+                        if queue_note(flight):
+                            progress.progress(0.0, text=queue_note(flight))
+                    errors = flight.result()
+                    progress.empty()
+                    if errors:
+                        st.error("Could not digest: " + ", ".join(errors))
+                        st.stop()
+                digests = [digest_store.get(selected_files[name], DIGEST_MODEL) for name in selected_names]
+                content = digest_content(json_objects, selected_names, digests)
+            messages = build_messages(json_objects, content=content)
+
+            async def write_survey(flight):
+                # Always streamed, so sessions rendering it live and at the end can share the request
+                metrics = StreamMetrics(MODEL)
+                parts = []
+                async for delta in astream_completion(flight.client, messages, MODEL, TEMPERATURE, MAX_TOKENS,
+                                                      metrics):
+                    parts.append(delta)
+                    flight.emit(delta)
+                text = "".join(parts).strip()
+                usage = None
+                if metrics.completion_tokens is not None:
+                    usage = {"prompt_tokens": metrics.prompt_tokens, "completion_tokens": metrics.completion_tokens}
+                response_cache.put(cache_key, selected_files, text, usage=usage, variant=variant, model=MODEL,
+                                   metrics=metrics.as_dict())
+                return text, metrics
+
+            flight, joined = scheduler.submit(cache_key, openai_api_key, write_survey)
+            if stream_output:
+                # One placeholder per section, redrawn at most every 0.1 s
+                status.caption("⏳ Waiting for the first tokens...")
+                body = st.container()
+                splitter = SectionSplitter()
+                placeholders = {}
+                dirty = set()
+
+                def draw(names):
+                    for name in dict.fromkeys(["", *splitter.sections]):
+                        if name not in names:
+                            continue
+                        if name not in placeholders:
+                            placeholders[name] = body.empty()
+                        text = splitter.text(name)
+                        placeholders[name].markdown(f"**{name}**  \n{text}" if name else text)
+
+                for deltas in flight.follow():
+                    for delta in deltas:
+                        dirty |= splitter.feed(delta)
+                    draw(dirty)
+                    dirty.clear()
+                    if queue_note(flight):
+                        status.caption(queue_note(flight))
+                    elif deltas:
+                        status.caption(f"✍️ Writing {splitter.current or 'survey'}...")
+                survey_text, metrics = flight.result()
+            else:
+                with st.spinner("Generating survey summary... this may take a minute ⏳"):
+                    for _ in flight.follow():
+                        status.caption(queue_note(flight))
+                    survey_text, metrics = flight.result()
+                st.markdown(survey_text)
+
+        stats = response_cache.stats()
+        caption = timing + (
+            ("♻️ Served from cache — no tokens spent. " if cached else "")
+            + ("👥 Shared with an identical request from another session — no extra tokens spent. "
+               if not cached and joined else "")
+            + f"Cache: {stats['hits']} hits / {stats['misses']} misses, {stats['entries']} stored surveys."
+        )
+        if metrics and metrics.latency is not None:
+            caption = (
+                f"⏱️ First token {metrics.ttft or 0:.2f}s · {metrics.tokens_per_sec or 0:.0f} tokens/s · "
+                f"total {metrics.latency:.1f}s. " + caption
+            )
+        status.caption(caption)
 
     except Exception as e:
         st.error(f"Error: {e}")
 
 else:
-    st.info("Select papers by title from the sidebar and click 'Generate Survey Summary' to start.")
\ No newline at end of file
+    st.info("Select papers by title from the sidebar and click 'Generate Survey Summary' to start.")
+
+trace_panel()
@@ -0,0 +1,101 @@
+import altair as alt
+import streamlit as st
+
+from components.trace_panel import trace_panel
+from corpus import EXHYTE_DIR, get_coverage_index, trace
+
+ALL_STAGES = "All stages"
+NORMALIZATION_LABELS = {
+    "jaccard": "Jaccard (both / either)",
+    "conditional": "Share of row papers that also perform the column",
+    "papers": "Papers performing both",
+}
+
+trace.begin_run("workflow_coverage")
+
+# 📁 Path to the workflow records
+json_dir = EXHYTE_DIR
+
+# 🧮 Coverage matrix: papers × stages and papers × sub-steps performed flags
+coverage = get_coverage_index(json_dir)
+
+# ───────────── Page Setup ─────────────
+st.set_page_config(page_title="🧭 Workflow Coverage", layout="wide")
+st.title("🧭 Workflow Coverage")
+st.write("Which workflow stages and sub-steps the papers perform, how that changed over the years, "
+         "and which ones are performed together.")
+
+if not len(coverage):
+    st.warning(f"No JSON files found in '{json_dir}' folder.")
+    st.stop()
+
+# ------------- Sidebar: Filters -------------
+with st.sidebar, trace.span("page.filters"):
+    st.header("📚 Filters")
+    available_years = coverage.available_years()
+    selected_years = st.multiselect("Publication years", available_years, default=available_years)
+    # Undated papers are only counted while every year is selected
+    rows = coverage.select(None if set(selected_years) == set(available_years) else selected_years)
+    detail = st.selectbox("Detail", [ALL_STAGES] + coverage.stages, help="A stage shows its sub-steps")
+    level = None if detail == ALL_STAGES else detail
+    st.caption(f"{len(rows)} of {len(coverage)} papers")
+
+if not len(rows):
+    st.info("No papers match the selected years.")
+    st.stop()
+
+# Stage and sub-step names go in a fixed "label" field (Vega-Lite reads "." and ":" in field names)
+label = alt.Tooltip("label:N", title=level or "Stage")
+
+# ------------- Adoption -------------
+with trace.span("page.adoption"):
+    st.header("📊 Adoption")
+    adoption = coverage.adoption(rows, level).rename_axis("label").reset_index()
+    st.altair_chart(
+        alt.Chart(adoption).mark_bar().encode(
+            x=alt.X("share:Q", title="Share of papers", axis=alt.Axis(format="%"), scale=alt.Scale(domain=[0, 1])),
+            y=alt.Y("label:N", sort=None, title=None, axis=alt.Axis(labelLimit=400)),
+            tooltip=[label, "papers:Q", alt.Tooltip("share:Q", format=".1%")],
+        ),
+        width="stretch",
+    )
+
+# ------------- Trends -------------
+with trace.span("page.trends"):
+    st.header("📈 Per-year trends")
+    trend = coverage.trend(rows, level)
+    if len(trend) > 1:
+        long = trend.reset_index().melt("year", var_name="label", value_name="share")
+        st.altair_chart(
+            alt.Chart(long).mark_line(point=True).encode(
+                x=alt.X("year:O", title="Year"),
+                y=alt.Y("share:Q", title="Share of papers", axis=alt.Axis(format="%")),
+                color=alt.Color("label:N", sort=None, title=None,
+                                legend=alt.Legend(labelLimit=400, orient="bottom", columns=2)),
+                tooltip=["year:O", label, alt.Tooltip("share:Q", format=".1%")],
+            ),
+            width="stretch",
+        )
+    else:
+        st.info("Select at least two years with dated papers to see trends.")
+
+# ------------- Co-occurrence -------------
+with trace.span("page.cooccurrence"):
+    st.header("🔥 Co-occurrence")
+    normalize = st.radio(
+        "Cell value", list(NORMALIZATION_LABELS), format_func=NORMALIZATION_LABELS.get, horizontal=True,
+    )
+    matrix = coverage.cooccurrence(rows, level, normalize)
+    cells = matrix.rename_axis(index="row", columns="column").stack().rename("value").reset_index()
+    labels = list(matrix.index)
+    st.altair_chart(
+        alt.Chart(cells).mark_rect().encode(
+            x=alt.X("column:N", sort=labels, title=None, axis=alt.Axis(labelLimit=200, labelAngle=-45)),
+            y=alt.Y("row:N", sort=labels, title=None, axis=alt.Axis(labelLimit=400)),
+            color=alt.Color("value:Q", title=None, scale=alt.Scale(scheme="orangered")),
+            tooltip=["row:N", "column:N", alt.Tooltip("value:Q", format=",.2f" if normalize != "papers" else ",d")],
+        ).properties(height=max(300, 22 * len(labels))),
+        width="stretch",
+    )
+
+trace_panel()
@@ -0,0 +1,88 @@
+"""Survey generation over the ``exhyte_data/`` corpus."""
+
+from survey.batch import Journal, RateLimiter, plan_groups, run_batch
+from survey.cache import ResponseCache, get_response_cache, make_key
+from survey.compact import compact_paper, compaction_report, count_tokens, fit_budget
+from survey.delta import DELTA_PROMPT_TEMPLATE, find_base, revise_survey, strip_citations
+from survey.digests import (
+    DIGEST_MODEL,
+    DIGEST_PROMPT_TEMPLATE,
+    DigestStore,
+    build_missing,
+    digest_content,
+    get_digest_store,
+)
+from survey.mapreduce import (
+    REDUCE_MAX_TOKENS,
+    REDUCE_MODEL,
+    REDUCE_PROMPT_TEMPLATE,
+    STAGE_MAX_TOKENS,
+    STAGE_PROMPT_TEMPLATE,
+    MapReduceResult,
+    build_references,
+    generate_survey,
+)
+from survey.prompt import (
+    MAX_TOKENS,
+    MODEL,
+    SURVEY_PROMPT_TEMPLATE,
+    SYSTEM_PROMPT,
+    TEMPERATURE,
+    build_messages,
+)
+from survey.scheduler import Flight, Scheduler, get_scheduler
+from survey.stream import (
+    SECTION_HEADINGS,
+    SectionSplitter,
+    StreamMetrics,
+    astream_completion,
+    recent_metrics,
+    stream_completion,
+)
+
+__all__ = [
+    "DELTA_PROMPT_TEMPLATE",
+    "DIGEST_MODEL",
+    "DIGEST_PROMPT_TEMPLATE",
+    "MAX_TOKENS",
+    "MODEL",
+    "REDUCE_MAX_TOKENS",
+    "REDUCE_MODEL",
+    "REDUCE_PROMPT_TEMPLATE",
+    "SECTION_HEADINGS",
+    "STAGE_MAX_TOKENS",
+    "STAGE_PROMPT_TEMPLATE",
+    "SURVEY_PROMPT_TEMPLATE",
+    "SYSTEM_PROMPT",
+    "TEMPERATURE",
+    "DigestStore",
+    "Flight",
+    "Journal",
+    "MapReduceResult",
+    "RateLimiter",
+    "ResponseCache",
+    "Scheduler",
+    "SectionSplitter",
+    "StreamMetrics",
+    "astream_completion",
+    "build_messages",
+    "build_missing",
+    "build_references",
+    "compact_paper",
+    "compaction_report",
+    "count_tokens",
+    "digest_content",
+    "find_base",
+    "fit_budget",
+    "generate_survey",
+    "get_digest_store",
+    "get_response_cache",
+    "get_scheduler",
+    "make_key",
+    "plan_groups",
+    "recent_metrics",
+    "revise_survey",
+    "run_batch",
+    "stream_completion",
+    "strip_citations",
+]
@@ -0,0 +1,81 @@
+"""Batch steps for survey generation.
+
+    python -m survey digests [--model MODEL] [--concurrency N]
+    python -m survey batch [--by year|subject|method_type ...] [--groups FILE] [--out DIR]
+                           [--name NAME] [--concurrency N] [--rpm N] [--tpm N]
+
+Reads the API key from ``OPENAI_API_KEY`` (and ``OPENAI_BASE_URL``, if set).
+"""
+
+import argparse
+import asyncio
+
+from openai import AsyncOpenAI
+
+from corpus.config import EXHYTE_DIR
+from corpus.store import get_store
+from survey.batch import GROUPINGS, Journal, journal_path, load_groups, plan_groups, run_batch
+from survey.digests import DIGEST_CONCURRENCY, DIGEST_MODEL, build_missing, get_digest_store
+
+
+def _digests(args):
+    get_store().sync(EXHYTE_DIR)
+    files = get_store().collection(EXHYTE_DIR).hashes()
+    store = get_digest_store()
+    pruned = store.prune(files)
+    missing = len(store.missing(files, args.model))
+    print(f"{EXHYTE_DIR}: {len(files)} papers, {missing} without a {args.model} digest, {pruned} stale removed")
+
+    def progress(filename, done, total):
+        print(f"[{done}/{total}] {filename}")
+
+    errors = asyncio.run(build_missing(AsyncOpenAI(), store, EXHYTE_DIR, files, args.model,
+                                       args.concurrency, on_done=progress))
+    for filename, error in errors.items():
+        print(f"failed: {filename}: {error}")
+    print(f"{missing - len(errors)} digests built -> {store.directory}")
+
+
+def _batch(args):
+    if args.groups:
+        groups = load_groups(args.groups)
+    else:
+        groups = plan_groups(args.by or GROUPINGS, args.min_papers, args.max_papers)
+    journal = Journal(journal_path(args.name))
+    print(f"{len(groups)} groups, {len(journal.done)} already done in {journal.path}")
+    # Retries are handled by the batch runner, which also throttles the other requests on a 429
+    client = AsyncOpenAI(max_retries=0)
+    stats = asyncio.run(run_batch(client, groups, args.out, journal, args.concurrency, args.rpm, args.tpm))
+    print(f"{stats['done']} generated, {stats['cached']} from cache, {stats['skipped']} already done, "
+          f"{stats['failed']} failed -> {args.out}")
+    if stats["failed"]:
+        raise SystemExit(1)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m survey")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("digests", help="build missing per-paper stage digests")
+    p.add_argument("--model", default=DIGEST_MODEL)
+    p.add_argument("--concurrency", type=int, default=DIGEST_CONCURRENCY)
+    p.set_defaults(func=_digests)
+
+    p = sub.add_parser("batch", help="generate one survey per paper group, resumably")
+    p.add_argument("--by", action="append", choices=GROUPINGS, help="grouping (repeatable; default: all)")
+    p.add_argument("--groups", help='JSON file {"group name": [filename, ...]} instead of --by')
+    p.add_argument("--min-papers", type=int, default=2)
+    p.add_argument("--max-papers", type=int, help="keep the most recent papers of larger groups")
+    p.add_argument("--out", default="surveys", help="directory for the Markdown surveys")
+    p.add_argument("--name", default="default", help="journal name; reuse it to resume a run")
+    p.add_argument("--concurrency", type=int, default=4)
+    p.add_argument("--rpm", type=int, help="requests per minute")
+    p.add_argument("--tpm", type=int, help="tokens per minute (prompt plus max_tokens)")
+    p.set_defaults(func=_batch)
+
+    args = ap.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
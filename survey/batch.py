@@ -0,0 +1,262 @@
+"""Headless batch generation of surveys for paper groupings.
+
+Groups (per year, subject or method type) are surveyed with the same
+compact prompt and cache key as the Streamlit page, so a batch run also
+warms the page's response cache and vice versa. Requests run with bounded
+concurrency under requests-per-minute and tokens-per-minute budgets, and
+are retried with backoff on 429s (honouring ``Retry-After``) and transient
+errors. Every finished group is appended to a JSONL journal, so an
+interrupted run resumes without paying for completed groups again.
+
+    python -m survey batch --by year --by subject --out surveys/
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+import time
+
+import openai
+
+from corpus import trace
+from corpus.config import CACHE_DIR, EXHYTE_DIR, PAPERS_DIR
+from corpus.store import get_store
+from survey.cache import get_response_cache, make_key
+from survey.compact import CONTEXT_WINDOW, count_tokens, fit_budget
+from survey.prompt import MAX_TOKENS, MODEL, SURVEY_PROMPT_TEMPLATE, SYSTEM_PROMPT, TEMPERATURE, build_messages
+
+BATCH_DIR = os.path.join(CACHE_DIR, "batch")
+GROUPINGS = ("year", "subject", "method_type")
+MAX_RETRIES = 6
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 120.0
+
+
+def _slug(value):
+    return re.sub(r"[^A-Za-z0-9]+", "-", str(value)).strip("-").lower() or "none"
+
+
+def _collection(folder):
+    """The store's :class:`corpus.store.Collection` of ``folder``, synced in the foreground."""
+    store = get_store()
+    store.sync(folder)
+    return store.collection(folder)
+
+
+def plan_groups(by=GROUPINGS, min_papers=2, max_papers=None):
+    """``[{"id", "label", "files": [filename, ...]}, ...]`` for the requested groupings.
+
+    Subjects and method types come from the ``Papers/`` facets of the
+    store; papers are matched to ``exhyte_data/`` records by filename.
+    Groups larger than ``max_papers`` keep the most recent papers.
+    """
+    exhyte = _collection(EXHYTE_DIR)
+    order = {name: i for i, name in enumerate(exhyte.by_date())}  # newest first
+    groups = []
+
+    def add(kind, value, files):
+        files = sorted((f for f in files if f in order), key=order.get)
+        if max_papers:
+            files = files[:max_papers]
+        if len(files) >= min_papers:
+            groups.append({"id": f"{kind}-{_slug(value)}", "label": f"{kind}: {value}", "files": files})
+
+    if "year" in by:
+        for year in exhyte.years():
+            add("year", year, exhyte.by_date([year]))
+    papers = _collection(PAPERS_DIR) if {"subject", "method_type"} & set(by) else None
+    for kind in ("subject", "method_type"):
+        if kind in by:
+            for value in sorted(papers.counts(kind, {}), key=str):
+                add(kind, value, papers.match({kind: [value]}))
+    return groups
+
+
+def load_groups(path):
+    """Groups from a JSON file mapping a group id to its list of filenames."""
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    return [{"id": _slug(name), "label": name, "files": list(files)} for name, files in spec.items()]
+
+
+def journal_path(name):
+    return os.path.join(BATCH_DIR, f"{_slug(name)}.journal.jsonl")
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute budgets over a sliding minute."""
+
+    def __init__(self, rpm=None, tpm=None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._events = []  # (time, tokens)
+        self._lock = asyncio.Lock()
+        self._paused_until = 0.0
+
+    def pause(self, seconds):
+        """Hold every request for ``seconds`` (after a 429)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def paused(self):
+        """Seconds left of the current pause."""
+        return max(self._paused_until - time.monotonic(), 0.0)
+
+    async def acquire(self, tokens):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._events = [(t, n) for t, n in self._events if now - t < 60]
+                used = sum(n for _, n in self._events)
+                wait = 0.0
+                if self.rpm and len(self._events) >= self.rpm:
+                    wait = 60 - (now - self._events[0][0])
+                if self.tpm and self._events and used + tokens > self.tpm:
+                    # Wait until enough of the window has expired
+                    freed = used + tokens - self.tpm
+                    for t, n in self._events:
+                        freed -= n
+                        if freed <= 0:
+                            wait = max(wait, 60 - (now - t))
+                            break
+                if wait <= 0:
+                    self._events.append((now, tokens))
+                    return
+                await asyncio.sleep(wait)
+
+
+class Journal:
+    """Append-only JSONL record of finished groups."""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line of an interrupted run
+                    if record.get("status") == "done":
+                        self.done[record["key"]] = record
+        except OSError:
+            pass
+
+    def append(self, record):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if record.get("status") == "done":
+            self.done[record["key"]] = record
+
+
+def retry_delay(error, attempt):
+    """Seconds to wait before retrying after ``error``: its ``Retry-After``, else jittered backoff."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return min(float(headers.get("retry-after")), BACKOFF_MAX)
+    except (TypeError, ValueError):
+        return min(BACKOFF_BASE ** attempt, BACKOFF_MAX) * (0.5 + random.random() / 2)
+
+
+async def complete(client, limiter, messages, tokens, log=print):
+    """One chat completion under ``limiter``, retried on 429s and transient errors."""
+    for attempt in range(MAX_RETRIES + 1):
+        await limiter.acquire(tokens)
+        started = time.perf_counter()
+        try:
+            response = await client.chat.completions.create(
+                model=MODEL, messages=messages, temperature=TEMPERATURE, max_tokens=MAX_TOKENS,
+            )
+            usage = response.usage
+            trace.llm(MODEL, time.perf_counter() - started, usage and usage.prompt_tokens,
+                      usage and usage.completion_tokens)
+            return response
+        except openai.RateLimitError as e:
+            if attempt == MAX_RETRIES:
+                raise
+            error, delay = e, retry_delay(e, attempt)
+            limiter.pause(delay)
+        except (openai.APIConnectionError, openai.InternalServerError) as e:
+            if attempt == MAX_RETRIES:
+                raise
+            error, delay = e, retry_delay(e, attempt)
+        log(f"  {type(error).__name__}, retry {attempt + 1} in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+
+async def run_batch(client, groups, out_dir, journal, concurrency=4, rpm=None, tpm=None, log=print):
+    """Survey every group not yet in ``journal``; returns ``{"done", "cached", "skipped", "failed"}``."""
+    limiter = RateLimiter(rpm, tpm)
+    semaphore = asyncio.Semaphore(concurrency)
+    cache = get_response_cache()
+    exhyte = _collection(EXHYTE_DIR)
+    hashes = exhyte.hashes()
+    cache.invalidate(hashes)
+    reserved, _ = count_tokens(SYSTEM_PROMPT + SURVEY_PROMPT_TEMPLATE)
+    stats = {"done": 0, "cached": 0, "skipped": 0, "failed": 0}
+    os.makedirs(out_dir, exist_ok=True)
+
+    def failed(group, key, error):
+        stats["failed"] += 1
+        log(f"{group['id']}: failed: {error}")
+        journal.append({"group": group["id"], "key": key, "status": "failed", "error": str(error),
+                        "time": time.time()})
+
+    async def one(group):
+        unknown = [name for name in group["files"] if name not in hashes]
+        if unknown:
+            stats["failed"] += 1
+            log(f"{group['id']}: not in {EXHYTE_DIR}: {', '.join(unknown)}")
+            return
+        files = {name: hashes[name] for name in group["files"]}
+        try:
+            papers = [exhyte.paper(name) for name in group["files"]]
+            content, tokens, _, dropped = fit_budget(papers, group["files"], CONTEXT_WINDOW - MAX_TOKENS, reserved)
+        except Exception as e:
+            # A malformed or unreadable paper fails its group, not the whole run
+            failed(group, None, e)
+            return
+        # Same key as the page's default (single request, compact payload)
+        key = make_key(files, SURVEY_PROMPT_TEMPLATE, MODEL, TEMPERATURE, max_tokens=MAX_TOKENS,
+                       prompt_format="compact", dropped=list(dropped), digest_model=None)
+        path = os.path.join(out_dir, group["id"] + ".md")
+        if key in journal.done and os.path.exists(path):
+            stats["skipped"] += 1
+            return
+
+        cached = cache.get(key)
+        started = time.perf_counter()
+        if cached:
+            text, usage = cached["text"], cached.get("usage")
+            stats["cached"] += 1
+        else:
+            async with semaphore:
+                log(f"{group['id']}: {len(papers)} papers, ~{tokens + reserved:,} prompt tokens")
+                try:
+                    response = await complete(client, limiter, build_messages(papers, content=content),
+                                              tokens + reserved + MAX_TOKENS, log)
+                except Exception as e:
+                    failed(group, key, e)
+                    return
+            text = response.choices[0].message.content.strip()
+            usage = response.usage.model_dump() if response.usage else None
+            cache.put(key, files, text, usage=usage, variant={"mode": "single", "model": MODEL, "format": "compact"},
+                      model=MODEL)
+            stats["done"] += 1
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"# Survey — {group['label']}\n\n{text}\n")
+        journal.append({"group": group["id"], "key": key, "status": "done", "files": group["files"],
+                        "usage": usage, "cached": bool(cached), "seconds": time.perf_counter() - started,
+                        "output": path, "time": time.time()})
+
+    await asyncio.gather(*(one(group) for group in groups))
+    return stats
@@ -0,0 +1,192 @@
+"""On-disk cache of generated surveys.
+
+A survey is keyed on everything that determines the completion: the selected
+filenames with their content hashes, a hash of the prompt template, the model
+and the sampling parameters. Repeating a survey is then a file read instead
+of a paid request. Entries record the hash of every paper they were built
+from, so editing one JSON file invalidates exactly the surveys that cite it.
+
+Entries are evicted by age and, least recently used first, by count and
+total size. Access times are kept in memory and written with the next
+change to the index, or at most every ``ACCESS_SAVE_INTERVAL`` seconds.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from corpus.config import CACHE_DIR
+
+SURVEY_CACHE_DIR = os.path.join(CACHE_DIR, "surveys")
+MAX_ENTRIES = 500
+MAX_BYTES = 50 * 1024 * 1024
+MAX_AGE = 30 * 24 * 3600
+ACCESS_SAVE_INTERVAL = 60
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_key(files, template, model, temperature, **params):
+    """Cache key for a survey of ``files`` (``{filename: sha256}``)."""
+    payload = {
+        "files": sorted(files.items()),
+        "template": text_hash(template),
+        "model": model,
+        "temperature": temperature,
+        **params,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Surveys stored as ``<key>.json`` files plus an ``index.json`` of their metadata."""
+
+    def __init__(self, directory=SURVEY_CACHE_DIR, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES, max_age=MAX_AGE):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._index = self._load_index()
+        self._saved = time.monotonic()
+        self._dirty = False  # access times not written to index.json yet
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.directory, "index.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = os.path.join(self.directory, "index.json.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._index, f)
+            os.replace(tmp, os.path.join(self.directory, "index.json"))
+        except OSError:
+            pass
+        self._saved = time.monotonic()
+        self._dirty = False
+
+    def _drop(self, key):
+        self._index.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def get(self, key):
+        """Cached entry ``{"text", "usage", "created", ...}`` or ``None``."""
+        with self._lock:
+            meta = self._index.get(key)
+            if meta is not None and time.time() - meta["created"] > self.max_age:
+                self._drop(key)
+                self._save_index()
+                meta = None
+            entry = None
+            if meta is not None:
+                try:
+                    with open(self._path(key), encoding="utf-8") as f:
+                        entry = json.load(f)
+                except (OSError, ValueError):
+                    self._drop(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            meta["accessed"] = time.time()
+            self._dirty = True
+            if time.monotonic() - self._saved > ACCESS_SAVE_INTERVAL:
+                self._save_index()
+            return entry
+
+    def put(self, key, files, text, usage=None, variant=None, **info):
+        """Store a survey generated from ``files`` (``{filename: sha256}``).
+
+        ``variant`` (JSON) says how it was generated, e.g. mode, model and
+        payload format; only surveys of the same variant are revised into
+        one another (see :func:`survey.delta.find_base`).
+        """
+        now = time.time()
+        entry = {"text": text, "usage": usage, "files": files, "created": now, **info}
+        data = json.dumps(entry)
+        with self._lock:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                tmp = self._path(key) + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(data)
+                os.replace(tmp, self._path(key))
+            except OSError:
+                return
+            self._index[key] = {"files": files, "variant": variant, "created": now, "accessed": now,
+                                "size": len(data)}
+            self._evict()
+            self._save_index()
+
+    def invalidate(self, current):
+        """Drop entries built from a paper whose hash differs from ``current`` (``{filename: sha256}``)."""
+        with self._lock:
+            stale = [key for key, meta in self._index.items()
+                     if any(current.get(name) != sha for name, sha in meta["files"].items())]
+            for key in stale:
+                self._drop(key)
+            if stale:
+                self._save_index()
+            return len(stale)
+
+    def entries(self):
+        """``{key: {"files", "variant", "created", "accessed", "size"}}`` of the stored surveys.
+
+        Reads only the index, not the surveys.
+        """
+        with self._lock:
+            return {key: dict(meta) for key, meta in self._index.items()}
+
+    def _evict(self):
+        now = time.time()
+        for key in [k for k, m in self._index.items() if now - m["created"] > self.max_age]:
+            self._drop(key)
+            self.evictions += 1
+        by_access = sorted(self._index, key=lambda k: self._index[k]["accessed"])
+        total = sum(m["size"] for m in self._index.values())
+        while by_access and (len(self._index) > self.max_entries or total > self.max_bytes):
+            key = by_access.pop(0)
+            total -= self._index[key]["size"]
+            self._drop(key)
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._index),
+                "bytes": sum(m["size"] for m in self._index.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """The process-wide :class:`ResponseCache`."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
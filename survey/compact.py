@@ -0,0 +1,176 @@
+"""Compact, token-budgeted prompt payload for ``exhyte_data/`` records.
+
+The original payload is ``json.dumps(record, indent=2)`` of every selected
+paper: indentation, quoting, every ``"performed": "No"`` subtree and the
+verbose metadata all cost input tokens. :func:`compact_paper` keeps only the
+performed stages and sub-steps and writes them as dense, stage-ordered
+lines under the survey's own headings, with one citation line per paper.
+
+When the payload still exceeds the budget, the least essential fields are
+dropped for every paper (``Example`` first, then ``Inputs``/``Outputs``).
+Tokens are counted with ``tiktoken`` when it is installed, otherwise
+estimated at four characters per token.
+"""
+
+import re
+
+from survey.prompt import MAX_TOKENS, MODEL, build_user_content
+
+CONTEXT_WINDOW = 1_047_576  # gpt-4.1
+
+# exhyte_data key -> survey heading; "Test" is split into T1/T2 by sub-step
+STAGES = (
+    ("Inputs to the workflow", "Inputs to the Workflow"),
+    ("Query Structuring", "E1: Query Structuring"),
+    ("Data Retrieval", "E2: Data Retrieval"),
+    ("Knowledge Assembly", "E3: Knowledge Assembly"),
+    ("Hypothesis/Idea Generation", "H1: Hypothesis/Idea Generation"),
+    ("Hypothesis/Idea Prioritization", "H2: Hypothesis or Idea Prioritization"),
+    ("Test", "T1: Experimental Design Generation"),
+)
+REFINEMENT_HEADING = "T2: Iterative Refinement"
+FIELD_LABELS = {"Method details": "method", "Role in workflow": "role"}
+# Fields dropped, in order, to fit the budget
+DROP_ORDER = (("Example",), ("Example", "Inputs", "Outputs"))
+
+_CITATION_RE = re.compile(r"^(.*?) - (\d{4}) - ")
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - optional
+    tiktoken = None
+
+_encodings = {}
+
+
+def count_tokens(text, model=MODEL):
+    """``(tokens, exact)``: a ``tiktoken`` count, or an estimate of 4 characters per token."""
+    if tiktoken is None:
+        return (len(text) + 3) // 4, False
+    if model not in _encodings:
+        try:
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except KeyError:
+            _encodings[model] = tiktoken.get_encoding("o200k_base")
+    return len(_encodings[model].encode(text, disallowed_special=())), True
+
+
+def citation(filename):
+    """``"Author et al., 2025"`` from an ``"Author et al. - 2025 - Title.json"`` filename."""
+    match = _CITATION_RE.match(filename)
+    if not match:
+        return filename.rsplit(".", 1)[0]
+    return f"{match.group(1)}, {match.group(2)}"
+
+
+def performed(value):
+    """False only for stages/sub-steps explicitly marked as not performed."""
+    if not isinstance(value, dict):
+        return True
+    return str(value.get("performed", "Yes")).strip().lower() != "no"
+
+
+def _text(value):
+    if isinstance(value, list):
+        return "; ".join(_text(v) for v in value)
+    if isinstance(value, dict):
+        return "; ".join(f"{k}: {_text(v)}" for k, v in value.items())
+    return " ".join(str(value).split())
+
+
+def _step_line(name, step, drop):
+    if not isinstance(step, dict):
+        return f"- {name}: {_text(step)}"
+    parts = []
+    for field, value in step.items():
+        if field == "performed" or field in drop or value in ("", None, [], {}):
+            continue
+        label = FIELD_LABELS.get(field, field.lower())
+        parts.append(f"{label}: {_text(value)}")
+    return f"- {name} | " + " | ".join(parts) if parts else f"- {name}"
+
+
+def paper_stages(record):
+    """``[(heading, [(sub-step, body), ...]), ...]`` of the performed parts of a record, in survey order."""
+    stages = []
+    for key, heading in STAGES:
+        stage = record.get(key)
+        if stage is None or not performed(stage):
+            continue
+        if not isinstance(stage, dict):
+            stages.append((heading, [("", stage)]))
+            continue
+        steps = [(name, step) for name, step in stage.items() if name != "performed" and performed(step)]
+        if key == "Test":
+            design = [s for s in steps if not s[0].startswith("Refinement")]
+            refinement = [s for s in steps if s[0].startswith("Refinement")]
+            if design:
+                stages.append((heading, design))
+            if refinement:
+                stages.append((REFINEMENT_HEADING, refinement))
+        elif steps:
+            stages.append((heading, steps))
+    return stages
+
+
+def citation_line(record, filename=None):
+    cite = citation(filename) if filename else _text(record.get("authors", ""))
+    return f"## [{cite}] {record.get('paper_title', '')}"
+
+
+def step_lines(steps, drop=()):
+    """Lines of the sub-steps ``[(name, body), ...]`` of one stage."""
+    return [_step_line(name, step, drop) if name else _text(step) for name, step in steps]
+
+
+def compact_paper(record, filename=None, drop=()):
+    """Dense text of one record: a citation line, then its performed sub-steps per stage."""
+    lines = [citation_line(record, filename)]
+    meta = [_text(record[k]) for k in ("authors", "published", "link") if record.get(k)]
+    if meta:
+        lines.append(" · ".join(meta))
+    for heading, steps in paper_stages(record):
+        lines.append(f"### {heading}")
+        lines.extend(step_lines(steps, drop))
+    return "\n".join(lines)
+
+
+def compact_content(papers, filenames=None, drop=()):
+    """User-message payload in compact form for ``papers`` (parsed exhyte_data records)."""
+    filenames = filenames or [None] * len(papers)
+    return (
+        f"Here are {len(papers)} papers, one block each: a citation line ([Author et al., Year] title, "
+        "then authors · published · link), then the performed sub-steps of each stage as "
+        "'- sub-step | field: value | ...'. Stages and sub-steps that were not performed are omitted.\n\n"
+        + "\n\n".join(compact_paper(p, f, drop) for p, f in zip(papers, filenames))
+    )
+
+
+def fit_budget(papers, filenames=None, budget=CONTEXT_WINDOW - MAX_TOKENS, reserved=0, model=MODEL):
+    """Compact payload that fits ``budget`` tokens after ``reserved`` ones.
+
+    Returns ``(content, tokens, exact, dropped_fields)``; the last, most
+    reduced payload is returned even if it still does not fit.
+    """
+    for drop in ((),) + DROP_ORDER:
+        content = compact_content(papers, filenames, drop)
+        tokens, exact = count_tokens(content, model)
+        if tokens + reserved <= budget:
+            break
+    return content, tokens, exact, drop
+
+
+def compaction_report(papers, filenames=None, budget=CONTEXT_WINDOW - MAX_TOKENS, reserved=0, model=MODEL):
+    """Compact payload of a selection plus its token savings over the JSON payload."""
+    content, tokens, exact, dropped = fit_budget(papers, filenames, budget, reserved, model)
+    json_tokens, _ = count_tokens(build_user_content(papers), model)
+    return {
+        "content": content,
+        "tokens": tokens,
+        "json_tokens": json_tokens,
+        "saved": json_tokens - tokens,
+        "saved_pct": 100.0 * (json_tokens - tokens) / json_tokens if json_tokens else 0.0,
+        "exact": exact,
+        "dropped": list(dropped),
+        "fits": tokens + reserved <= budget,
+    }
@@ -0,0 +1,209 @@
+"""Incremental revision of a stored survey after the paper selection changed.
+
+Adding or removing one paper used to regenerate the whole survey from every
+selected paper. :func:`revise_survey` starts from the stored survey closest
+to the new selection instead (see :func:`find_base`), split into its stage
+sections:
+
+* citations of removed papers are stripped locally: a sentence citing only
+  removed papers is dropped, and other sentences just lose those citations;
+* each stage section that the added papers contribute to is rewritten by one
+  request that sees only the current section and the added papers' slice of
+  that stage (the same blocks as :mod:`survey.mapreduce`), and the stage
+  requests run concurrently;
+* the Conclusion is revised by a short request to the smaller model, from
+  the current Conclusion and the rewritten sections;
+* the References are formatted locally for the new selection.
+
+Removing papers costs no tokens. Adding a few costs roughly the current
+survey plus the added papers' content, instead of every selected paper.
+"""
+
+import asyncio
+import re
+import time
+
+from survey.compact import citation
+from survey.mapreduce import (
+    MAX_CONCURRENCY,
+    NOT_PERFORMED,
+    REDUCE_MAX_TOKENS,
+    REDUCE_MODEL,
+    STAGE_HEADINGS,
+    STAGE_INSTRUCTIONS,
+    STAGE_MAX_TOKENS,
+    MapReduceResult,
+    build_references,
+    complete_section,
+    stage_slices,
+)
+from survey.prompt import MODEL
+from survey.stream import SECTION_HEADINGS, SectionSplitter
+
+DELTA_PROMPT_TEMPLATE = """You are revising one section of a scientific survey that compares LLM-guided scientific discovery workflows, because {count} paper(s) were added to it.
+
+Write the section **{heading}** again so that it also covers the added papers. Keep what the current section says about the other papers, with their citations, and integrate the added papers where they fit, comparing them with the others. {instruction}
+
+RULES
+1. Use formal academic writing — complete sentences, no bullet points.
+2. Only use the information given below.
+3. Cite every relevant paper in the form *(Author et al., Year)*; for an added paper, use the bracketed citation of its block.
+4. Begin with the bolded heading **{heading}**.
+
+CURRENT SECTION
+{section}
+
+ADDED PAPERS ({heading} stage; each block is a citation line followed by '- sub-step | field: value | ...' lines)
+{blocks}"""
+
+DELTA_CONCLUSION_TEMPLATE = """Below are the current Conclusion of a scientific survey comparing LLM-guided scientific discovery workflows, and the sections that were just revised because {count} paper(s) were added.
+
+Write the section **Conclusion** again: an integrative summary comparing how the workflows collectively advance automated scientific discovery, now including the added papers. Keep its statements about the other papers. Use formal academic writing, no bullet points, only the information below, and keep citations in the form *(Author et al., Year)*. Begin with the bolded heading **Conclusion**.
+
+CURRENT CONCLUSION
+{conclusion}
+
+REVISED SECTIONS
+{sections}"""
+
+_GROUP_RE = re.compile(r"(\s*)(\*?)\(([^()]*)\)(\*?)")
+_SENTENCE_RE = re.compile(r"(?<!\bal\.)(?<!\be\.g\.)(?<!\bi\.e\.)(?<!\bcf\.)(?<!\bvs\.)(?<=[.!?])\s+")
+_PREFIX_RE = re.compile(r"^(?:e g|see|cf|i e|and)\s+")
+_YEAR_RE = re.compile(r"\b(?:19|20)\d\d[a-z]?\b")
+
+
+def _key(cite):
+    """Comparable form of a citation: ``"zhou et al 2024"``."""
+    return _PREFIX_RE.sub("", re.sub(r"[^a-z0-9]+", " ", cite.lower()).strip())
+
+
+def survey_sections(text):
+    """``{heading: text}`` of the known sections of a generated survey."""
+    splitter = SectionSplitter()
+    splitter.feed(text + "\n")
+    return {heading: splitter.text(heading) for heading in SECTION_HEADINGS if heading in splitter.sections}
+
+
+def strip_citations(text, removed, kept=()):
+    """``text`` without the citations (``"Author et al., Year"``) in ``removed``.
+
+    A sentence is dropped when every paper it cites was removed, or when it
+    names a removed paper in running text (``Author et al. (Year)``). Other
+    sentences only lose the removed citations from their parentheses.
+    Citations that ``kept`` papers share are left alone.
+    """
+    kept_keys = {_key(c) for c in kept}
+    removed = [c for c in removed if _key(c) not in kept_keys]
+    if not removed:
+        return text
+    removed_keys = {_key(c) for c in removed}
+    # "Author et al. (Year)" in running text; citations without a year (see compact.citation) have no such form
+    narrative = [re.compile(r"{}\s*\(\s*{}\s*\)".format(*map(re.escape, parts)))
+                 for parts in (c.rsplit(", ", 1) for c in removed) if len(parts) == 2 and _YEAR_RE.fullmatch(parts[1])]
+
+    def sentence(text):
+        if any(pattern.search(text) for pattern in narrative):
+            return None
+        found = {"removed": False, "kept": False}
+
+        def group(match):
+            space, open_star, inner, close_star = match.groups()
+            items = [item.strip() for item in inner.split(";")]
+            left = [item for item in items if _key(item) not in removed_keys]
+            found["removed"] |= len(left) < len(items)
+            found["kept"] |= any(_YEAR_RE.search(item) for item in left)
+            if not left:
+                return ""
+            return f"{space}{open_star}({'; '.join(left)}){close_star}"
+
+        text = _GROUP_RE.sub(group, text)
+        if found["removed"] and not found["kept"]:
+            return None
+        return re.sub(r"\s+([.,;:])", r"\1", text)
+
+    lines = []
+    for line in text.split("\n"):
+        sentences = [s for s in map(sentence, _SENTENCE_RE.split(line)) if s]
+        if sentences or not line.strip():
+            lines.append(" ".join(sentences))
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def find_base(cache, files, variant=None):
+    """``(key, added, removed)`` of the stored survey closest to the selection ``files`` (``{filename: sha256}``).
+
+    A survey qualifies when it was stored with the same ``variant`` (see
+    :meth:`survey.cache.ResponseCache.put`), its papers are unchanged and it
+    shares at least as many papers with the selection as there are papers to
+    add; the one sharing most papers, then needing the fewest changes, then
+    the newest wins. Returns ``None`` when no survey qualifies.
+    """
+    best = None
+    for key, meta in cache.entries().items():
+        base = meta["files"]
+        if meta.get("variant") != variant or any(files.get(name, sha) != sha for name, sha in base.items()):
+            continue
+        shared = len(base.keys() & files.keys())
+        added = sorted(files.keys() - base.keys())
+        removed = sorted(base.keys() - files.keys())
+        if not shared or shared < len(added):
+            continue
+        rank = (shared, -len(added) - len(removed), meta["created"])
+        if best is None or rank > best[0]:
+            best = (rank, key, added, removed)
+    return None if best is None else best[1:]
+
+
+async def revise_survey(client, base_text, papers, filenames, added, removed, on_section=None,
+                        concurrency=MAX_CONCURRENCY, model=MODEL, reduce_model=REDUCE_MODEL):
+    """Revise the survey ``base_text`` for the selection ``papers`` / ``filenames``.
+
+    ``added`` are the filenames of the selection that ``base_text`` does not
+    cover and ``removed`` those it covers that are no longer selected.
+    ``client`` is an ``AsyncOpenAI``; ``on_section(heading, text)`` is called
+    as each section is final. Returns a :class:`survey.mapreduce.MapReduceResult`.
+    """
+    result = MapReduceResult()
+    semaphore = asyncio.Semaphore(concurrency)
+    base = survey_sections(base_text)
+    kept = [citation(name) for name in filenames]
+    removed = [citation(name) for name in removed]
+    sections = {heading: strip_citations(base.get(heading, ""), removed, kept)
+                for heading in (*STAGE_HEADINGS, "Conclusion")}
+
+    def done(heading, text):
+        result.sections[heading] = text
+        if on_section:
+            on_section(heading, text)
+
+    added = set(added)
+    new = [(record, name) for record, name in zip(papers, filenames) if name in added]
+    slices = stage_slices([record for record, _ in new], [name for _, name in new]) if new else {}
+
+    async def stage(heading):
+        blocks = slices.get(heading)
+        if not blocks:
+            done(heading, sections[heading] or NOT_PERFORMED)
+            return
+        current = sections[heading] if sections[heading] not in ("", NOT_PERFORMED) else "(no paper performs it yet)"
+        prompt = DELTA_PROMPT_TEMPLATE.format(
+            heading=heading, instruction=STAGE_INSTRUCTIONS[heading], count=len(new),
+            section=current, blocks="\n\n".join(blocks),
+        )
+        done(heading, await complete_section(client, semaphore, result, heading, prompt, model, STAGE_MAX_TOKENS))
+
+    done("References", build_references(papers, filenames))
+    await asyncio.gather(*(stage(heading) for heading in STAGE_HEADINGS))
+
+    revised = [heading for heading in STAGE_HEADINGS if slices.get(heading)]
+    if revised:
+        prompt = DELTA_CONCLUSION_TEMPLATE.format(
+            count=len(new), conclusion=sections["Conclusion"] or "(none yet)",
+            sections="\n\n".join(f"**{heading}**\n{result.sections[heading]}" for heading in revised),
+        )
+        done("Conclusion", await complete_section(client, semaphore, result, "Conclusion", prompt,
+                                                  reduce_model, REDUCE_MAX_TOKENS))
+    else:
+        done("Conclusion", sections["Conclusion"])
+    result.latency = time.perf_counter() - result.started
+    return result
@@ -0,0 +1,187 @@
+"""Per-paper stage digests, computed once and reused by every survey.
+
+A digest condenses each performed stage of one ``exhyte_data`` record into a
+few sentences. Digests are stored as ``<sha256>.<model>.json`` under
+``CACHE_DIR/digests``: keyed on the file's content hash, a paper is only
+digested again after its JSON changes, and a survey over many papers can be
+assembled from short digests instead of the records themselves.
+
+    python -m survey digests [--concurrency N] [--model MODEL]
+"""
+
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+
+from corpus import trace
+from corpus.config import CACHE_DIR
+from corpus.store import get_collection
+from survey.compact import citation_line, paper_stages, step_lines
+from survey.prompt import SYSTEM_PROMPT, TEMPERATURE
+from survey.stream import SectionSplitter
+
+DIGEST_DIR = os.path.join(CACHE_DIR, "digests")
+DIGEST_MODEL = "gpt-4.1-mini"
+DIGEST_MAX_TOKENS = 1500
+DIGEST_CONCURRENCY = 4
+
+DIGEST_PROMPT_TEMPLATE = """Condense the workflow of one scientific discovery paper, stage by stage.
+
+For every stage below, write two to four dense sentences covering the methods, tools, inputs, outputs and role of its sub-steps. Keep concrete names (models, datasets, tools, metrics) and omit examples unless they are essential. Start each stage with its bolded heading exactly as given, e.g. **E1: Query Structuring**, and do not add other sections.
+
+{paper}"""
+
+
+def _safe(model):
+    return re.sub(r"[^A-Za-z0-9.-]+", "_", model)
+
+
+class DigestStore:
+    """Digests as ``<sha256>.<model>.json`` files."""
+
+    def __init__(self, directory=DIGEST_DIR):
+        self.directory = directory
+
+    def _path(self, sha256, model):
+        return os.path.join(self.directory, f"{sha256}.{_safe(model)}.json")
+
+    def get(self, sha256, model=DIGEST_MODEL):
+        """Stored digest ``{"filename", "stages": {heading: text}, ...}`` or ``None``."""
+        try:
+            with open(self._path(sha256, model), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, sha256, model, filename, stages, usage=None):
+        entry = {"filename": filename, "sha256": sha256, "model": model, "stages": stages,
+                 "usage": usage, "created": time.time()}
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = self._path(sha256, model) + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp, self._path(sha256, model))
+        except OSError:
+            pass
+        return entry
+
+    def missing(self, files, model=DIGEST_MODEL):
+        """Filenames of ``files`` (``{filename: sha256}``) without a digest for ``model``."""
+        return [name for name, sha in files.items() if not os.path.exists(self._path(sha, model))]
+
+    def prune(self, current):
+        """Delete digests whose hash is no longer in ``current`` (``{filename: sha256}``)."""
+        live = set(current.values())
+        removed = 0
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return 0
+        for name in names:
+            if name.endswith(".json") and name.split(".", 1)[0] not in live:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+
+def digest_prompt(record, filename):
+    lines = [citation_line(record, filename)]
+    for heading, steps in paper_stages(record):
+        lines.append(f"### {heading}")
+        lines.extend(step_lines(steps))
+    return DIGEST_PROMPT_TEMPLATE.format(paper="\n".join(lines))
+
+
+def parse_digest(text, record):
+    """``{heading: text}`` for the stages the record performs."""
+    splitter = SectionSplitter()
+    splitter.feed(text + "\n")
+    return {heading: splitter.text(heading) for heading, _ in paper_stages(record) if splitter.text(heading)}
+
+
+async def build_digest(client, store, filename, record, sha256, model=DIGEST_MODEL, semaphore=None):
+    """Digest one paper with ``client`` (an ``AsyncOpenAI``) and store it."""
+    async with semaphore or asyncio.Semaphore(1):
+        started = time.perf_counter()
+        response = await client.chat.completions.create(
+            model=model,
+            messages=[{"role": "system", "content": SYSTEM_PROMPT},
+                      {"role": "user", "content": digest_prompt(record, filename)}],
+            temperature=TEMPERATURE,
+            max_tokens=DIGEST_MAX_TOKENS,
+        )
+        trace.llm(model, time.perf_counter() - started, response.usage and response.usage.prompt_tokens,
+                  response.usage and response.usage.completion_tokens)
+    usage = response.usage.model_dump() if response.usage else None
+    stages = parse_digest(response.choices[0].message.content or "", record)
+    return store.put(sha256, model, filename, stages, usage)
+
+
+async def build_missing(client, store, folder, files, model=DIGEST_MODEL, concurrency=DIGEST_CONCURRENCY,
+                        on_done=None):
+    """Build digests for the entries of ``files`` (``{filename: sha256}``) that lack one.
+
+    ``files`` holds the store's content hashes of papers in ``folder``; a
+    paper whose stored content changed since then fails instead of being
+    digested under the old hash. Runs at most ``concurrency`` requests at a time; ``on_done(filename, done,
+    total)`` is called after each paper. Returns ``{filename: error}`` for
+    papers that failed.
+    """
+    papers = get_collection(folder)
+    semaphore = asyncio.Semaphore(concurrency)
+    todo = store.missing(files, model)
+    errors = {}
+    done = 0
+
+    async def one(filename):
+        nonlocal done
+        try:
+            if papers.hashes().get(filename) != files[filename]:
+                raise ValueError("changed since it was selected")
+            await build_digest(client, store, filename, papers.paper(filename), files[filename], model, semaphore)
+        except Exception as e:
+            errors[filename] = str(e)
+        done += 1
+        if on_done:
+            on_done(filename, done, len(todo))
+
+    await asyncio.gather(*(one(name) for name in todo))
+    return errors
+
+
+def digest_content(papers, filenames, digests):
+    """Survey payload assembled from ``digests`` (one per paper, aligned with ``papers``)."""
+    blocks = []
+    for record, filename, digest in zip(papers, filenames, digests):
+        lines = [citation_line(record, filename)]
+        meta = [str(record[k]) for k in ("published", "link") if record.get(k)]
+        if meta:
+            lines.append(" · ".join(meta))
+        for heading, text in digest["stages"].items():
+            lines.append(f"### {heading}\n{text}")
+        blocks.append("\n".join(lines))
+    return (
+        f"Here are condensed stage digests of {len(papers)} papers, one block each: a citation line "
+        "([Author et al., Year] title, then published · link), then a digest of each stage the paper "
+        "performs. Stages that were not performed are omitted.\n\n" + "\n\n".join(blocks)
+    )
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_digest_store():
+    """The process-wide :class:`DigestStore`."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DigestStore()
+        return _store
@@ -0,0 +1,181 @@
+"""Parallel per-stage survey generation.
+
+Instead of one request writing every section in turn, each stage section
+(Inputs, E1 ... T2) is written by its own request that only sees that
+stage's slice of every selected paper, and the requests run concurrently
+under a semaphore. A short reduce request then writes the Conclusion from
+the stage sections, and the References are formatted locally from the paper
+metadata. Wall-clock time is roughly the slowest stage plus the reduce step.
+"""
+
+import asyncio
+import re
+import time
+
+from corpus import trace
+from survey.compact import citation, citation_line, paper_stages, step_lines
+from survey.prompt import MODEL, SYSTEM_PROMPT, TEMPERATURE
+from survey.stream import SECTION_HEADINGS
+
+MAX_CONCURRENCY = 8
+STAGE_MAX_TOKENS = 2000
+REDUCE_MODEL = "gpt-4.1-mini"
+REDUCE_MAX_TOKENS = 1200
+
+STAGE_INSTRUCTIONS = {
+    "Inputs to the Workflow": "Write one or more formal paragraphs integrating all papers that describe what "
+                              "users provided — goals, datasets, research context, or formal specifications.",
+    "E1: Query Structuring": "Summarize how queries or tasks were structured, reformulated, or decomposed.",
+    "E2: Data Retrieval": "Describe how relevant data, literature, or other sources were gathered or filtered.",
+    "E3: Knowledge Assembly": "Explain how structured knowledge was constructed, encoded, or represented.",
+    "H1: Hypothesis/Idea Generation": "Describe how the systems generated hypotheses or ideas, including tools "
+                                      "or reasoning strategies.",
+    "H2: Hypothesis or Idea Prioritization": "Describe how hypotheses were ranked, filtered, or evaluated.",
+    "T1: Experimental Design Generation": "Summarize how experiments were planned or designed to test "
+                                          "generated hypotheses.",
+    "T2: Iterative Refinement": "Describe any feedback loops or iterative improvement mechanisms used in "
+                                "the workflow.",
+}
+STAGE_HEADINGS = tuple(STAGE_INSTRUCTIONS)
+
+STAGE_PROMPT_TEMPLATE = """You are writing one section of a scientific survey that compares LLM-guided scientific discovery workflows.
+
+Write the section **{heading}**. {instruction}
+
+RULES
+1. Use formal academic writing — complete sentences, no bullet points.
+2. Only use the information given below.
+3. Cite every relevant paper in the form *(Author et al., Year)*, using the bracketed citation of its block.
+4. Begin with the bolded heading **{heading}**.
+
+Below is the {heading} stage of the {count} selected papers that perform it ({total} selected in total). Each block is a citation line followed by '- sub-step | field: value | ...' lines.
+
+{blocks}"""
+
+REDUCE_PROMPT_TEMPLATE = """Below are the stage sections of a scientific survey comparing {total} LLM-guided scientific discovery workflows.
+
+Write the section **Conclusion**: an integrative summary comparing how the workflows collectively advance automated scientific discovery. Use formal academic writing, no bullet points, only the information below, and keep citations in the form *(Author et al., Year)*. Begin with the bolded heading **Conclusion**.
+
+{sections}"""
+
+NOT_PERFORMED = "None of the selected papers report performing this stage."
+
+
+def _year(record, filename):
+    match = re.search(r"\d{4}", str(record.get("published", "")))
+    if match:
+        return match.group()
+    match = re.search(r" - (\d{4}) - ", filename or "")
+    return match.group(1) if match else "n.d."
+
+
+def build_references(papers, filenames):
+    """The References section, formatted locally as ``Authors (Year). Title. Date. Link.``
+
+    The author list in the records holds given names only, so the surname
+    part of the filename (``Author et al.``) is used, matching the in-text
+    citations.
+    """
+    lines = []
+    for i, (record, filename) in enumerate(zip(papers, filenames), 1):
+        authors = citation(filename).rsplit(",", 1)[0] if " - " in filename else record.get("authors", "")
+        if isinstance(authors, list):
+            authors = ", ".join(str(a) for a in authors)
+        parts = [f"{authors} ({_year(record, filename)}).", f"{record.get('paper_title', '')}."]
+        if record.get("published"):
+            parts.append(f"{record['published']}.")
+        if record.get("link"):
+            parts.append(str(record["link"]))
+        lines.append(f"{i}. " + " ".join(parts))
+    return "\n".join(lines)
+
+
+def stage_slices(papers, filenames):
+    """``{heading: [block, ...]}``: each paper's compact text for only that stage."""
+    slices = {heading: [] for heading in STAGE_HEADINGS}
+    for record, filename in zip(papers, filenames):
+        for heading, steps in paper_stages(record):
+            slices[heading].append("\n".join([citation_line(record, filename), *step_lines(steps)]))
+    return slices
+
+
+def _strip_heading(text, heading):
+    first, _, rest = text.strip().partition("\n")
+    if first.strip().strip("*#: ").lower() == heading.lower():
+        return rest.strip()
+    return text.strip()
+
+
+class MapReduceResult:
+    """Sections, per-call timings and token usage of one map-reduce survey."""
+
+    def __init__(self):
+        self.sections = {}
+        self.timings = {}
+        self.usage = {"prompt_tokens": 0, "completion_tokens": 0}
+        self.started = time.perf_counter()
+        self.latency = None
+
+    def add_usage(self, usage):
+        if usage is not None:
+            self.usage["prompt_tokens"] += usage.prompt_tokens
+            self.usage["completion_tokens"] += usage.completion_tokens
+
+    @property
+    def text(self):
+        return "\n\n".join(
+            f"**{heading}**  \n{self.sections[heading]}" for heading in SECTION_HEADINGS if heading in self.sections
+        )
+
+
+async def complete_section(client, semaphore, result, name, prompt, model, max_tokens):
+    """Section ``name`` written by one request for ``prompt``, timed and counted into ``result``."""
+    async with semaphore:
+        started = time.perf_counter()
+        response = await client.chat.completions.create(
+            model=model,
+            messages=[{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": prompt}],
+            temperature=TEMPERATURE,
+            max_tokens=max_tokens,
+        )
+        result.timings[name] = time.perf_counter() - started
+    result.add_usage(response.usage)
+    usage = response.usage
+    trace.llm(model, result.timings[name], usage and usage.prompt_tokens, usage and usage.completion_tokens)
+    return _strip_heading(response.choices[0].message.content or "", name)
+
+
+async def generate_survey(client, papers, filenames, on_section=None, concurrency=MAX_CONCURRENCY,
+                          model=MODEL, reduce_model=REDUCE_MODEL):
+    """Write a survey of ``papers`` with one concurrent request per stage.
+
+    ``client`` is an ``AsyncOpenAI``. ``on_section(heading, text)`` is called
+    from the event loop as each section completes.
+    """
+    result = MapReduceResult()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    def done(heading, text):
+        result.sections[heading] = text
+        if on_section:
+            on_section(heading, text)
+
+    async def stage(heading, blocks):
+        if not blocks:
+            done(heading, NOT_PERFORMED)
+            return
+        prompt = STAGE_PROMPT_TEMPLATE.format(
+            heading=heading, instruction=STAGE_INSTRUCTIONS[heading],
+            count=len(blocks), total=len(papers), blocks="\n\n".join(blocks),
+        )
+        done(heading, await complete_section(client, semaphore, result, heading, prompt, model, STAGE_MAX_TOKENS))
+
+    done("References", build_references(papers, filenames))
+    await asyncio.gather(*(stage(h, b) for h, b in stage_slices(papers, filenames).items()))
+
+    sections = "\n\n".join(f"**{h}**\n{result.sections[h]}" for h in STAGE_HEADINGS)
+    prompt = REDUCE_PROMPT_TEMPLATE.format(total=len(papers), sections=sections)
+    done("Conclusion", await complete_section(client, semaphore, result, "Conclusion", prompt,
+                                              reduce_model, REDUCE_MAX_TOKENS))
+    result.latency = time.perf_counter() - result.started
+    return result
@@ -0,0 +1,287 @@
+"""Process-wide scheduler of the LLM requests of every Streamlit session.
+
+Each session used to build its own client and block its script thread on
+its requests, so users generating the same survey at once each paid for it,
+and concurrent sessions hit the rate limits together. :class:`Scheduler`
+runs every request on one background event loop instead:
+
+* Identical work in flight is single-flighted. A :class:`Flight` is keyed on
+  the survey's cache key and a hash of the API key; a session asking for a
+  key that is already being generated with the same API key follows that
+  flight, streamed text included, and gets its result instead of sending
+  the request again.
+* Every API call of every flight takes one of ``MAX_CONCURRENCY`` slots and
+  fits into the ``RPM`` / ``TPM`` budgets (prompt plus ``max_tokens``, as in
+  :class:`survey.batch.RateLimiter`). A 429 holds back all calls for its
+  ``Retry-After`` delay.
+* One ``AsyncOpenAI`` client per API key lives as long as the process, so
+  its HTTP connections are reused across requests and sessions.
+* Calls waiting for a slot queue in order. A flight reports its position in
+  that queue and an ETA from the duration of recent calls.
+
+Flights keep running when the session that started them reruns or closes;
+their jobs write the response cache themselves. The budgets come from
+``SURVEY_CONCURRENCY``, ``SURVEY_RPM`` and ``SURVEY_TPM``.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import os
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+
+import openai
+from openai import AsyncOpenAI
+
+from survey.batch import MAX_RETRIES, RateLimiter, retry_delay
+from survey.compact import count_tokens
+
+MAX_CONCURRENCY = int(os.environ.get("SURVEY_CONCURRENCY", "8"))
+RPM = int(os.environ.get("SURVEY_RPM", "0")) or None
+TPM = int(os.environ.get("SURVEY_TPM", "0")) or None
+HISTORY = 50
+
+
+def _key_id(api_key):
+    """Short hash naming ``api_key`` without holding it."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+class Flight:
+    """One de-duplicated unit of work: its state, the events it emitted and its result."""
+
+    def __init__(self, scheduler, key, api_key):
+        self.key = key
+        self.api_key = api_key
+        self.id = (key, _key_id(api_key))
+        self.state = "queued"    # queued, running, done or failed
+        self.events = []         # streamed deltas, finished sections, progress, ... in order
+        self.followers = 0       # sessions that joined this flight instead of starting their own
+        self.running = 0         # API calls holding a slot
+        self.submitted = time.monotonic()
+        self.client = _ScheduledClient(scheduler, self)
+        self._scheduler = scheduler
+        self._result = None
+        self._error = None
+        self._changed = threading.Condition()
+
+    @property
+    def done(self):
+        return self.state in ("done", "failed")
+
+    @property
+    def position(self):
+        """1-based place of this flight's first waiting call in the queue; 0 when none is waiting."""
+        return self._scheduler.position(self)
+
+    @property
+    def eta(self):
+        """Estimated seconds until the first waiting call gets a slot, or ``None`` when unknown."""
+        return self._scheduler.eta(self.position)
+
+    def emit(self, event):
+        """Publish ``event`` to every session following the flight (called from the job)."""
+        with self._changed:
+            self.events.append(event)
+            self._changed.notify_all()
+
+    def _update(self, **changes):
+        with self._changed:
+            for name, value in changes.items():
+                setattr(self, name, value)
+            self._changed.notify_all()
+
+    def follow(self, interval=0.1):
+        """Yield lists of new events, from the first one on, every ``interval`` seconds until the flight ends.
+
+        Lists may be empty, so a caller can refresh the queue status in between.
+        """
+        seen = 0
+        while True:
+            with self._changed:
+                if len(self.events) == seen and not self.done:
+                    self._changed.wait(interval)
+                events, done = self.events[seen:], self.done
+            seen += len(events)
+            yield events
+            if done:
+                return
+
+    def result(self, timeout=None):
+        """The job's return value, once finished; re-raises its exception."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.done, timeout)
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class _Completions:
+    """``chat.completions`` of :class:`_ScheduledClient`."""
+
+    def __init__(self, scheduler, flight):
+        self._scheduler = scheduler
+        self._flight = flight
+
+    async def create(self, **kwargs):
+        """``AsyncOpenAI.chat.completions.create`` run in a scheduler slot; streams hold it until consumed."""
+        prompt = "".join(str(m.get("content", "")) for m in kwargs.get("messages", []))
+        tokens = count_tokens(prompt)[0] + (kwargs.get("max_tokens") or 0)
+        client = self._scheduler.client(self._flight.api_key)
+        if kwargs.get("stream"):
+            return self._stream(client, tokens, kwargs)
+        async with self._scheduler.slot(self._flight, tokens):
+            return await self._retrying(lambda: client.chat.completions.create(**kwargs))
+
+    async def _stream(self, client, tokens, kwargs):
+        async with self._scheduler.slot(self._flight, tokens):
+            stream = await self._retrying(lambda: client.chat.completions.create(**kwargs))
+            async for chunk in stream:
+                yield chunk
+
+    async def _retrying(self, send):
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                return await send()
+            except openai.RateLimitError as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                delay = retry_delay(e, attempt)
+                self._scheduler.limiter.pause(delay)
+            except (openai.APIConnectionError, openai.InternalServerError) as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                delay = retry_delay(e, attempt)
+            await asyncio.sleep(delay)
+
+
+class _ScheduledClient:
+    """The subset of ``AsyncOpenAI`` the survey code uses, routed through the scheduler."""
+
+    def __init__(self, scheduler, flight):
+        self.chat = SimpleNamespace(completions=_Completions(scheduler, flight))
+
+
+class Scheduler:
+    """Runs flights on a background event loop under global concurrency and rate budgets."""
+
+    def __init__(self, concurrency=MAX_CONCURRENCY, rpm=RPM, tpm=TPM):
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rpm, tpm)
+        self.started = 0         # flights that sent requests
+        self.shared = 0          # submissions answered by joining a flight in progress
+        self._flights = {}       # (key, _key_id(api_key)) -> Flight in progress
+        self._clients = {}       # api key -> AsyncOpenAI
+        self._waiting = []       # flight of each call waiting for a slot, oldest first
+        self._durations = deque(maxlen=HISTORY)
+        self._slots = asyncio.Semaphore(concurrency)
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="survey-scheduler", daemon=True)
+        self._thread.start()
+
+    def client(self, api_key):
+        """The shared ``AsyncOpenAI`` of ``api_key`` (retries are left to the scheduler)."""
+        with self._lock:
+            if api_key not in self._clients:
+                self._clients[api_key] = AsyncOpenAI(api_key=api_key, max_retries=0)
+            return self._clients[api_key]
+
+    def submit(self, key, api_key, job):
+        """``(flight, joined)``: the :class:`Flight` generating ``key`` and whether it was already in progress.
+
+        Only a flight started with the same ``api_key`` is joined. A new flight runs ``await job(flight)``. ``job`` makes its requests
+        through ``flight.client`` and publishes partial output with
+        ``flight.emit``. It runs on the scheduler's loop, so it must not call
+        Streamlit.
+        """
+        with self._lock:
+            flight = self._flights.get((key, _key_id(api_key)))
+            if flight is not None:
+                flight.followers += 1
+                self.shared += 1
+                return flight, True
+            flight = Flight(self, key, api_key)
+            self._flights[flight.id] = flight
+            self.started += 1
+        asyncio.run_coroutine_threadsafe(self._run(flight, job), self._loop)
+        return flight, False
+
+    async def _run(self, flight, job):
+        result, error = None, None
+        try:
+            result = await job(flight)
+        except Exception as e:
+            error = e
+        except BaseException:
+            # Cancelled: followers get an error instead of waiting forever
+            error = RuntimeError("the request was cancelled")
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(flight.id, None)
+            flight._update(_result=result, _error=error, state="failed" if error is not None else "done")
+
+    @contextlib.asynccontextmanager
+    async def slot(self, flight, tokens):
+        """Hold one of the concurrency slots for a call of ``flight`` estimated at ``tokens``."""
+        with self._lock:
+            self._waiting.append(flight)
+        try:
+            await self._slots.acquire()
+            try:
+                await self.limiter.acquire(tokens)
+            except BaseException:
+                self._slots.release()
+                raise
+        finally:
+            with self._lock:
+                self._waiting.remove(flight)
+        flight._update(running=flight.running + 1, state="running")
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._slots.release()
+            self._durations.append(time.monotonic() - started)
+            flight._update(running=flight.running - 1)
+
+    def position(self, flight):
+        with self._lock:
+            for i, waiting in enumerate(self._waiting):
+                if waiting is flight:
+                    return i + 1
+        return 0
+
+    def eta(self, position):
+        """Seconds until a call ``position`` places back in the queue gets a slot, from recent call durations."""
+        if not position or not self._durations:
+            return None
+        average = sum(self._durations) / len(self._durations)
+        return self.limiter.paused() + average * ((position - 1) // self.concurrency + 1)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "flights": len(self._flights),
+                "waiting": len(self._waiting),
+                "running": sum(flight.running for flight in self._flights.values()),
+                "started": self.started,
+                "shared": self.shared,
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """The process-wide :class:`Scheduler`."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler()
+        return _scheduler
@@ -0,0 +1,203 @@
+"""Streaming survey completions.
+
+:func:`stream_completion` consumes a streamed chat completion and yields text
+deltas while timing it; :class:`SectionSplitter` assigns the growing text to
+the survey's stage sections so each one can be rendered as soon as it
+starts. Per-request timings are appended to ``CACHE_DIR/llm_metrics.jsonl``.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+
+from corpus import trace
+from corpus.config import CACHE_DIR
+
+METRICS_PATH = os.path.join(CACHE_DIR, "llm_metrics.jsonl")
+
+SECTION_HEADINGS = (
+    "Inputs to the Workflow",
+    "E1: Query Structuring",
+    "E2: Data Retrieval",
+    "E3: Knowledge Assembly",
+    "H1: Hypothesis/Idea Generation",
+    "H2: Hypothesis or Idea Prioritization",
+    "T1: Experimental Design Generation",
+    "T2: Iterative Refinement",
+    "Conclusion",
+    "References",
+)
+
+_HEADING_RE = re.compile(r"^\s*(?:#+\s*)?\*\*(.+?)\*\*\s*(.*)$")
+
+
+def _normalize(heading):
+    return re.sub(r"[^a-z0-9]+", " ", heading.lower()).strip()
+
+
+_KNOWN = {_normalize(h): h for h in SECTION_HEADINGS}
+
+
+class StreamMetrics:
+    """Timing of one streamed request."""
+
+    def __init__(self, model):
+        self.model = model
+        self.started = time.perf_counter()
+        self.first_token = None
+        self.finished = None
+        self.chunks = 0
+        self.prompt_tokens = None
+        self.completion_tokens = None
+
+    @property
+    def ttft(self):
+        return None if self.first_token is None else self.first_token - self.started
+
+    @property
+    def latency(self):
+        return None if self.finished is None else self.finished - self.started
+
+    @property
+    def tokens_per_sec(self):
+        tokens = self.completion_tokens or self.chunks
+        if self.finished is None or self.first_token is None or self.finished <= self.first_token:
+            return None
+        return tokens / (self.finished - self.first_token)
+
+    def as_dict(self):
+        return {
+            "time": time.time(),
+            "model": self.model,
+            "ttft_s": self.ttft,
+            "latency_s": self.latency,
+            "tokens_per_s": self.tokens_per_sec,
+            "chunks": self.chunks,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+
+_recent = deque(maxlen=100)
+_recent_lock = threading.Lock()
+
+
+def record_metrics(metrics):
+    """Keep ``metrics`` in the in-process history and append it to ``METRICS_PATH``."""
+    row = metrics.as_dict()
+    with _recent_lock:
+        _recent.append(row)
+        try:
+            os.makedirs(os.path.dirname(METRICS_PATH) or ".", exist_ok=True)
+            with open(METRICS_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(row) + "\n")
+        except OSError:
+            pass
+
+
+def recent_metrics():
+    with _recent_lock:
+        return list(_recent)
+
+
+def _delta(chunk, metrics):
+    """Text of one streamed ``chunk`` (or ``None``), recording its timing and usage in ``metrics``."""
+    if chunk.usage:
+        metrics.prompt_tokens = chunk.usage.prompt_tokens
+        metrics.completion_tokens = chunk.usage.completion_tokens
+    if not chunk.choices:
+        return None
+    delta = chunk.choices[0].delta.content
+    if delta:
+        if metrics.first_token is None:
+            metrics.first_token = time.perf_counter()
+        metrics.chunks += 1
+    return delta
+
+
+def _finish(metrics):
+    metrics.finished = time.perf_counter()
+    record_metrics(metrics)
+    trace.llm(metrics.model, metrics.latency, metrics.prompt_tokens, metrics.completion_tokens)
+
+
+def stream_completion(client, messages, model, temperature, max_tokens, metrics=None):
+    """Yield text deltas of a streamed chat completion.
+
+    ``metrics`` (a :class:`StreamMetrics`) is filled in as the stream is
+    consumed, including token usage when the server reports it, and recorded
+    once the stream ends.
+    """
+    metrics = metrics or StreamMetrics(model)
+    stream = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    for chunk in stream:
+        delta = _delta(chunk, metrics)
+        if delta:
+            yield delta
+    _finish(metrics)
+
+
+async def astream_completion(client, messages, model, temperature, max_tokens, metrics=None):
+    """:func:`stream_completion` for an ``AsyncOpenAI`` client, as an async generator."""
+    metrics = metrics or StreamMetrics(model)
+    stream = await client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    async for chunk in stream:
+        delta = _delta(chunk, metrics)
+        if delta:
+            yield delta
+    _finish(metrics)
+
+
+class SectionSplitter:
+    """Split streamed survey text into its bold-headed stage sections.
+
+    Text before the first known heading goes to ``""``. A line is only
+    classified once it is complete; the unfinished tail is reported as part
+    of the current section.
+    """
+
+    def __init__(self):
+        self.sections = {}
+        self.current = ""
+        self._pending = ""
+
+    def feed(self, delta):
+        """Add ``delta``; returns the names of the sections whose text changed."""
+        changed = {self.current}
+        self._pending += delta
+        while "\n" in self._pending:
+            line, self._pending = self._pending.split("\n", 1)
+            match = _HEADING_RE.match(line)
+            heading = _KNOWN.get(_normalize(match.group(1))) if match else None
+            if heading:
+                self.current = heading
+                line = match.group(2)
+                changed.add(heading)
+                if not line:
+                    self.sections.setdefault(heading, "")
+                    continue
+            self.sections[self.current] = self.sections.get(self.current, "") + line + "\n"
+        return changed
+
+    def text(self, name):
+        text = self.sections.get(name, "")
+        if name == self.current:
+            text += self._pending
+        return text.strip()
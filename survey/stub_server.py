@@ -0,0 +1,142 @@
+"""Local stand-in for the OpenAI chat completions endpoint.
+
+Answers ``POST /v1/chat/completions`` with a canned survey (or a single
+section when the prompt asks for one), either as one JSON response or, for
+``"stream": true``, as server-sent event chunks with a configurable delay, so
+streaming, caching and retries (``--rate-limit-every``) can be exercised
+without an API key or spending tokens::
+
+    python -m survey.stub_server --port 8765 --delay 0.02
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 streamlit run Home.py
+
+Any non-empty API key is accepted.
+"""
+
+import argparse
+import itertools
+import json
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from survey.stream import SECTION_HEADINGS
+
+_PARAGRAPH = (
+    "Stub output standing in for a generated section. It cites the selected "
+    "papers [1] and is long enough to span many streamed chunks, so partial "
+    "rendering and throughput can be observed."
+)
+
+
+def canned_survey():
+    parts = []
+    for heading in SECTION_HEADINGS:
+        body = "[1] Stub et al. (2025). Stub paper." if heading == "References" else _PARAGRAPH
+        parts.append(f"**{heading}**  \n{body}\n")
+    return "\n".join(parts)
+
+
+_SECTION_RE = re.compile(r"Write the section \*\*(.+?)\*\*")
+
+
+def canned_reply(messages):
+    """One section when the prompt asks for a single section, else a whole survey."""
+    prompt = str(messages[-1].get("content", "")) if messages else ""
+    match = _SECTION_RE.search(prompt)
+    if match:
+        return f"**{match.group(1)}**  \n{_PARAGRAPH}\n"
+    return canned_survey()
+
+
+def _chunks(text):
+    return re.findall(r"\S*\s*", text)[:-1] or [text]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    delay = 0.02
+    first_token_delay = 0.3
+    rate_limit_every = 0  # answer every Nth request with a 429
+    retry_after = 1
+    _requests = itertools.count(1)
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=()):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.rate_limit_every and next(self._requests) % self.rate_limit_every == 0:
+            self._send_json(429, {"error": {"message": "Rate limit reached (stub)", "type": "requests",
+                                            "code": "rate_limit_exceeded"}},
+                            headers=[("Retry-After", str(self.retry_after))])
+            return
+        text = canned_reply(body.get("messages", []))
+        chunks = _chunks(text)
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // 4
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(chunks),
+                 "total_tokens": prompt_tokens + len(chunks)}
+        base = {"id": "chatcmpl-stub", "created": int(time.time()), "model": body.get("model", "stub")}
+
+        if not body.get("stream"):
+            time.sleep(self.first_token_delay + self.delay * len(chunks))
+            self._send_json(200, {**base, "object": "chat.completion", "usage": usage, "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}]})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        def event(payload):
+            self.wfile.write(b"data: " + json.dumps(payload).encode("utf-8") + b"\n\n")
+            self.wfile.flush()
+
+        base["object"] = "chat.completion.chunk"
+        time.sleep(self.first_token_delay)
+        for piece in chunks:
+            event({**base, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]})
+            time.sleep(self.delay)
+        event({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if body.get("stream_options", {}).get("include_usage"):
+            event({**base, "choices": [], "usage": usage})
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=StubHandler.delay, help="seconds between chunks")
+    parser.add_argument("--first-token-delay", type=float, default=StubHandler.first_token_delay)
+    parser.add_argument("--rate-limit-every", type=int, default=0, metavar="N",
+                        help="answer every Nth request with a 429 (exercises retries)")
+    parser.add_argument("--retry-after", type=float, default=StubHandler.retry_after, help="seconds, sent with 429s")
+    args = parser.parse_args(argv)
+    StubHandler.delay = args.delay
+    StubHandler.first_token_delay = args.first_token_delay
+    StubHandler.rate_limit_every = args.rate_limit_every
+    StubHandler.retry_after = args.retry_after
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    print(f"Stub OpenAI endpoint on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from survey.stub_server import StubHandler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def base_url():
+    handler = type("Handler", (StubHandler,), {"delay": 0, "first_token_delay": 0, "rate_limit_every": 2,
+                                               "retry_after": 0.1, "_requests": itertools.count(1)})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def groups(tmp_path):
+    exhyte = tmp_path / "exhyte_data"
+    exhyte.mkdir()
+    (tmp_path / "Papers").mkdir()
+    names = sorted(os.listdir(os.path.join(ROOT, "exhyte_data")))[:4]
+    for name in names:
+        shutil.copy(os.path.join(ROOT, "exhyte_data", name), exhyte / name)
+    (exhyte / "Broken - 2025 - Truncated.json").write_text('{"title": ')
+    path = tmp_path / "groups.json"
+    spec = {"first": names[:2], "second": names[2:], "broken": [names[0], "Broken - 2025 - Truncated.json"]}
+    path.write_text(json.dumps(spec))
+    return path
+
+
+def batch(tmp_path, base_url, groups):
+    env = dict(os.environ, PYTHONPATH=ROOT, CORPUS_CACHE_DIR=str(tmp_path / "cache"), CORPUS_WATCH="off",
+               EXHYTE_DIR=str(tmp_path / "exhyte_data"), PAPERS_DIR=str(tmp_path / "Papers"),
+               OPENAI_API_KEY="stub", OPENAI_BASE_URL=base_url)
+    return subprocess.run([sys.executable, "-m", "survey", "batch", "--groups", str(groups), "--out",
+                           str(tmp_path / "surveys"), "--concurrency", "1"],
+                          cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120)
+
+
+def test_batch_retries_and_resumes(tmp_path, base_url, groups):
+    first = batch(tmp_path, base_url, groups)
+    assert first.returncode == 1, first.stderr
+    assert "3 groups, 0 already done" in first.stdout
+    assert "RateLimitError, retry 1" in first.stdout
+    assert "broken: failed" in first.stdout
+    assert "2 generated, 0 from cache, 0 already done, 1 failed" in first.stdout
+    assert sorted(os.listdir(tmp_path / "surveys")) == ["first.md", "second.md"]
+
+    journal = [json.loads(line) for line in (tmp_path / "cache" / "batch" / "default.journal.jsonl").open()]
+    assert sorted((row["group"], row["status"]) for row in journal) == [
+        ("broken", "failed"), ("first", "done"), ("second", "done")]
+
+    second = batch(tmp_path, base_url, groups)
+    assert "3 groups, 2 already done" in second.stdout
+    assert "0 generated, 0 from cache, 2 already done, 1 failed" in second.stdout
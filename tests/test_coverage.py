@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+import corpus.store
+from corpus.coverage import CoverageIndex
+from corpus.store import Store
+
+INPUTS, QUERY, RETRIEVAL = "Inputs to the workflow", "Query Structuring", "Data Retrieval"
+
+
+def record(title, stages):
+    """Workflow record of ``{stage: performed}``; a performed stage may give ``{sub-step: performed}`` instead."""
+    data = {"paper_title": title}
+    for stage, steps in stages.items():
+        data[stage] = {"performed": "Yes" if steps else "No"}
+        for step, done in (steps if isinstance(steps, dict) else {}).items():
+            data[stage][step] = {"performed": "Yes" if done else "No"}
+    return data
+
+
+RECORDS = {
+    "A - 2024 - One.json": record("One", {INPUTS: {"Papers": True, "Datasets": False}, QUERY: True, RETRIEVAL: False}),
+    "B - 2025 - Two.json": record("Two", {INPUTS: {"Papers": True, "Datasets": True}, QUERY: True, RETRIEVAL: True}),
+    "C - 2025 - Three.json": record("Three", {INPUTS: {"Papers": False}, QUERY: False, RETRIEVAL: True}),
+}
+
+
+@pytest.fixture
+def papers(tmp_path, monkeypatch):
+    # Unwatched, so every sync rescans the folder and every refresh saves at once
+    monkeypatch.setattr(corpus.store.watch, "changes", lambda folder, since: (None, None))
+    monkeypatch.setattr(corpus.store.watch, "get_watcher", lambda folder: None)
+    folder = tmp_path / "exhyte_data"
+    folder.mkdir()
+    for name, data in RECORDS.items():
+        (folder / name).write_text(json.dumps(data))
+    store = Store(str(tmp_path / "corpus.db"))
+    store.sync(str(folder))
+    return store.collection(str(folder))
+
+
+def test_coverage_matrix(tmp_path, papers):
+    index = CoverageIndex(papers.folder, str(tmp_path / "coverage"))
+    assert index.refresh(papers) == 3
+    assert index.refresh(papers) == 0
+    assert index.names == sorted(RECORDS)
+    assert index.stages == [INPUTS, QUERY, RETRIEVAL]
+    assert index.available_years() == [2025, 2024]
+
+    adoption = index.adoption()
+    assert adoption["papers"].to_dict() == {INPUTS: 3, QUERY: 2, RETRIEVAL: 2}
+    assert adoption.loc[QUERY, "share"] == pytest.approx(2 / 3)
+    steps = index.adoption(level=INPUTS)["papers"].to_dict()
+    assert steps == {"Papers": 2, "Datasets": 1}
+
+    rows = index.select([2025])
+    assert [index.names[i] for i in rows] == ["B - 2025 - Two.json", "C - 2025 - Three.json"]
+    assert index.adoption(rows)["papers"].to_dict() == {INPUTS: 2, QUERY: 1, RETRIEVAL: 2}
+    trend = index.trend()
+    assert trend.loc[2024].to_dict() == {INPUTS: 1.0, QUERY: 1.0, RETRIEVAL: 0.0}
+    assert trend.loc[2025, QUERY] == 0.5
+
+    both = index.cooccurrence(normalize="papers")
+    assert both.loc[QUERY, RETRIEVAL] == 1 and both.loc[INPUTS, INPUTS] == 3
+    assert index.cooccurrence()[QUERY][RETRIEVAL] == pytest.approx(1 / 3)
+    assert index.cooccurrence(normalize="conditional").loc[QUERY, RETRIEVAL] == 0.5
+    with pytest.raises(ValueError):
+        index.cooccurrence(normalize="cosine")
+
+
+def test_coverage_refresh_follows_the_store(tmp_path, papers):
+    index = CoverageIndex(papers.folder, str(tmp_path / "coverage"))
+    index.refresh(papers)
+    folder = tmp_path / "exhyte_data"
+    (folder / "A - 2024 - One.json").unlink()
+    (folder / "C - 2025 - Three.json").write_text(json.dumps(record("Three", {INPUTS: True, QUERY: True})))
+    papers.store.sync(str(folder))
+
+    assert index.refresh(papers) == 2
+    assert index.names == ["B - 2025 - Two.json", "C - 2025 - Three.json"]
+    assert index.adoption()["papers"].to_dict() == {INPUTS: 2, QUERY: 2, RETRIEVAL: 1}
+    assert index.available_years() == [2025]
+
+    # A new process loads the saved matrices and finds nothing to update
+    reloaded = CoverageIndex(papers.folder, str(tmp_path / "coverage"))
+    assert reloaded.refresh(papers) == 0
+    assert (reloaded.stage_matrix == index.stage_matrix).all()
+    assert (reloaded.step_matrix == index.step_matrix).all()
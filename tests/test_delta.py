@@ -0,0 +1,36 @@
+from survey.cache import ResponseCache
+from survey.delta import find_base, strip_citations
+
+
+def test_drops_sentences_citing_only_removed_papers():
+    text = "Agents plan (Liu et al., 2025). Tools help (Liu et al., 2025; Rabby et al., 2025)."
+    assert strip_citations(text, ["Liu et al., 2025"]) == "Tools help (Rabby et al., 2025)."
+
+
+def test_drops_narrative_mentions():
+    text = "Liu et al. (2025) use agents. Others do not (Rabby et al., 2025)."
+    assert strip_citations(text, ["Liu et al., 2025"]) == "Others do not (Rabby et al., 2025)."
+
+
+def test_keeps_citations_shared_with_kept_papers():
+    text = "Agents plan (Liu et al., 2025)."
+    assert strip_citations(text, ["Liu et al., 2025"], kept=["Liu et al., 2025"]) == text
+
+
+def test_citation_without_year():
+    # compact.citation() returns the bare basename for filenames without "Author - Year - Title"
+    text = "Some systems use notes (Notes). Others do not (Rabby et al., 2025)."
+    assert strip_citations(text, ["Notes"]) == "Others do not (Rabby et al., 2025)."
+
+
+def test_find_base_only_revises_surveys_of_the_same_variant(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    single = {"mode": "single", "model": "m", "format": "compact"}
+    cache.put("single", {"a.json": "1", "b.json": "2"}, "Survey.", variant=single)
+    cache.put("parallel", {"a.json": "1", "b.json": "2", "c.json": "3"}, "Survey.",
+              variant={"mode": "map-reduce", "model": "m", "format": None})
+    files = {"a.json": "1", "b.json": "2", "c.json": "3", "d.json": "4"}
+    assert find_base(cache, files, single) == ("single", ["c.json", "d.json"], [])
+    assert find_base(cache, files, {**single, "format": "json"}) is None
+    # A paper whose content changed disqualifies the surveys citing it
+    assert find_base(cache, {**files, "a.json": "5"}, single) is None
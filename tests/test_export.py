@@ -0,0 +1,53 @@
+import json
+import os
+
+import pytest
+
+import corpus.export
+import corpus.store
+from corpus.export import export_site, markdown_html
+from corpus.store import Store
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+URL = "https://example.org/paper?id=1&format=pdf"
+
+
+def test_markdown_html_escapes_text_and_links_once():
+    markdown = f"### Q&A\n- **Tools** <b> & [A<B]({URL})\n  - nested\n---\nPlain 1 < 2"
+    assert markdown_html(markdown) == (
+        "<h3>Q&amp;A</h3>\n"
+        "<ul><li>\n"
+        '<strong>Tools</strong> &lt;b&gt; &amp; <a href="https://example.org/paper?id=1&amp;format=pdf">A&lt;B</a>\n'
+        "<ul><li>\nnested\n</li></ul>\n</li></ul>\n"
+        "<hr>\n"
+        "<p>Plain 1 &lt; 2</p>"
+    )
+
+
+@pytest.fixture
+def folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(corpus.store.watch, "changes", lambda folder, since: (None, None))
+    monkeypatch.setattr(corpus.export, "get_store", lambda: Store(str(tmp_path / "corpus.db")))
+    folder = tmp_path / "Papers"
+    folder.mkdir()
+    name = sorted(os.listdir(os.path.join(ROOT, "Papers")))[0]
+    with open(os.path.join(ROOT, "Papers", name), encoding="utf-8") as f:
+        data = json.load(f)
+    data.update(paper_title="Proteins & <Cells>", link=URL)
+    (folder / "Special - 2025 - Proteins.json").write_text(json.dumps(data))
+    return folder
+
+
+def test_export_escapes_titles_and_links(tmp_path, folder):
+    out = tmp_path / "site"
+    stats = export_site(str(out), str(folder))
+    assert stats["rendered"] == 1 and stats["removed"] == 0
+    [page] = (out / "papers").iterdir()
+    text = page.read_text(encoding="utf-8")
+    assert "<title>Proteins &amp; &lt;Cells&gt;</title>" in text
+    assert '<a href="https://example.org/paper?id=1&amp;format=pdf">Paper Link</a>' in text
+    assert "&amp;amp;" not in text and "<Cells>" not in text
+    assert "Proteins &amp; &lt;Cells&gt;" in (out / "years" / "2025.html").read_text(encoding="utf-8")
+
+    # Nothing changed: no paper page is rendered again
+    assert export_site(str(out), str(folder))["rendered"] == 0
@@ -0,0 +1,55 @@
+import asyncio
+import threading
+
+import pytest
+
+from survey.scheduler import Scheduler
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = Scheduler()
+    yield scheduler
+    scheduler._loop.call_soon_threadsafe(scheduler._loop.stop)
+
+
+def blocking_job(release, value):
+    async def job(flight):
+        while not release.is_set():
+            await asyncio.sleep(0.01)
+        return value
+
+    return job
+
+
+def test_flights_are_shared_per_api_key(scheduler):
+    release = threading.Event()
+    first, joined = scheduler.submit("survey", "sk-one", blocking_job(release, "one"))
+    assert not joined
+    same, joined = scheduler.submit("survey", "sk-one", blocking_job(release, "again"))
+    assert joined and same is first
+    other, joined = scheduler.submit("survey", "sk-two", blocking_job(release, "two"))
+    assert not joined and other is not first
+    assert scheduler.stats()["flights"] == 2
+
+    release.set()
+    assert (first.result(5), same.result(5), other.result(5)) == ("one", "one", "two")
+    assert scheduler.stats() == {"flights": 0, "waiting": 0, "running": 0, "started": 2, "shared": 1}
+
+
+def test_cancelled_flight_is_removed(scheduler):
+    async def cancelled(flight):
+        raise asyncio.CancelledError
+
+    flight, _ = scheduler.submit("survey", "sk-one", cancelled)
+    with pytest.raises(RuntimeError, match="cancelled"):
+        flight.result(5)
+    assert flight.state == "failed"
+    assert scheduler.stats()["flights"] == 0
+
+    # The next submission starts a new flight instead of joining the dead one
+    release = threading.Event()
+    retry, joined = scheduler.submit("survey", "sk-one", blocking_job(release, "retried"))
+    assert not joined and retry is not flight
+    release.set()
+    assert retry.result(5) == "retried"
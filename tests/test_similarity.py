@@ -0,0 +1,107 @@
+import json
+
+import numpy as np
+import pytest
+
+import corpus.store
+from corpus.similarity import DIM, SimilarityIndex, kmeans, paper_vector
+from corpus.store import Store
+
+
+def paper(title, objective):
+    return {"paper_title": title, "objective": {"answer": objective}, "published": "2025"}
+
+
+PAPERS = {
+    "a.json": paper("Catalysts", "Language models propose catalysts for chemistry reactions."),
+    "b.json": paper("Catalyst screening", "Agents screen catalysts for chemistry reactions in the lab."),
+    "c.json": paper("Protein folding", "Graph networks predict protein folding in biology."),
+    "d.json": paper("Protein design", "Graph networks design protein structures in biology."),
+}
+
+
+@pytest.fixture
+def folder(tmp_path, monkeypatch):
+    # Unwatched, so every sync rescans the folder and every refresh saves at once
+    monkeypatch.setattr(corpus.store.watch, "changes", lambda folder, since: (None, None))
+    monkeypatch.setattr(corpus.store.watch, "get_watcher", lambda folder: None)
+    folder = tmp_path / "Papers"
+    folder.mkdir()
+    for name, data in PAPERS.items():
+        (folder / name).write_text(json.dumps(data))
+    return folder
+
+
+@pytest.fixture
+def store(tmp_path):
+    return Store(str(tmp_path / "corpus.db"))
+
+
+def build(store, folder, path):
+    store.sync(str(folder))
+    index = SimilarityIndex(str(folder), str(path))
+    index.refresh(store.collection(str(folder)))
+    return index
+
+
+def test_kmeans_separates_groups():
+    rng = np.random.default_rng(1)
+    centers = np.eye(8, dtype=np.float32)[:2]
+    matrix = np.repeat(centers, 20, axis=0) + rng.normal(0, 0.05, (40, 8)).astype(np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    labels, centroids = kmeans(matrix, 2)
+    assert len(set(labels[:20])) == 1 and len(set(labels[20:])) == 1 and labels[0] != labels[20]
+    assert np.allclose(np.linalg.norm(centroids, axis=1), 1.0, atol=1e-5)
+    # Fitted on a sample, every row is still assigned
+    sampled, _ = kmeans(matrix, 2, sample=10)
+    assert len(sampled) == 40 and set(sampled[:20]).isdisjoint(sampled[20:])
+    # No more clusters than rows
+    assert len(kmeans(matrix[:3], 5)[1]) == 3
+
+
+def test_refresh_adds_changes_and_deletes(tmp_path, store, folder):
+    index = build(store, folder, tmp_path / "similar")
+    papers = store.collection(str(folder))
+    assert len(index) == 4
+    assert index.refresh(papers) == 0
+    before = {name: np.array(index.tf[row]) for name, row in index.rows.items()}
+
+    # Deleting a.json shifts every other row up
+    (folder / "a.json").unlink()
+    changed = paper("Protein folding", "Telescopes survey distant galaxies in astronomy.")
+    (folder / "c.json").write_text(json.dumps(changed))
+    (folder / "e.json").write_text(json.dumps(paper("Galaxies", "Telescopes map galaxies in astronomy.")))
+    store.sync(str(folder))
+    assert index.refresh(papers) == 3
+
+    assert index.names == ["b.json", "c.json", "d.json", "e.json"]
+    assert index.rows == {name: i for i, name in enumerate(index.names)}
+    assert "a.json" not in index
+    for name in ("b.json", "d.json"):
+        assert np.array_equal(index.tf[index.rows[name]], before[name])
+    assert np.array_equal(index.tf[index.rows["c.json"]], paper_vector("c.json", changed))
+    assert index.similar("e.json", k=1)[0][0] == "c.json"
+
+    # Same matrix as a fresh build, and as the saved one a new process loads
+    fresh = build(store, folder, tmp_path / "fresh")
+    assert np.allclose(index.matrix, fresh.matrix)
+    reloaded = SimilarityIndex(str(folder), str(tmp_path / "similar"))
+    assert reloaded.names == index.names and reloaded.refresh(papers) == 0
+    assert np.allclose(reloaded.matrix, index.matrix) and reloaded.matrix.shape == (4, DIM)
+
+
+def test_similar_batch_within_excludes_the_paper_itself(tmp_path, store, folder):
+    index = build(store, folder, tmp_path / "similar")
+    results = index.similar_batch(["a.json", "c.json", "missing.json"], k=2)
+    assert len(results[0]) == len(results[1]) == 2
+    assert results[0][0][0] == "b.json" and results[1][0][0] == "d.json"
+    assert results[0] == index.similar("a.json", k=2)
+    assert results[2] == []
+    assert all(score >= other for row in results[:2] for (_, score), (_, other) in zip(row, row[1:]))
+
+    within = ["a.json", "c.json", "d.json"]
+    near_a, near_c = index.similar_batch(["a.json", "c.json"], k=3, within=within)
+    assert sorted(name for name, _ in near_a) == ["c.json", "d.json"]
+    assert [name for name, _ in near_c] == ["d.json", "a.json"]
+    # A paper outside ``within`` can still be the query
+    assert [name for name, _ in index.similar("b.json", k=1, within=within)] == ["a.json"]
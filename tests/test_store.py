@@ -0,0 +1,153 @@
+import json
+import os
+
+import pytest
+
+import corpus.store
+from corpus.store import Store
+
+
+def paper(title, year, subjects=(), tools=(), objective="", limitations=""):
+    return {
+        "objective": {"answer": objective},
+        "method": {"steps": ["Collect data."], "tools": list(tools)},
+        "subject_area": {"areas": list(subjects)},
+        "limitations": {"answer": limitations},
+        "paper_title": title,
+        "authors": ["A. Author"],
+        "published": str(year),
+    }
+
+
+PAPERS = {
+    "a.json": paper("Agents", 2024, ["Chemistry"], ["GPT-4"], "Autonomous agents plan chemistry experiments.",
+                    "Costly models."),
+    "b.json": paper("Graphs", 2025, ["Biology"], ["Gemini"], "Knowledge graphs for biology hypotheses.",
+                    "Agents are not evaluated."),
+    "c.json": paper("Both", 2025, ["Chemistry", "Biology"], ["GPT-4", "Gemini"], "Hypotheses about proteins."),
+}
+
+
+def write(folder, name, data):
+    path = folder / name
+    path.write_text(json.dumps(data))
+    # Distinct signatures even when a rewrite lands in the same mtime tick
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+@pytest.fixture
+def unwatched(monkeypatch):
+    changed = {"names": None}
+    monkeypatch.setattr(corpus.store.watch, "changes", lambda folder, since: (None, changed["names"]))
+    return changed
+
+
+@pytest.fixture
+def folder(tmp_path, unwatched):
+    folder = tmp_path / "Papers"
+    folder.mkdir()
+    for name, data in PAPERS.items():
+        write(folder, name, data)
+    return folder
+
+
+@pytest.fixture
+def store(tmp_path):
+    return Store(str(tmp_path / "corpus.db"))
+
+
+def test_sync_inserts_updates_and_deletes(store, folder):
+    assert store.sync(str(folder)) == 3
+    papers = store.collection(str(folder))
+    assert papers.filenames() == ["a.json", "b.json", "c.json"]
+    assert store.sync(str(folder)) == 0
+
+    write(folder, "a.json", paper("Agents, revised", 2023, ["Physics"], objective="Telescopes."))
+    (folder / "b.json").unlink()
+    write(folder, "d.json", paper("New", 2025, ["Biology"]))
+    assert store.sync(str(folder)) == 3
+    papers = store.collection(str(folder))
+    assert papers.filenames() == ["a.json", "c.json", "d.json"]
+    assert papers.titles()["a.json"] == "Agents, revised"
+    assert papers.counts("subject", {}) == {"Physics": 1, "Chemistry": 1, "Biology": 2}
+    assert papers.search("telescopes") and not papers.search("autonomous")
+    assert not papers.search("graphs")
+
+
+def test_sync_retries_failed_imports_of_a_watched_folder(store, folder, unwatched, monkeypatch):
+    prepare_row = corpus.store.prepare_row
+
+    def flaky(key, name, raw, st):
+        if name == "b.json":
+            raise OSError("transient")
+        return prepare_row(key, name, raw, st)
+
+    monkeypatch.setattr(corpus.store, "prepare_row", flaky)
+    store.sync(str(folder))
+    papers = store.collection(str(folder))
+    assert "b.json" not in papers.filenames()
+    assert papers.errors() == {"b.json": "OSError: transient"}
+
+    # The watcher reports no changes, yet the failed file is imported again
+    monkeypatch.setattr(corpus.store, "prepare_row", prepare_row)
+    unwatched["names"] = []
+    assert store.sync(str(folder)) == 1
+    papers = store.collection(str(folder))
+    assert "b.json" in papers.filenames()
+    assert papers.errors() == {}
+
+
+def test_malformed_files_are_listed_as_errors(store, folder):
+    (folder / "bad.json").write_text('{"objective": ')
+    store.sync(str(folder))
+    assert list(store.collection(str(folder)).errors()) == ["bad.json"]
+
+
+def test_search_matches_and_snippet(store, folder):
+    store.sync(str(folder))
+    papers = store.collection(str(folder))
+    assert {name for name, _ in papers.search("hypotheses")} == {"b.json", "c.json"}
+    assert papers.matches("hypotheses") == 2
+    assert len(papers.search("hypotheses", limit=1)) == 1
+    assert papers.matches("nothing") == 0 and papers.search("nothing") == []
+
+    # "agents" is in the objective of a.json and the limitations of b.json
+    assert {name for name, _ in papers.search("agents")} == {"a.json", "b.json"}
+    assert [name for name, _ in papers.search("objective:agents")] == ["a.json"]
+    assert [name for name, _ in papers.search("agents", ["limitations"])] == ["b.json"]
+    assert papers.matches("agents", ["limitations"]) == 1
+    assert {name for name, _ in papers.search("tools:gemini")} == {"b.json", "c.json"}
+    assert papers.search("agents", ["tools"]) == []
+
+    text, field = papers.snippet("b.json", "agents")
+    assert (text, field) == ("**Agents** are not evaluated.", "limitations")
+    assert papers.snippet("b.json", "agents", ["objective"]) == ("", "")
+
+
+@pytest.mark.parametrize("match_all", [False, True])
+def test_counts_and_match_with_several_years(store, folder, match_all):
+    store.sync(str(folder))
+    papers = store.collection(str(folder))
+    years = {"year": [2024, 2025]}
+    if match_all:
+        # A paper has a single year, so requiring both matches nothing
+        assert papers.match(years, match_all) == []
+        assert papers.counts("subject", years, match_all) == {}
+    else:
+        assert papers.match(years) == ["a.json", "b.json", "c.json"]
+        assert papers.counts("subject", years) == {"Chemistry": 2, "Biology": 2}
+        assert papers.counts("year", years) == {2024: 1, 2025: 2}
+
+
+def test_counts_and_match_any_or_all_values(store, folder):
+    store.sync(str(folder))
+    papers = store.collection(str(folder))
+    both = {"subject": ["Chemistry", "Biology"]}
+    assert papers.match(both) == ["a.json", "b.json", "c.json"]
+    assert papers.match(both, match_all=True) == ["c.json"]
+    assert papers.match({"subject": ["Chemistry"], "year": [2025]}) == ["c.json"]
+    # In OR mode a facet's counts ignore its own selection, in AND mode they are narrowed by it
+    assert papers.counts("subject", both) == {"Chemistry": 2, "Biology": 2}
+    assert papers.counts("subject", both, match_all=True) == {"Chemistry": 1, "Biology": 1}
+    assert papers.counts("tool", {"subject": ["Biology"]}) == {"Gemini": 2, "GPT-4": 1}
@@ -0,0 +1,85 @@
+import asyncio
+import json
+import threading
+from http.server import ThreadingHTTPServer
+
+import openai
+import pytest
+
+from survey import stream
+from survey.stream import SECTION_HEADINGS, SectionSplitter, StreamMetrics, astream_completion, stream_completion
+from survey.stub_server import StubHandler, canned_survey
+
+MESSAGES = [{"role": "user", "content": "Write a survey."}]
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    handler = type("Handler", (StubHandler,), {"delay": 0.001, "first_token_delay": 0.05})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def metrics_path(tmp_path, monkeypatch):
+    path = tmp_path / "llm_metrics.jsonl"
+    monkeypatch.setattr(stream, "METRICS_PATH", str(path))
+    return path
+
+
+def check_metrics(metrics, text):
+    assert metrics.ttft >= 0.05
+    assert metrics.latency >= metrics.ttft
+    assert metrics.chunks > 1
+    assert metrics.completion_tokens == metrics.chunks
+    assert metrics.prompt_tokens is not None
+    assert metrics.tokens_per_sec > 0
+    assert metrics.as_dict()["chunks"] == metrics.chunks
+    assert text == canned_survey()
+
+
+def test_stream_completion(base_url, metrics_path):
+    client = openai.OpenAI(base_url=base_url, api_key="stub")
+    metrics = StreamMetrics("stub")
+    text = "".join(stream_completion(client, MESSAGES, "stub", 0.0, 100, metrics))
+    check_metrics(metrics, text)
+    rows = [json.loads(line) for line in metrics_path.read_text().splitlines()]
+    assert [row["chunks"] for row in rows] == [metrics.chunks]
+
+
+def test_astream_completion(base_url, metrics_path):
+    async def collect():
+        client = openai.AsyncOpenAI(base_url=base_url, api_key="stub")
+        return "".join([delta async for delta in astream_completion(client, MESSAGES, "stub", 0.0, 100, metrics)])
+
+    metrics = StreamMetrics("stub")
+    check_metrics(metrics, asyncio.run(collect()))
+    assert metrics_path.exists()
+
+
+def test_sections_of_a_streamed_survey(base_url):
+    client = openai.OpenAI(base_url=base_url, api_key="stub")
+    splitter = SectionSplitter()
+    seen = []
+    for delta in stream_completion(client, MESSAGES, "stub", 0.0, 100):
+        for name in splitter.feed(delta):
+            if name and name not in seen:
+                seen.append(name)
+    assert seen == list(SECTION_HEADINGS)
+    assert splitter.text("References") == "[1] Stub et al. (2025). Stub paper."
+    assert all(splitter.text(heading).startswith("Stub output") for heading in SECTION_HEADINGS[:-1])
+
+
+def test_splitter_classifies_complete_lines_only():
+    splitter = SectionSplitter()
+    assert splitter.feed("Preamble\n**Conclusion") == {""}
+    assert splitter.text("") == "Preamble\n**Conclusion"
+    assert splitter.feed("** Findings.\nMore") == {"", "Conclusion"}
+    assert splitter.text("") == "Preamble"
+    assert splitter.text("Conclusion") == "Findings.\nMore"
+    assert splitter.feed("\n**Unknown heading**\n") == {"Conclusion"}
+    assert splitter.text("Conclusion") == "Findings.\nMore\n**Unknown heading**"